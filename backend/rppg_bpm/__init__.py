@@ -0,0 +1,34 @@
+"""rPPG heart-rate analysis (advanced CHROM/POS with a legacy fallback).
+
+패키지를 임포트해도 아무 것도 로드하지 않는다. 아래 이름에 처음 접근할 때
+해당 모듈(scipy 등)이 로드되며, 폴백 전용 백엔드(ICA → sklearn, wavelet → pywt)와
+그래프(matplotlib)는 실제로 사용하는 함수 안에서만 임포트된다.
+
+    from rppg_bpm import analyze_series_arrays
+"""
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+# 공개 이름 → 정의된 하위 모듈
+_EXPORTS = {
+    "analyze_and_plot": "main",
+    "analyze_series": "main",
+    "analyze_series_arrays": "main",
+    "plot_series": "main",
+    "AdvancedRPPGAnalyzer": "advanced_rppg",
+    "advanced_compute_series": "advanced_rppg",
+    "advanced_compute_series_from_arrays": "advanced_rppg",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # 다음 접근부터는 일반 속성으로 조회
+    return value
@@ -4,14 +4,15 @@ Advanced rPPG Heart Rate Analyzer
 개선된 비디오 기반 심박수 분석 도구
 """
 
-import os
+import logging
+
 import numpy as np
-import matplotlib.pyplot as plt
 from scipy.signal import find_peaks, butter, filtfilt
 from scipy import signal as sp_signal
 from scipy.ndimage import gaussian_filter1d
-import cv2
-from typing import Tuple, Optional, List
+from typing import Any, Dict, Tuple, Optional, List
+
+logger = logging.getLogger(__name__)
 
 
 class AdvancedRPPGAnalyzer:
@@ -22,9 +23,24 @@ class AdvancedRPPGAnalyzer:
     def extract_rppg_from_rgb(self, rgb_signals: List[List[float]]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
         """RGB 신호에서 rPPG 신호 추출"""
         if len(rgb_signals) < self.fps:
-            print(f"  신호가 너무 짧습니다 (최소 {self.fps}개 필요, 현재 {len(rgb_signals)}개)")
+            logger.debug("신호가 너무 짧습니다 (최소 %d개 필요, 현재 %d개)", self.fps, len(rgb_signals))
             return None, None
         
+        rppg_signal, algorithm_used = self.select_signal(rgb_signals)
+        if rppg_signal is None:
+            logger.debug("두 알고리즘 모두 실패")
+            return None, None
+        
+        logger.debug("사용된 알고리즘: %s, 추출된 신호 길이: %d개 샘플", algorithm_used, len(rppg_signal))
+        
+        # 시간 축 생성
+        duration = len(rgb_signals) / self.fps
+        t = np.linspace(0, duration, len(rppg_signal))
+        
+        return rppg_signal, t
+    
+    def select_signal(self, rgb_signals) -> Tuple[Optional[np.ndarray], Optional[str]]:
+        """CHROM 과 POS 를 모두 적용하고 SNR 이 높은 쪽을 (신호, 알고리즘 이름)으로 반환"""
         # CHROM과 POS 알고리즘 시도
         rppg_chrom = self.apply_improved_chrom(rgb_signals, self.fps)
         rppg_pos = self.apply_improved_pos(rgb_signals, self.fps)
@@ -36,29 +52,13 @@ class AdvancedRPPGAnalyzer:
             snr_pos = self.calculate_snr(rppg_pos)
             
             if snr_chrom > snr_pos:
-                rppg_signal = rppg_chrom
-                algorithm_used = "CHROM"
-            else:
-                rppg_signal = rppg_pos
-                algorithm_used = "POS"
+                return rppg_chrom, "CHROM"
+            return rppg_pos, "POS"
         elif rppg_chrom is not None:
-            rppg_signal = rppg_chrom
-            algorithm_used = "CHROM"
+            return rppg_chrom, "CHROM"
         elif rppg_pos is not None:
-            rppg_signal = rppg_pos
-            algorithm_used = "POS"
-        else:
-            print(f"  두 알고리즘 모두 실패")
-            return None, None
-        
-        print(f"  사용된 알고리즘: {algorithm_used}")
-        print(f"  추출된 신호 길이: {len(rppg_signal)}개 샘플")
-        
-        # 시간 축 생성
-        duration = len(rgb_signals) / self.fps
-        t = np.linspace(0, duration, len(rppg_signal))
-        
-        return rppg_signal, t
+            return rppg_pos, "POS"
+        return None, None
     
     def apply_improved_chrom(self, rgb_signals, fps):
         """개선된 CHROM 알고리즘"""
@@ -315,32 +315,33 @@ class AdvancedRPPGAnalyzer:
         return time_bpms
 
 
-def advanced_analyze_and_plot(
+def advanced_compute_series(
     rgb_csv_path: str,
     blink_csv_path: str,
-    bpm_img_path: str,
-    blink_img_path: str,
     fps: int = 15,
-) -> Tuple[str, str]:
-    """개선된 분석 및 시각화 함수 - 기존 인터페이스 유지"""
-    
-    # 스타일 설정
-    import matplotlib as mpl
-    mpl.rcParams['font.family'] = 'DejaVu Sans'
-    mpl.rcParams['axes.edgecolor'] = '#DDDDDD'
-    mpl.rcParams['axes.linewidth'] = 0.8
-    mpl.rcParams['axes.titlesize'] = 16
-    mpl.rcParams['axes.labelsize'] = 13
+) -> Dict[str, Any]:
+    """BPM / 눈 깜빡임 시계열을 계산한다 (그래프 없이 수치만)."""
 
     # 데이터 로드
     BGR_data = np.loadtxt(rgb_csv_path, delimiter="\t")
+    blink_data = np.loadtxt(blink_csv_path, delimiter="\t")
+    return advanced_compute_series_from_arrays(BGR_data, blink_data, fps)
+
+
+def advanced_compute_series_from_arrays(
+    BGR_data: np.ndarray,
+    blink_data: np.ndarray,
+    fps: int = 15,
+) -> Dict[str, Any]:
+    """CSV 와 같은 열 순서의 배열(특징 저장소 memmap 등)로 시계열을 계산한다."""
+    BGR_data = np.asarray(BGR_data, dtype=float)
     if BGR_data.ndim == 1:
         BGR_data = BGR_data.reshape(1, -1)
 
     # BGR → RGB로 변환
     rgb_data = BGR_data[:, [2, 1, 0]]  # B,G,R → R,G,B
     
-    blink_data = np.loadtxt(blink_csv_path, delimiter="\t")
+    blink_data = np.asarray(blink_data, dtype=float)
     if blink_data.ndim:
         blink_data = blink_data.flatten()
 
@@ -355,9 +356,9 @@ def advanced_analyze_and_plot(
     rppg_signal, time_axis = analyzer.extract_rppg_from_rgb(rgb_trim.tolist())
     
     if rppg_signal is None:
-        print("rPPG 신호 추출 실패 - 기존 방법 사용")
+        logger.debug("rPPG 신호 추출 실패 - 기존 방법 사용")
         # 기존 방법으로 폴백
-        from first_stage.pos import pos
+        from .first_stage.pos import pos
         signal_pos = pos(rgb_trim, fps, 20)
         rppg_signal = signal_pos
         time_axis = np.linspace(0, len(rppg_signal)/fps, len(rppg_signal))
@@ -365,15 +366,13 @@ def advanced_analyze_and_plot(
     # BPM 메트릭 계산
     bpm_metrics = analyzer.calculate_bpm_metrics(rppg_signal, time_axis)
     
-    print(f"새로운 rPPG 분석 결과:")
-    print(f"  FFT BPM: {bpm_metrics['fft_bpm']:.2f}")
-    print(f"  Peak BPM: {bpm_metrics['peak_bpm']:.2f}")
+    logger.debug("rPPG 분석 결과: FFT BPM %.2f, Peak BPM %.2f", bpm_metrics["fft_bpm"], bpm_metrics["peak_bpm"])
 
     # BPM 시계열 생성 (실제 시간 축 계산)
+    video_duration = len(rgb_data) / fps  # 실제 영상 길이 (초)
     if len(bpm_metrics['time_bpms']) > 0:
         bpm_per_second = bpm_metrics['time_bpms']
         # 윈도우 기반으로 1초마다 계산되므로, 실제 시간 축 생성
-        video_duration = len(rgb_data) / fps
         time_step = video_duration / len(bpm_per_second) if len(bpm_per_second) > 0 else 1
         time_bpm = [i * time_step for i in range(len(bpm_per_second))]
     else:
@@ -389,6 +388,58 @@ def advanced_analyze_and_plot(
                 bpm_per_second.append(bpm)
                 time_bpm.append(start / fps)  # 정확한 시간 계산 (정수 나눗셈 → 실수 나눗셈)
 
+    # 눈 깜빡임 (1초 윈도우 합계)
+    blink_counts, time_blink = [], []
+    for start in range(0, len(blink_trim), fps):
+        window = blink_trim[start : start + fps]
+        blink_counts.append(float(np.sum(window)))
+        time_blink.append(start / fps)  # 정확한 시간 계산
+
+    return {
+        "method": "advanced",
+        "fps": fps,
+        "video_duration": video_duration,
+        "fft_bpm": float(bpm_metrics['fft_bpm']),
+        "peak_bpm": float(bpm_metrics['peak_bpm']),
+        "time_bpm": [float(t) for t in time_bpm],
+        "bpm_per_second": [float(b) for b in bpm_per_second],
+        "blink_duration": len(blink_trim) / fps,
+        "time_blink": time_blink,
+        "blink_counts": blink_counts,
+    }
+
+
+def _set_time_ticks(duration: float) -> None:
+    import matplotlib.pyplot as plt
+
+    # x축 범위를 영상 길이로 제한
+    plt.xlim(0, duration)
+
+    # x축 틱을 적절히 설정 (5초 간격 또는 적절한 간격)
+    tick_interval = max(1, int(duration / 8))  # 최대 8개 정도의 틱
+    ticks = list(range(0, int(duration) + 1, tick_interval))
+    if int(duration) not in ticks:  # 마지막 시간점 추가
+        ticks.append(int(duration))
+    plt.xticks(ticks)
+
+
+def plot_series(series: Dict[str, Any], bpm_img_path: str, blink_img_path: str) -> Tuple[str, str]:
+    """advanced_compute_series 결과로 BPM / 눈 깜빡임 그래프를 저장한다."""
+
+    # matplotlib 은 그래프를 그릴 때만 로드한다 (서버 시작 시간 단축)
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+
+    # 스타일 설정
+    mpl.rcParams['font.family'] = 'DejaVu Sans'
+    mpl.rcParams['axes.edgecolor'] = '#DDDDDD'
+    mpl.rcParams['axes.linewidth'] = 0.8
+    mpl.rcParams['axes.titlesize'] = 16
+    mpl.rcParams['axes.labelsize'] = 13
+
+    time_bpm = series["time_bpm"]
+    bpm_per_second = series["bpm_per_second"]
+
     # BPM 그래프 생성
     plt.figure(figsize=(12, 5), dpi=120)
     if len(time_bpm) > 0:
@@ -402,17 +453,7 @@ def advanced_analyze_and_plot(
     
     # 실제 영상 길이에 맞게 x축 설정
     if len(time_bpm) > 0:
-        video_duration = len(rgb_data) / fps  # 실제 영상 길이 (초)
-        
-        # x축 범위를 영상 길이로 제한
-        plt.xlim(0, video_duration)
-        
-        # x축 틱을 적절히 설정 (5초 간격 또는 적절한 간격)
-        tick_interval = max(1, int(video_duration / 8))  # 최대 8개 정도의 틱
-        ticks = list(range(0, int(video_duration) + 1, tick_interval))
-        if int(video_duration) not in ticks:  # 마지막 시간점 추가
-            ticks.append(int(video_duration))
-        plt.xticks(ticks)
+        _set_time_ticks(series["video_duration"])
     
     plt.grid(axis='y', linestyle='--', alpha=0.3)
     plt.legend(loc='upper right', frameon=False)
@@ -421,11 +462,8 @@ def advanced_analyze_and_plot(
     plt.close()
 
     # 눈 깜빡임 그래프 (기존 방식 유지)
-    blink_counts, time_blink = [], []
-    for start in range(0, len(blink_trim), fps):
-        window = blink_trim[start : start + fps]
-        blink_counts.append(np.sum(window))
-        time_blink.append(start / fps)  # 정확한 시간 계산
+    time_blink = series["time_blink"]
+    blink_counts = series["blink_counts"]
 
     plt.figure(figsize=(12, 5), dpi=120)
     plt.plot(time_blink, blink_counts, color='#34C759', linewidth=2.2, label='Blink Rate', alpha=0.9)
@@ -442,17 +480,7 @@ def advanced_analyze_and_plot(
     
     # 실제 영상 길이에 맞게 x축 설정
     if len(time_blink) > 0:
-        video_duration = len(blink_trim) / fps  # 실제 영상 길이 (초)
-        
-        # x축 범위를 영상 길이로 제한
-        plt.xlim(0, video_duration)
-        
-        # x축 틱을 적절히 설정
-        tick_interval = max(1, int(video_duration / 8))  # 최대 8개 정도의 틱
-        ticks = list(range(0, int(video_duration) + 1, tick_interval))
-        if int(video_duration) not in ticks:  # 마지막 시간점 추가
-            ticks.append(int(video_duration))
-        plt.xticks(ticks)
+        _set_time_ticks(series["blink_duration"])
     
     plt.grid(axis='y', linestyle='--', alpha=0.3)
     plt.legend(loc='upper right', frameon=False)
@@ -461,3 +489,15 @@ def advanced_analyze_and_plot(
     plt.close()
 
     return bpm_img_path, blink_img_path
+
+
+def advanced_analyze_and_plot(
+    rgb_csv_path: str,
+    blink_csv_path: str,
+    bpm_img_path: str,
+    blink_img_path: str,
+    fps: int = 15,
+) -> Tuple[str, str]:
+    """개선된 분석 및 시각화 함수 - 기존 인터페이스 유지"""
+    series = advanced_compute_series(rgb_csv_path, blink_csv_path, fps)
+    return plot_series(series, bpm_img_path, blink_img_path)
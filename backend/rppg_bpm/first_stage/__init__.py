@@ -0,0 +1 @@
+"""1단계: RGB 신호 → 맥파 신호 (CHROM, POS, ICA, SSR)."""
@@ -46,5 +46,4 @@ def SSR(X, fps, l = None):
                 SR = first_term + second_term
                 #
                 SR_array.append(SR[0])
-    print(np.asarray(SR_array, dtype=np.float32))
     return P
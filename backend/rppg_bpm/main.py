@@ -0,0 +1,280 @@
+import logging
+
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+# 새로운 고급 rPPG 분석기 import
+from .advanced_rppg import (
+    AdvancedRPPGAnalyzer,
+    advanced_analyze_and_plot,
+    advanced_compute_series,
+    advanced_compute_series_from_arrays,
+)
+from .advanced_rppg import plot_series as _advanced_plot_series
+
+# 기존 모듈들 (폴백용)
+# ICA(sklearn) 와 matplotlib 은 폴백/그래프 경로에서만 필요하므로 사용할 때 로드한다
+from .first_stage.chrom import chrom
+from .first_stage.pos import pos
+from .second_stage.fourier_analysis import fourier_analysis
+
+# 분석 경로는 실시간 세션/재분석마다 호출되므로 진단 메시지는 logging 으로만 남긴다
+logger = logging.getLogger(__name__)
+
+
+def analyze_and_plot(
+    rgb_csv_path: str,
+    blink_csv_path: str,
+    bpm_img_path: str,
+    blink_img_path: str,
+    fps: int = 15,
+) -> Tuple[str, str]:
+    """
+    개선된 rPPG 분석 함수
+    새로운 고급 알고리즘을 먼저 시도하고, 실패 시 기존 방법으로 폴백
+    """
+    
+    logger.debug("rPPG 분석 시작 (고급 알고리즘 우선)")
+    
+    try:
+        # 새로운 고급 rPPG 분석기 시도
+        result = advanced_analyze_and_plot(
+            rgb_csv_path, blink_csv_path, bpm_img_path, blink_img_path, fps
+        )
+        logger.debug("고급 rPPG 분석 성공")
+        return result
+        
+    except Exception as e:
+        logger.debug("고급 rPPG 분석 실패, 기존 방법으로 폴백: %s", e)
+        
+        # 기존 방법으로 폴백
+        return _legacy_analyze_and_plot(
+            rgb_csv_path, blink_csv_path, bpm_img_path, blink_img_path, fps
+        )
+
+
+def analyze_series(
+    rgb_csv_path: str,
+    blink_csv_path: str,
+    fps: int = 15,
+) -> Dict[str, Any]:
+    """
+    BPM / Blink 시계열만 계산 (그래프 생성 없음)
+    고급 알고리즘을 먼저 시도하고, 실패 시 기존 방법으로 폴백
+    """
+    try:
+        return advanced_compute_series(rgb_csv_path, blink_csv_path, fps)
+    except Exception as e:
+        logger.debug("고급 rPPG 분석 실패, 기존 방법으로 폴백: %s", e)
+        return _legacy_compute_series(rgb_csv_path, blink_csv_path, fps)
+
+
+def resample_uniform(
+    timestamps: np.ndarray,
+    rgb_data: np.ndarray,
+    blink_data: np.ndarray,
+    fps: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """실제 프레임 시각의 샘플을 fps 간격의 균일한 시간 축으로 옮긴다.
+
+    RGB 는 선형 보간하고 blink 플래그는 직전 샘플 값을 유지한다. 얼굴이 검출되지 않아
+    빠진 구간도 시간 축에 그대로 남으므로 BPM / 깜빡임의 시간 단위가 맞는다.
+    """
+    t = np.asarray(timestamps, dtype=float)
+    rgb_data = np.asarray(rgb_data, dtype=float).reshape(len(t), -1)
+    blink_data = np.asarray(blink_data, dtype=float).reshape(-1)
+
+    grid = t[0] + np.arange(int(np.floor((t[-1] - t[0]) * fps)) + 1) / fps
+    rgb = np.column_stack([np.interp(grid, t, rgb_data[:, c]) for c in range(rgb_data.shape[1])])
+    previous = np.clip(np.searchsorted(t, grid, side="right") - 1, 0, len(t) - 1)
+    return rgb, blink_data[previous]
+
+
+def analyze_series_arrays(
+    rgb_data: np.ndarray,
+    blink_data: np.ndarray,
+    fps: int = 15,
+    timestamps: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """analyze_series 와 같지만 CSV 대신 배열(특징 저장소)을 입력으로 받는다.
+
+    timestamps(초)가 주어지면 샘플을 fps 간격으로 재샘플링한 뒤 계산한다.
+    """
+    if timestamps is not None and len(timestamps) == len(rgb_data) and len(timestamps) > 1:
+        rgb_data, blink_data = resample_uniform(timestamps, rgb_data, blink_data, fps)
+    try:
+        return advanced_compute_series_from_arrays(rgb_data, blink_data, fps)
+    except Exception as e:
+        logger.debug("고급 rPPG 분석 실패, 기존 방법으로 폴백: %s", e)
+        return _legacy_compute_series_from_arrays(rgb_data, blink_data, fps)
+
+
+def plot_series(series: Dict[str, Any], bpm_img_path: str, blink_img_path: str) -> Tuple[str, str]:
+    """analyze_series 결과를 계산 방식에 맞는 스타일로 그린다."""
+    if series["method"] == "advanced":
+        return _advanced_plot_series(series, bpm_img_path, blink_img_path)
+    return _legacy_plot_series(series, bpm_img_path, blink_img_path)
+
+
+def _legacy_analyze_and_plot(
+    rgb_csv_path: str,
+    blink_csv_path: str,
+    bpm_img_path: str,
+    blink_img_path: str,
+    fps: int = 15,
+) -> Tuple[str, str]:
+    """
+    기존 rPPG 분석 방법 (폴백용)
+    """
+    series = _legacy_compute_series(rgb_csv_path, blink_csv_path, fps)
+    return _legacy_plot_series(series, bpm_img_path, blink_img_path)
+
+
+def _legacy_compute_series(
+    rgb_csv_path: str,
+    blink_csv_path: str,
+    fps: int = 15,
+) -> Dict[str, Any]:
+    # 데이터 로드
+    BGR_data = np.loadtxt(rgb_csv_path, delimiter="\t")
+    blink_data = np.loadtxt(blink_csv_path, delimiter="\t")
+    return _legacy_compute_series_from_arrays(BGR_data, blink_data, fps)
+
+
+def _legacy_compute_series_from_arrays(
+    BGR_data: np.ndarray,
+    blink_data: np.ndarray,
+    fps: int = 15,
+) -> Dict[str, Any]:
+    BGR_data = np.asarray(BGR_data, dtype=float)
+    if BGR_data.ndim == 1:
+        BGR_data = BGR_data.reshape(1, -1)
+
+    # BGR → R,G,B 로 맞추기
+    R = BGR_data[:, 0:1]
+    G = BGR_data[:, 1:2]
+    B = BGR_data[:, 2:3]
+
+    blink_data = np.asarray(blink_data, dtype=float)
+    if blink_data.ndim:
+        blink_data = blink_data.flatten()
+
+    # 첫 21 프레임 제거(초기값 안정화) 나중에 제거.
+    BGR_trim = BGR_data[21:]
+    blink_trim = blink_data[21:]
+
+    from .first_stage.ica import ica
+
+    #신호 생성
+    signal_chrom = chrom(BGR_trim, fps, 32)
+    signal_pos = pos(BGR_trim, fps, 20)
+    signal_ica = ica(BGR_trim, fps)
+
+    # BPM 계산(Fourier, Wavelet, Interbeat 바꾸면서)
+    hr_fourier_pos = fourier_analysis(signal_pos, fps) * 60
+    logger.debug("Legacy POS + Fourier BPM : %.2f", hr_fourier_pos)
+
+    # BPM 시계열
+    bpm_per_second = []
+    time_bpm = []
+    window_size = 5 * fps  # 5초 윈도우로 줄임 (더 민감하게)
+    
+    for start in range(0, len(signal_pos) - window_size, fps):  # 1초씩 이동
+        window = signal_pos[start : start + window_size]
+        bpm = fourier_analysis(window, fps) * 60
+        if 40 <= bpm <= 180:  # 이상치 제거
+            bpm_per_second.append(float(bpm))
+            time_bpm.append(start // fps)  # 1초 단위
+
+    # 눈 깜빡임 (1초 윈도우 합계)
+    blink_counts, time_blink = [], []
+    for start in range(0, len(blink_trim), fps):
+        window = blink_trim[start : start + fps]
+        blink_counts.append(float(np.sum(window)))
+        time_blink.append(start // fps)  # 1초 단위
+
+    return {
+        "method": "legacy",
+        "fps": fps,
+        "video_duration": len(BGR_data) / fps,
+        "fft_bpm": float(hr_fourier_pos),
+        "peak_bpm": 0.0,
+        "time_bpm": time_bpm,
+        "bpm_per_second": bpm_per_second,
+        "blink_duration": len(blink_trim) / fps,
+        "time_blink": time_blink,
+        "blink_counts": blink_counts,
+    }
+
+
+def _legacy_plot_series(series: Dict[str, Any], bpm_img_path: str, blink_img_path: str) -> Tuple[str, str]:
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+
+    # 스타일 설정
+    mpl.rcParams['font.family'] = 'DejaVu Sans'
+    mpl.rcParams['axes.edgecolor'] = '#DDDDDD'
+    mpl.rcParams['axes.linewidth'] = 0.8
+    mpl.rcParams['axes.titlesize'] = 16
+    mpl.rcParams['axes.labelsize'] = 13
+
+    time_bpm = series["time_bpm"]
+    bpm_per_second = series["bpm_per_second"]
+
+    # 그래프
+    plt.figure(figsize=(12, 5), dpi=120)
+    plt.plot(time_bpm, bpm_per_second, color='#007AFF', linewidth=2.2, label='Heart Rate', alpha=0.9)
+    plt.axhspan(60, 100, color='lightgreen', alpha=0.2, label='Normal range')
+    
+    # 스타일
+    plt.title("Heart Rate Over Time (Legacy)", pad=15)
+    plt.xlabel("Time (seconds)")
+    plt.ylabel("Estimated BPM")
+    if len(time_bpm) > 0:
+        plt.xticks(range(0, max(time_bpm)+1, max(1, len(time_bpm)//10)))
+    plt.grid(axis='y', linestyle='--', alpha=0.3)
+    plt.legend(loc='upper right', frameon=False)
+    plt.tight_layout()
+    plt.savefig(bpm_img_path, dpi=300)
+    plt.close()
+
+    # 그래프
+    time_blink = series["time_blink"]
+    blink_counts = series["blink_counts"]
+
+    plt.figure(figsize=(12, 5), dpi=120)
+    plt.plot(time_blink, blink_counts, color='#34C759', linewidth=2.2, label='Blink Rate', alpha=0.9)
+    
+    # 평균 blink rate 라인 추가
+    if len(blink_counts) > 0:
+        avg_blink = np.mean(blink_counts)
+        plt.axhline(y=avg_blink, color='gray', linestyle='--', linewidth=1.4, label='Average')
+    
+    # 스타일
+    plt.title("Blink Frequency Over Time", pad=15)
+    plt.xlabel("Time (seconds)")
+    plt.ylabel("Blinks / sec")
+    if len(time_blink) > 0:
+        plt.xticks(range(0, max(time_blink)+1, max(1, len(time_blink)//10)))
+    plt.grid(axis='y', linestyle='--', alpha=0.3)
+    plt.legend(loc='upper right', frameon=False)
+    plt.tight_layout()
+    plt.savefig(blink_img_path, dpi=300)
+    plt.close()
+
+    return bpm_img_path, blink_img_path
+
+
+# 단독 실행 시 CLI 기능 (backend/ 에서 python -m rppg_bpm.main ...)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="BPM / Blink 분석 및 시각화")
+    parser.add_argument("--rgb_csv", required=True, help="RGB CSV 경로")
+    parser.add_argument("--blink_csv", required=True, help="Blink CSV 경로")
+    parser.add_argument("--bpm_img", default="./bpm.png", help="BPM 이미지 저장 경로")
+    parser.add_argument("--blink_img", default="./blink.png", help="Blink 이미지 저장 경로")
+    args = parser.parse_args()
+
+    analyze_and_plot(args.rgb_csv, args.blink_csv, args.bpm_img, args.blink_img)
+    print("그래프 저장 완료!")
\ No newline at end of file
@@ -0,0 +1 @@
+"""2단계: 맥파 신호 → 심박수 (Fourier, inter-beat, wavelet)."""
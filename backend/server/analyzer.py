@@ -1,47 +1,178 @@
+"""Analysis entry points used by the server.
+
+특징 추출(cv2/dlib)과 rPPG 분석(rppg_bpm, scipy)은 처음 사용할 때 로드한다.
+API 프로세스는 이 모듈을 임포트해도 무거운 라이브러리를 읽지 않으며,
+분석 워커는 시작 시 preload() 로 미리 로드한다.
+"""
 from __future__ import annotations
 
-import importlib.util
+import importlib
 import sys
-import os
-import cv2
-import dlib
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
+from functools import lru_cache
 from pathlib import Path
 from types import ModuleType
-from typing import Callable
-
-BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 
-def _load_module(module_name: str, file_path: Path) -> ModuleType:
-    # 주어진 파일 경로에서 모듈을 동적으로 로드
-    spec = importlib.util.spec_from_file_location(module_name, str(file_path))
-    if spec is None or spec.loader is None:  # pragma: no cover
-        raise ImportError(f"Unable to load module {module_name} from {file_path}")
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[module_name] = module  # 캐시에 등록
-    spec.loader.exec_module(module)
-    return module
+from . import feature_store, metrics, rendering
 
 
 # ---------------------------------------------------------------------------
-# 1) extract_features_from_video – test_data/save_data_demo.py
+# 1) extract_features_from_video – test_data/save_data_demo.py 기반
+#    단일 디코딩 파이프라인(features.run_extractors) 위에서 동작한다.
 # ---------------------------------------------------------------------------
-save_data_path = BASE_DIR / "test_data" / "save_data_demo.py"
-_save_data_mod = _load_module("_save_data", save_data_path)
-extract_features_from_video: Callable = _save_data_mod.extract_features_from_video
+def _save_feature_csvs(
+    results: Dict[str, Any],
+    rgb_csv_path: str,
+    blink_csv_path: str,
+    blink_thresh: float,
+) -> Tuple[str, str]:
+    # CSV 저장
+    rgb_arr = results["rgb"]
+    if not len(rgb_arr):
+        raise RuntimeError("영상에서 얼굴을 검출하지 못해 저장할 데이터가 없습니다.")
+
+    blink_arr = (results["ear"] < blink_thresh).astype(int).reshape(-1, 1)
+
+    np.savetxt(rgb_csv_path, rgb_arr, fmt="%.5f", delimiter="\t")
+    np.savetxt(blink_csv_path, blink_arr, fmt="%d", delimiter="\t")
+
+    return rgb_csv_path, blink_csv_path
+
+
+def extract_features_from_video(
+    video_path: str,
+    rgb_csv_path: str,
+    blink_csv_path: str,
+    fps: int = 15,
+    blink_thresh: float = 0.25,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[str, str]:
+    from . import features, segments
+
+    results = segments.run_extractors(
+        video_path,
+        [features.RoiRgbExtractor(), features.EyeAspectRatioExtractor()],
+        on_progress,
+        target_fps=fps,
+    )
+    return _save_feature_csvs(results, rgb_csv_path, blink_csv_path, blink_thresh)
+
+
+def extract_all_features(
+    video_path: str,
+    feature_dir: str,
+    blink_thresh: float = 0.25,
+    second_interval: float = 1,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    target_fps: Optional[float] = None,
+) -> str:
+    """RGB/이마·뺨 ROI/EAR/랜드마크/움직임 특징을 영상 한 번의 디코딩으로 추출해 특징 저장소에 쓴다.
+
+    결과는 feature_store.open_features(feature_dir) 로 memmap 으로 열 수 있다.
+    on_progress(읽은 프레임 수, 전체 프레임 수)는 매 프레임 호출된다.
+    target_fps 를 생략하면 ANALYSIS_FPS 비율의 프레임만 처리한다.
+    """
+    from . import features, reanalysis, segments
+    from .config import ANALYSIS_FPS
+
+    # RPPG_SEGMENT_WORKERS > 1 이면 긴 영상은 시간 구간별로 병렬 추출한다
+    results = segments.run_extractors(
+        video_path,
+        [
+            features.RoiRgbExtractor(),
+            features.MultiRoiExtractor(),
+            features.EyeAspectRatioExtractor(),
+            features.LandmarkExtractor(),
+        ],
+        on_progress,
+        target_fps=ANALYSIS_FPS if target_fps is None else target_fps,
+    )
+    if not len(results["rgb"]):
+        raise RuntimeError("영상에서 얼굴을 검출하지 못해 저장할 데이터가 없습니다.")
+
+    meta = results["meta"]
+    track = results["landmarks"]
+    # 움직임은 /reanalyze 가 간격을 바꿔 다시 계산할 때와 같은 랜드마크 트랙에서 구한다
+    # (별도 HOG 검출로 구하면 같은 간격이라도 재계산 여부에 따라 값이 달라짐)
+    duration = float(track["frame_timestamps"][-1]) if len(track["frame_timestamps"]) else 0.0
+    motion = reanalysis.motion_from_track(track["landmarks"], track["timestamps"], duration, second_interval)
+    with metrics.timed("file_io"):
+        feature_store.write_features(
+            Path(feature_dir),
+            {
+                "fps": meta.fps,
+                "analysis_fps": meta.analysis_fps or meta.fps,
+                "frame_count": meta.frame_count,
+                "width": meta.width,
+                "height": meta.height,
+                "blink_thresh": blink_thresh,
+                "second_interval": second_interval,
+            },
+            rgb=results["rgb"],
+            roi=results["roi"],
+            ear=results["ear"],
+            blink=results["ear"] < blink_thresh,
+            landmarks=track["landmarks"],
+            boxes=track["boxes"],
+            timestamps=track["timestamps"],
+            frame_valid=track["frame_valid"],
+            frame_timestamps=track["frame_timestamps"],
+            motion=np.asarray(motion),
+        )
+    return feature_dir
 
 
 # ---------------------------------------------------------------------------
-# 2) analyze_and_plot – RPPG-BPM-master/main.py
-#    하이픈(-)이 포함된 디렉터리는 파이썬 패키지로 바로 임포트할 수 없으므로
-#    파일 경로 기반 동적 로딩을 사용한다.
+# 2) analyze_and_plot – rppg_bpm/main.py (첫 접근 시 로드)
 # ---------------------------------------------------------------------------
-main_path = BASE_DIR / "RPPG-BPM-master" / "main.py"
-_rppg_main_mod = _load_module("_rppg_main", main_path)
-analyze_and_plot: Callable = _rppg_main_mod.analyze_and_plot
+_RPPG_EXPORTS = (
+    "analyze_and_plot",
+    "analyze_series",
+    "analyze_series_arrays",
+    "plot_series",
+    "AdvancedRPPGAnalyzer",
+)
+
+
+def _import_rppg_main() -> ModuleType:
+    # 저장소 루트에서 backend.server.app 으로 실행하면 backend.rppg_bpm,
+    # backend/ 에서 server.app 으로 실행하면 최상위 rppg_bpm 으로 임포트한다
+    parent = (__package__ or "").rpartition(".")[0]
+    if parent:
+        return importlib.import_module(f"{parent}.rppg_bpm.main")
+    backend_dir = str(Path(__file__).resolve().parent.parent)
+    if backend_dir not in sys.path:
+        sys.path.append(backend_dir)
+    return importlib.import_module("rppg_bpm.main")
+
+
+@lru_cache(maxsize=None)
+def _rppg_main() -> ModuleType:
+    main = _import_rppg_main()
+
+    # 계측: rppg_bpm 코드는 그대로 두고 단계별 시간 / 폴백 횟수만 기록
+    metrics.instrument(main.AdvancedRPPGAnalyzer, "select_signal", "chrom_pos")
+    metrics.instrument(main.AdvancedRPPGAnalyzer, "calculate_bpm_metrics", "bpm_metrics")
+    metrics.count_calls(main, "_legacy_compute_series_from_arrays", "rppg_legacy_fallbacks_total")
+    metrics.instrument(main, "_advanced_plot_series", "plot")
+    metrics.instrument(main, "_legacy_plot_series", "plot")
+    return main
+
+
+def __getattr__(name: str) -> Any:
+    # analyzer.analyze_series_arrays 등은 처음 접근할 때 rppg_bpm 을 로드한다
+    if name in _RPPG_EXPORTS:
+        return getattr(_rppg_main(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def preload() -> None:
+    """특징 추출 / rPPG 모듈을 미리 임포트한다 (워커 시작 시)."""
+    from . import features, segments  # noqa: F401
+
+    _rppg_main()
 
 
 # ---------------------------------------------------------------------------
@@ -51,7 +182,9 @@ def analyze_motion(
     video_path: str,
     motion_img_path: str,
     stability_threshold: float = 2.0,
-    second_interval: int = 1
+    second_interval: float = 1,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    sparse: bool = True,
 ) -> str:
     """
     Parameters
@@ -62,89 +195,53 @@ def analyze_motion(
         저장할 움직임 그래프 이미지 경로
     stability_threshold : float
         안정성 임계값 (기본값: 2.0)
-    second_interval : int
-        초 단위 간격 (기본값: 1초)
+    second_interval : float
+        초 단위 간격 (기본값: 1초, 0.25 처럼 1초 미만도 가능)
+    on_progress : Callable[[int, int], None], optional
+        매 프레임 (처리한 프레임 수, 전체 프레임 수) 로 호출
+    sparse : bool
+        True 이면 움직임 샘플 시각의 프레임만 디코딩하고 나머지는 grab() 으로 건너뛴다
+        (검출/랜드마크 비용이 영상 길이가 아니라 샘플 수에 비례). False 이면
+        ANALYSIS_FPS 비율로 디코딩한다.
     """
-    # 스타일
-    mpl.rcParams['font.family'] = 'DejaVu Sans'
-    mpl.rcParams['axes.edgecolor'] = '#DDDDDD'
-    mpl.rcParams['axes.linewidth'] = 0.8
-    mpl.rcParams['axes.titlesize'] = 16
-    mpl.rcParams['axes.labelsize'] = 13
-
-    # 모델 불러오기
-    predictor_local = BASE_DIR / "Eye_detection" / "shape_predictor_68_face_landmarks.dat"
-    predictor_path = str(predictor_local) if predictor_local.exists() else "shape_predictor_68_face_landmarks.dat"
-    
-    detector = dlib.get_frontal_face_detector()
-    predictor = dlib.shape_predictor(predictor_path)
-
-    # 랜드마크 추출 함수
-    def get_landmarks(gray, rect):
-        shape = predictor(gray, rect)
-        coords = np.zeros((68, 2), dtype="float")
-        for i in range(68):
-            coords[i] = (shape.part(i).x, shape.part(i).y)
-        return coords
-
-    # 영상 처리
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_interval = int(fps * second_interval)
-
-    prev_landmarks = None
-    motions_per_second = []
-    frame_idx = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        if frame_idx % frame_interval == 0:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = detector(gray)
-
-            if len(faces) > 0:
-                landmarks = get_landmarks(gray, faces[0])
-                if prev_landmarks is not None:
-                    motion = np.linalg.norm(landmarks - prev_landmarks, axis=1).mean()
-                    motions_per_second.append(motion)
-                else:
-                    motions_per_second.append(0)
-                prev_landmarks = landmarks
-            else:
-                motions_per_second.append(0)
-
-        frame_idx += 1
-
-    cap.release()
-
-    # 시간축 데이터 만들기
-    x = np.arange(len(motions_per_second))  # 1초 단위
-
-    # 그래프 그리기
-    plt.figure(figsize=(12, 5), dpi=120)
-    plt.plot(x, motions_per_second, color='#FF6B6B', linewidth=2.2, label='Movement', alpha=0.9)
-    plt.axhline(y=stability_threshold, color='gray', linestyle='--', linewidth=1.4, label='Threshold')
-
-    # 스타일
-    plt.title("Motion Intensity Over Time", pad=15)
-    plt.xlabel("Time (seconds)")
-    plt.ylabel("Avg Movement Intensity")
-    if len(x) > 0:
-        plt.xticks(x[::max(1, len(x)//10)])  # 최대 10개 눈금만 표시
-    plt.grid(axis='y', linestyle='--', alpha=0.3)
-    plt.legend(loc='upper right', frameon=False)
-    plt.tight_layout()
-    plt.savefig(motion_img_path, dpi=300)
-    plt.close()
+    from . import features
+    from .config import ANALYSIS_FPS
+
+    target_fps = 1.0 / second_interval if sparse else ANALYSIS_FPS
+    # 움직임은 색이 필요 없으므로 그레이로 디코딩한다
+    results = features.run_extractors(
+        video_path, [features.MotionExtractor(second_interval)], on_progress, target_fps=target_fps, gray=True
+    )
+    return plot_motion(results["motion"], motion_img_path, stability_threshold, second_interval)
+
 
+def plot_motion(
+    motions_per_second: List[float],
+    motion_img_path: str,
+    stability_threshold: float = 2.0,
+    second_interval: float = 1,
+) -> str:
+    """second_interval 초 간격 움직임 값을 그래프로 저장한다 (12x5 in, 300 dpi)."""
+    results = {
+        "motion": {
+            "time": [i * second_interval for i in range(len(motions_per_second))],
+            "values": [float(m) for m in motions_per_second],
+            "threshold": stability_threshold,
+        },
+    }
+    image = rendering.render_plot(results, "motion", width=3600, height=1500, dpi=300)
+    Path(motion_img_path).write_bytes(image)
     return motion_img_path
 
 
 __all__ = [
     "extract_features_from_video",
+    "extract_all_features",
     "analyze_and_plot",
+    "analyze_series",
+    "analyze_series_arrays",
+    "plot_series",
     "analyze_motion",
+    "plot_motion",
+    "AdvancedRPPGAnalyzer",
 ] 
\ No newline at end of file
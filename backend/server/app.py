@@ -1,31 +1,156 @@
 """FastAPI entry point for RPPG Analyzer."""
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import time
 import uuid
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import (
+    FastAPI,
+    UploadFile,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Header,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-
-from . import analyzer
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 
-# ---------------------------------------------------------------------------
-# 경로 설정
-# ---------------------------------------------------------------------------
-BASE_DIR = Path(__file__).resolve().parent            # .../rppg_project/server
-UPLOAD_DIR = BASE_DIR / "uploads"
-CSV_DIR = BASE_DIR / "csvs"
-STATIC_DIR = BASE_DIR / "static"
+from .config import (
+    UPLOAD_DIR,
+    CSV_DIR,
+    STATIC_DIR,
+    JOB_WORKERS,
+    JOB_MAX_PENDING,
+    JOB_HISTORY_LIMIT,
+    MAX_UPLOAD_BYTES,
+    UPLOAD_CHUNK_SIZE,
+    PARTIAL_UPLOAD_DIR,
+    RESULT_CACHE_DIR,
+    RESULTS_DIR,
+    FEATURE_DIR,
+    PLOT_CACHE_BYTES,
+    PRECOMPRESS_RESULTS,
+    RETENTION_DB,
+    RAW_VIDEO_TTL_SECONDS,
+    ARTIFACT_QUOTA_BYTES,
+    ARTIFACT_TTL_SECONDS,
+    RETENTION_INTERVAL_SECONDS,
+    ADMIN_TOKEN,
+    LIVE_UPDATE_INTERVAL,
+    LIVE_WINDOW_SECONDS,
+    LIVE_MAX_FPS,
+    LIVE_MAX_SESSIONS,
+    PROFILING_ENABLED,
+    PROFILE_DIR,
+    PROGRESS_INTERVAL,
+    PROGRESS_STALE_SECONDS,
+)
+from . import metrics, rendering
+from .http_cache import (
+    ImmutableStaticFiles,
+    cached_response,
+    make_etag,
+    not_modified,
+)
+from .jobs import Job, JobManager, JobStatus, QueueFullError, WorkerPoolError
+from .live import LiveSession
+from .pipeline import init_worker, run_analysis, worker_status
+from .reanalysis import reanalyze
+from .progress import FINAL_STAGES, ProgressReporter, progress_path, read_progress
+from .result_cache import ANALYSIS_VERSION, ResultCache, video_id_for
+from .results import ResultStore, gzip_bytes, to_npz_bytes
+from .retention import RetentionIndex, RetentionManager
+from .uploads import (
+    ALLOWED_EXTENSIONS,
+    MULTIPART_OVERHEAD,
+    ChunkedUploadStore,
+    UploadNotFoundError,
+    UploadOffsetError,
+    UploadSizeLimitMiddleware,
+    UploadTooLargeError,
+    save_upload_file,
+)
 
 for d in (UPLOAD_DIR, CSV_DIR, STATIC_DIR):
     d.mkdir(parents=True, exist_ok=True)
 
+# 분석 작업은 이벤트 루프가 아닌 프로세스 풀에서 실행한다
+job_manager: JobManager | None = None
+
+# 재개 가능한 청크 업로드 저장소
+chunked_uploads = ChunkedUploadStore(PARTIAL_UPLOAD_DIR, max_bytes=MAX_UPLOAD_BYTES)
+
+# 영상 해시 기반 결과 캐시
+result_cache = ResultCache(RESULT_CACHE_DIR)
+
+# 수치 시계열 결과 저장소
+result_store = ResultStore(RESULTS_DIR, precompress=PRECOMPRESS_RESULTS)
+
+# 요청 시 렌더링한 그래프 캐시 (video_id, 종류, 크기, dpi, 형식) → 이미지
+plot_cache = rendering.PlotCache(PLOT_CACHE_BYTES)
+
+# 디스크 사용량 관리 (원본 영상 / 파생 아티팩트 TTL + 용량 한도)
+retention_index = RetentionIndex(RETENTION_DB)
+retention = RetentionManager(
+    retention_index,
+    quota_bytes=ARTIFACT_QUOTA_BYTES,
+    ttl_seconds=ARTIFACT_TTL_SECONDS,
+    raw_ttl_seconds=RAW_VIDEO_TTL_SECONDS,
+    interval=RETENTION_INTERVAL_SECONDS,
+    on_evict=plot_cache.discard,
+    hooks=[lambda: chunked_uploads.expire(RAW_VIDEO_TTL_SECONDS)],
+)
+
+# 현재 열려 있는 실시간 세션 수
+live_sessions = 0
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global job_manager
+    # 이전 실행의 워커 메트릭 파일은 워커를 띄우기 전에 정리한다
+    metrics.reset_dir()
+    job_manager = JobManager(
+        max_workers=JOB_WORKERS,
+        max_pending=JOB_MAX_PENDING,
+        history_limit=JOB_HISTORY_LIMIT,
+        initializer=init_worker,
+    )
+    # 워커 프로세스를 미리 띄워 모델을 로드해 둔다 (/ready 로 확인)
+    job_manager.warm_up(worker_status)
+    retention.start()
+    try:
+        yield
+    finally:
+        retention.stop()
+        job_manager.shutdown()
+
+
 # ---------------------------------------------------------------------------
 # FastAPI 앱 초기화
 # ---------------------------------------------------------------------------
-app = FastAPI(title="RPPG Analyzer API")
+app = FastAPI(title="RPPG Analyzer API", lifespan=lifespan)
+
+# 업로드 크기 제한 (본문을 임시 파일로 받기 전에 413 으로 거절)
+app.add_middleware(
+    UploadSizeLimitMiddleware, path="/upload_video", max_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+)
 
 # CORS
 app.add_middleware(
@@ -36,100 +161,581 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# png 파일 서빙 (/static)
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+# png 파일 서빙 (/static, 파일명에 video_id 가 포함되므로 immutable)
+app.mount("/static", ImmutableStaticFiles(directory=STATIC_DIR), name="static")
+
+
+# ---------------------------------------------------------------------------
+# 라우터: 준비 상태
+# ---------------------------------------------------------------------------
+@app.get("/ready")
+async def ready():
+    """모든 분석 워커가 모델을 로드했는지 확인한다 (로드 전에는 503)."""
+    status = job_manager.readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
 
 
 # ---------------------------------------------------------------------------
 # 라우터: /upload_video
 # ---------------------------------------------------------------------------
 @app.post("/upload_video")
-async def upload_video(file: UploadFile = File(...)):
-    """사용자가 업로드한 영상을 분석하고 결과 이미지를 반환한다."""
+async def upload_video(
+    request: Request,
+    file: UploadFile = File(...),
+    async_job: bool = Query(False, description="true 이면 job_id 를 즉시 반환하고 백그라운드에서 분석"),
+):
+    """사용자가 업로드한 영상을 분석하고 결과 이미지를 반환한다.
+
+    본문 크기는 multipart 파싱 전에 UploadSizeLimitMiddleware 가 먼저 제한한다.
+    """
+    file_suffix = _validate_filename(file.filename)
+    profile = _profile_requested(request)
+
+    # 임시 파일명으로 저장 (video_id 는 내용 해시로 결정된다)
+    upload_path = UPLOAD_DIR / f"{uuid.uuid4().hex}.upload"
+
+    # 파일 저장 (청크 단위 스트리밍 + sha256 계산)
+    try:
+        _, digest = await save_upload_file(file, upload_path, MAX_UPLOAD_BYTES, UPLOAD_CHUNK_SIZE)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large")
+    except Exception as e:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=f"Failed to save video: {e}")
+
+    return await _submit_analysis(upload_path, file_suffix, digest, async_job, profile)
+
+
+def _validate_filename(filename: str | None) -> str:
+    """파일명을 검증하고 소문자 확장자를 반환한다."""
     # 파일명 검증
-    if not file.filename:
+    if not filename:
         raise HTTPException(status_code=400, detail="No filename provided")
 
     # 허용되는 확장자
-    allowed_ext = {".mp4", ".avi", ".mov", ".mkv"}
-    file_suffix = Path(file.filename).suffix.lower()
-    if file_suffix not in allowed_ext:
+    file_suffix = Path(filename).suffix.lower()
+    if file_suffix not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Unsupported file type")
+    return file_suffix
+
+
+def _profile_requested(request: Request) -> bool:
+    """X-RPPG-Profile 헤더가 있으면 이 요청의 분석을 cProfile 로 실행한다 (관리자 전용)."""
+    if not request.headers.get("x-rppg-profile"):
+        return False
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling disabled")
+    _check_admin(request.headers.get("x-admin-token"))
+    return True
+
+
+async def _submit_analysis(
+    upload_path: Path,
+    file_suffix: str,
+    digest: str,
+    async_job: bool,
+    profile: bool = False,
+):
+    """업로드된 영상의 분석을 시작하거나, 같은 영상의 기존 결과/작업을 재사용한다.
 
-    # UUID 기반 파일명 생성
-    video_id = uuid.uuid4().hex
-    video_filename = f"{video_id}{file_suffix}"
-    video_path = UPLOAD_DIR / video_filename
+    profile 이 참이면 새로 실행되는 분석만 프로파일링한다 (캐시 적중/합류 시 무시).
+    """
+    video_id = video_id_for(digest)
+    profile_name = None
 
-    # 파일 저장
+    # 1. 이미 분석된 영상이면 저장된 결과를 그대로 반환
+    cached = result_cache.get(video_id)
+    if cached is not None:
+        upload_path.unlink(missing_ok=True)
+        await run_in_threadpool(retention_index.touch, video_id)
+        job = job_manager.add_completed(video_id, cached)
+        if async_job:
+            return _job_payload(job)
+        return {**cached, "cached": True}
+
+    # 2. 같은 영상이 분석 중이면 해당 작업에 합류
+    job = job_manager.find_active(video_id)
+    if job is not None:
+        upload_path.unlink(missing_ok=True)
+    else:
+        video_path = UPLOAD_DIR / f"{video_id}{file_suffix}"
+        os.replace(upload_path, video_path)
+
+        # 분석 작업 제출 (워커가 시작하기 전에 queued 상태를 먼저 기록)
+        args = (run_analysis, str(video_path), video_id, digest)
+        if profile:
+            profile_name = f"{video_id}-{int(time.time())}"
+            args = (metrics.run_profiled, str(PROFILE_DIR / f"{profile_name}.prof")) + args
+        progress = ProgressReporter(video_id)
+        progress.stage("queued")
+        try:
+            job = job_manager.submit(*args, video_id=video_id)
+        except (QueueFullError, WorkerPoolError) as e:
+            # 워커가 맡지 않은 작업이므로 retention 에도 기록되지 않는다: 진행 파일을 바로 지운다
+            progress.path.unlink(missing_ok=True)
+            raise HTTPException(status_code=503, detail=str(e))
+
+    extra = {"profile_url": f"/admin/profiles/{profile_name}"} if profile_name else {}
+
+    # job 모드: 즉시 반환
+    if async_job:
+        return JSONResponse(status_code=202, content={**_job_payload(job), **extra})
+
+    # 동기 모드: 결과를 기다리되 이벤트 루프는 막지 않는다
     try:
-        with video_path.open("wb") as buffer:
-            buffer.write(await file.read())
+        result = await asyncio.wrap_future(job.future)
+    except BrokenProcessPool as e:
+        # 분석 중 워커가 죽음 → 다음 제출 시 풀을 다시 만든다
+        raise HTTPException(status_code=503, detail=f"Analysis workers unavailable: {e}")
+    except asyncio.CancelledError:
+        if not job.future.cancelled():
+            raise  # 클라이언트 연결 종료 등 요청 자체의 취소
+        raise HTTPException(status_code=503, detail="Analysis job was cancelled")
     except Exception as e:  # pragma: no cover
-        raise HTTPException(status_code=500, detail=f"Failed to save video: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
+    return {**result, **extra}
+
 
-    # CSV 및 이미지 경로 설정
-    rgb_csv_path = CSV_DIR / f"{video_id}_rgb.csv"
-    blink_csv_path = CSV_DIR / f"{video_id}_blink.csv"
-    bpm_img_path = STATIC_DIR / f"{video_id}_bpm.png"
-    blink_img_path = STATIC_DIR / f"{video_id}_blink.png"
-    motion_img_path = STATIC_DIR / f"{video_id}_motion.png"
+def _job_payload(job: Job) -> dict:
+    payload = job.to_dict()
+    payload["status_url"] = f"/jobs/{job.job_id}"
+    payload["result_url"] = f"/jobs/{job.job_id}/result"
+    payload["progress_url"] = f"/progress/{job.video_id}"
+    return payload
 
-    # 분석
+
+# ---------------------------------------------------------------------------
+# 라우터: 재개 가능한 청크 업로드 (init → append → finalize)
+# ---------------------------------------------------------------------------
+@app.post("/uploads")
+async def init_chunked_upload(
+    filename: str = Query(..., description="원본 파일명 (확장자 검증용)"),
+    total_size: int | None = Query(None, ge=0, description="전체 파일 크기 (bytes)"),
+):
+    """청크 업로드 세션을 만든다."""
+    _validate_filename(filename)
     try:
-        # 1. 영상에서 RGB/Blink 특징 추출
-        analyzer.extract_features_from_video(
-            video_path=str(video_path),
-            rgb_csv_path=str(rgb_csv_path),
-            blink_csv_path=str(blink_csv_path),
-        )
+        meta = chunked_uploads.create(filename, total_size)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large")
+    meta["chunk_size"] = UPLOAD_CHUNK_SIZE
+    return meta
 
-        # 2. BPM 및 Blink 시각화
-        analyzer.analyze_and_plot(
-            rgb_csv_path=str(rgb_csv_path),
-            blink_csv_path=str(blink_csv_path),
-            bpm_img_path=str(bpm_img_path),
-            blink_img_path=str(blink_img_path),
-        )
 
-        # 3. Motion 분석 및 시각화
-        analyzer.analyze_motion(
-            video_path=str(video_path),
-            motion_img_path=str(motion_img_path),
+@app.get("/uploads/{upload_id}")
+async def get_chunked_upload(upload_id: str):
+    """현재까지 저장된 오프셋을 반환한다. 재전송은 이 오프셋부터 시작한다."""
+    try:
+        return chunked_uploads.status(upload_id)
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+@app.put("/uploads/{upload_id}")
+async def append_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="이 청크가 시작하는 바이트 위치"),
+):
+    """요청 본문(raw bytes)을 offset 위치에 이어 쓴다."""
+    try:
+        return await chunked_uploads.append(upload_id, offset, request.stream())
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetError as e:
+        raise HTTPException(status_code=409, detail={"message": "Offset mismatch", "offset": e.expected})
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large")
+
+
+@app.post("/uploads/{upload_id}/finalize")
+async def finalize_chunked_upload(
+    upload_id: str,
+    request: Request,
+    async_job: bool = Query(False, description="true 이면 job_id 를 즉시 반환하고 백그라운드에서 분석"),
+):
+    """업로드를 완료하고 /upload_video 와 같은 방식으로 분석을 시작한다."""
+    profile = _profile_requested(request)
+    try:
+        meta = chunked_uploads.status(upload_id)
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if meta["offset"] == 0:
+        raise HTTPException(status_code=400, detail="Empty upload")
+
+    upload_path = UPLOAD_DIR / f"{uuid.uuid4().hex}.upload"
+    try:
+        _, digest = await chunked_uploads.finalize(upload_id, upload_path)
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetError as e:
+        raise HTTPException(status_code=409, detail={"message": "Upload incomplete", "offset": e.expected})
+
+    return await _submit_analysis(upload_path, meta["suffix"], digest, async_job, profile)
+
+
+# ---------------------------------------------------------------------------
+# 라우터: 작업 상태 / 결과
+# ---------------------------------------------------------------------------
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """작업 상태(queued/running/done/failed)를 반환한다."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_payload(job)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """완료된 작업의 분석 결과를 반환한다."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    status = job.status
+    if status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {job.error}")
+    if status != JobStatus.DONE:
+        return JSONResponse(status_code=202, content=_job_payload(job))
+    return job.result
+
+
+# ---------------------------------------------------------------------------
+# 라우터: 진행 상황 (Server-Sent Events)
+# ---------------------------------------------------------------------------
+@app.get("/progress/{video_id}")
+async def progress_stream(video_id: str, request: Request):
+    """분석 단계, 처리한 프레임 수 / 전체 프레임 수, 예상 남은 시간을 SSE 로 보낸다.
+
+    분석이 끝나면(done/failed) 마지막 이벤트를 보내고 스트림을 닫는다.
+    """
+    if (
+        await run_in_threadpool(read_progress, video_id) is None
+        and await run_in_threadpool(result_cache.get, video_id) is None
+    ):
+        raise HTTPException(status_code=404, detail="Progress not found")
+    return StreamingResponse(
+        _progress_events(video_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _progress_events(video_id: str, request: Request):
+    path = progress_path(video_id)
+    last_mtime = None
+    last_sent = time.monotonic()
+    stale_sent = False
+    yield "retry: 2000\n\n"
+
+    while not await request.is_disconnected():
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is None:
+            # 진행 파일이 정리된 이전 분석: 캐시된 결과로 완료 이벤트만 보낸다
+            cached = await run_in_threadpool(result_cache.get, video_id)
+            if cached is not None:
+                yield _sse("progress", {"video_id": video_id, "stage": "done", "result": cached})
+                return
+        elif mtime != last_mtime:
+            last_mtime = mtime
+            state = await run_in_threadpool(read_progress, video_id)
+            if state is not None:
+                state["stale"] = stale_sent = False
+                yield _sse("progress", state)
+                last_sent = time.monotonic()
+                if state["stage"] in FINAL_STAGES:
+                    return
+        elif not stale_sent:
+            # 진행 상황이 오래 갱신되지 않으면 한 번 stale 로 알린다 (멈춘 워커).
+            # queued 는 워커를 기다리는 정상 상태이므로 대기열이 길어도 stale 이 아니다.
+            state = await run_in_threadpool(read_progress, video_id)
+            if (
+                state is not None
+                and state.get("stage") != "queued"
+                and time.time() - state.get("updated_at", 0) > PROGRESS_STALE_SECONDS
+            ):
+                state["stale"] = stale_sent = True
+                yield _sse("progress", state)
+                last_sent = time.monotonic()
+
+        if time.monotonic() - last_sent > 15:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(PROGRESS_INTERVAL)
+
+
+# ---------------------------------------------------------------------------
+# 라우터: 수치 결과 (JSON / NPZ)
+# ---------------------------------------------------------------------------
+@app.get("/results/{video_id}")
+async def get_results(
+    request: Request,
+    video_id: str,
+    format: str = Query("json", description="json 또는 npz(float32 배열)"),
+):
+    """BPM/깜빡임/움직임 시계열과 요약 통계를 반환한다.
+
+    결과는 video_id 별로 바뀌지 않으므로 ETag/304, Range, immutable 캐시를 지원한다.
+    """
+    if format not in {"json", "npz"}:
+        raise HTTPException(status_code=400, detail="Invalid format")
+
+    if not result_store.path(video_id).exists():
+        raise HTTPException(status_code=404, detail="Results not found")
+    await run_in_threadpool(retention_index.touch, video_id)
+
+    etag = make_etag("results", video_id, ANALYSIS_VERSION, format)
+    if format == "npz":
+        return cached_response(
+            request,
+            etag,
+            "application/octet-stream",
+            lambda: to_npz_bytes(result_store.load(video_id)),
+            headers={"Content-Disposition": f'attachment; filename="{video_id}.npz"'},
         )
-    except Exception as e:  # pragma: no cover
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
+    return cached_response(
+        request,
+        etag,
+        "application/json",
+        lambda: result_store.read_bytes(video_id),
+        # 미리 압축한 사본이 없으면 요청 시 압축한다
+        load_gzip=lambda: result_store.read_bytes(video_id, compressed=True)
+        or gzip_bytes(result_store.read_bytes(video_id)),
+    )
+
 
-    # 응답 데이터 구성
-    return {
-        "video_id": video_id,
-        "bpm_plot_url": f"/static/{bpm_img_path.name}",
-        "blink_plot_url": f"/static/{blink_img_path.name}",
-        "motion_plot_url": f"/static/{motion_img_path.name}",
-    }
+@app.get("/reanalyze/{video_id}")
+async def reanalyze_results(
+    request: Request,
+    video_id: str,
+    blink_thresh: float | None = Query(None, gt=0, lt=1, description="EAR 깜빡임 임계값"),
+    second_interval: float | None = Query(None, gt=0, le=60, description="움직임 샘플 간격 (초)"),
+    stability_threshold: float = Query(2.0, ge=0, description="안정 구간 판정 임계값"),
+):
+    """저장된 특징 트랙으로 임계값을 바꿔 결과를 다시 계산한다 (영상 디코딩 없음).
+
+    응답은 /results 와 같은 형식이며 사용한 값은 params 에 담긴다. 결과는 저장하지 않는다.
+    """
+    if not (FEATURE_DIR / video_id / "meta.json").exists():
+        raise HTTPException(status_code=404, detail="Features not found")
+    await run_in_threadpool(retention_index.touch, video_id)
+
+    etag = make_etag("reanalyze", video_id, ANALYSIS_VERSION, blink_thresh, second_interval, stability_threshold)
+    response = not_modified(request, etag, "application/json")
+    if response is not None:
+        return response
+
+    stored = await run_in_threadpool(result_store.load, video_id)
+    try:
+        if stored is not None:
+            # BPM 은 임계값과 무관하므로 저장된 시계열을 쓰고 깜빡임/움직임(numpy)만 다시 계산한다
+            results = await run_in_threadpool(
+                reanalyze, video_id, blink_thresh, second_interval, stability_threshold, FEATURE_DIR, stored
+            )
+        else:
+            # 결과 문서가 없으면 rPPG 재계산(scipy)이 필요하므로 분석 워커에서 실행한다
+            try:
+                job = job_manager.submit(
+                    reanalyze,
+                    video_id,
+                    blink_thresh,
+                    second_interval,
+                    stability_threshold,
+                    video_id=f"{video_id}:reanalyze",
+                )
+            except (QueueFullError, WorkerPoolError) as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            try:
+                results = await asyncio.wrap_future(job.future)
+            except BrokenProcessPool as e:
+                # 재분석 중 워커가 죽음 → 분석 업로드와 같이 503 (다음 제출 시 풀을 다시 만든다)
+                raise HTTPException(status_code=503, detail=f"Analysis workers unavailable: {e}")
+            except asyncio.CancelledError:
+                if not job.future.cancelled():
+                    raise  # 클라이언트 연결 종료 등 요청 자체의 취소
+                raise HTTPException(status_code=503, detail="Reanalysis job was cancelled")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    body = json.dumps(results).encode()
+    return cached_response(request, etag, "application/json", lambda: body)
+
+
+# ---------------------------------------------------------------------------
+# 라우터: 관리자 (디스크 사용량)
+# ---------------------------------------------------------------------------
+def _check_admin(token: str | None) -> None:
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@app.get("/admin/storage")
+async def storage_usage(x_admin_token: str | None = Header(None)):
+    """종류별 디스크 사용량과 보관 정책, 마지막 정리 결과를 반환한다."""
+    _check_admin(x_admin_token)
+    return await run_in_threadpool(retention.report)
+
+
+@app.post("/admin/storage/cleanup")
+async def storage_cleanup(x_admin_token: str | None = Header(None)):
+    """보관 정책을 즉시 한 번 적용한다."""
+    _check_admin(x_admin_token)
+    return await run_in_threadpool(retention.run_once)
+
+
+@app.get("/admin/profiles/{name}")
+async def get_profile(
+    name: str,
+    format: str = Query("txt", description="txt(누적 시간 요약) 또는 prof(pstats 원본)"),
+    x_admin_token: str | None = Header(None),
+):
+    """X-RPPG-Profile 요청으로 생성된 cProfile 결과를 반환한다."""
+    _check_admin(x_admin_token)
+    if format not in {"txt", "prof"} or Path(name).name != name:
+        raise HTTPException(status_code=400, detail="Invalid profile")
+    path = PROFILE_DIR / f"{name}.{format}"
+    if not path.exists():
+        # 분석이 끝나기 전에는 파일이 없다
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "txt":
+        return PlainTextResponse(path.read_text())
+    return FileResponse(path=str(path), media_type="application/octet-stream", filename=path.name)
+
+
+# ---------------------------------------------------------------------------
+# 라우터: 메트릭 (Prometheus)
+# ---------------------------------------------------------------------------
+@app.get("/metrics")
+async def get_metrics():
+    """단계별 소요 시간 히스토그램과 처리 프레임/얼굴 미검출/폴백 카운터."""
+    text = await run_in_threadpool(metrics.render_all)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
+# ---------------------------------------------------------------------------
+# 라우터: 실시간 분석 (WebSocket)
+# ---------------------------------------------------------------------------
+@app.websocket("/ws/live")
+async def live_analysis(
+    websocket: WebSocket,
+    fps: float = Query(15, gt=0, le=60, description="BPM 계산 시 재샘플링 주파수"),
+    blink_thresh: float = Query(0.25, gt=0, lt=1),
+):
+    """프레임(JPEG) 또는 ROI RGB 평균을 받아 1초마다 BPM/깜빡임/움직임 값을 보낸다."""
+    global live_sessions
+    if live_sessions >= LIVE_MAX_SESSIONS:
+        await websocket.close(code=1013)  # Try Again Later
+        return
+
+    await websocket.accept()
+    live_sessions += 1
+    session = LiveSession(
+        fps=fps,
+        window_seconds=LIVE_WINDOW_SECONDS,
+        blink_thresh=blink_thresh,
+        max_fps=LIVE_MAX_FPS,
+    )
+
+    async def push_updates():
+        while True:
+            await asyncio.sleep(LIVE_UPDATE_INTERVAL)
+            update = await run_in_threadpool(session.update)
+            await websocket.send_json(update)
+
+    pusher = asyncio.create_task(push_updates())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                if message.get("bytes") is not None:
+                    # 얼굴 검출/랜드마크는 스레드 풀에서 수행
+                    await run_in_threadpool(session.add_jpeg, message["bytes"])
+                elif message.get("text") is not None:
+                    session.add_message(json.loads(message["text"]))
+            except (ValueError, TypeError, KeyError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pusher.cancel()
+        live_sessions -= 1
 
 
 # ---------------------------------------------------------------------------
 # 라우터: 이미지 다운로드
 # ---------------------------------------------------------------------------
 @app.get("/download/{image_type}/{video_id}")
-async def download_image(image_type: str, video_id: str):
-    """특정 비디오 ID의 분석 결과 이미지를 다운로드한다."""
+async def download_image(
+    request: Request,
+    image_type: str,
+    video_id: str,
+    width: int = Query(1800, ge=200, le=4000, description="이미지 너비 (px)"),
+    height: int = Query(750, ge=100, le=4000, description="이미지 높이 (px)"),
+    dpi: int = Query(150, ge=50, le=300),
+    format: str = Query("png", description="png, webp, svg"),
+):
+    """특정 비디오 ID의 분석 결과 그래프를 요청한 크기/형식으로 렌더링해 반환한다."""
     # 이미지 타입 검증
-    allowed_types = {"bpm", "blink", "motion"}
-    if image_type not in allowed_types:
+    if image_type not in rendering.IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Invalid image type")
-    
-    # 이미지 파일 경로 생성
-    img_filename = f"{video_id}_{image_type}.png"
-    img_path = STATIC_DIR / img_filename
-    
-    # 파일 존재 여부 확인
-    if not img_path.exists():
+    if format not in rendering.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid format")
+
+    img_filename = f"{video_id}_{image_type}.{format}"
+    headers = {"Content-Disposition": f'inline; filename="{img_filename}"'}
+    media_type = rendering.MEDIA_TYPES[format]
+
+    key = rendering.cache_key(video_id, image_type, width, height, dpi, format)
+    image = plot_cache.get(key)
+    static_path = STATIC_DIR / f"{video_id}_{image_type}.png"
+    if image is None and not result_store.path(video_id).exists():
+        # 수치 결과가 없는 이전 분석: 미리 생성된 PNG 가 있으면 그대로 제공
+        if format == "png" and static_path.exists():
+            return cached_response(
+                request,
+                make_etag("static", static_path.name, static_path.stat().st_size),
+                media_type,
+                static_path.read_bytes,
+                headers=headers,
+            )
         raise HTTPException(status_code=404, detail="Image not found")
-    
-    return FileResponse(
-        path=str(img_path),
-        media_type="image/png",
-        filename=img_filename
-    ) 
\ No newline at end of file
+    await run_in_threadpool(retention_index.touch, video_id)
+
+    # 같은 결과 + 같은 렌더링 파라미터 → 같은 이미지 (렌더링 전에 304 판단 가능)
+    etag = make_etag("plot", ANALYSIS_VERSION, *key)
+    if image is None:
+        response = not_modified(request, etag, media_type, headers)
+        if response is not None:
+            return response
+
+    if image is None:
+        results = await run_in_threadpool(result_store.load, video_id)
+        if results is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+
+        # 렌더링은 스레드 풀에서 수행 (Figure/Agg API 라 스레드 안전)
+        image = await run_in_threadpool(
+            rendering.render_plot, results, image_type, width, height, dpi, format
+        )
+        plot_cache.put(key, image)
+
+    def load_gzip() -> bytes:
+        # 압축 가능한 형식(svg)만 호출된다. 압축본도 같은 LRU 캐시에 둔다
+        gz_key = key + ("gzip",)
+        data = plot_cache.get(gz_key)
+        if data is None:
+            data = gzip_bytes(image)
+            plot_cache.put(gz_key, data)
+        return data
+
+    return cached_response(request, etag, media_type, lambda: image, headers=headers, load_gzip=load_gzip)
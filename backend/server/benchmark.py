@@ -0,0 +1,208 @@
+"""Offline benchmarks for the frame pipeline.
+
+실제 영상으로 프레임 파이프라인 설정을 비교한다. 기준(매 프레임 Haar 검출)과
+같은 영상을 다시 처리해 처리 속도(fps)와 ROI 일치도(박스 IoU, ROI 평균 RGB 차이,
+G 채널 상관계수)를 출력한다.
+
+    python -m server.benchmark tracking video.mp4 --interval 5 10 30
+
+검출 해상도는 RPPG_FACE_DETECT_WIDTH 로 정해지므로, 원본 해상도 검출과 비교하려면
+RPPG_FACE_DETECT_WIDTH=0 으로 한 번 더 실행해 fps 와 ROI 값을 비교한다.
+
+detectors 명령은 얼굴 검출기 백엔드(detectors 모듈)를 매 프레임 실행해 CPU 기준
+프레임당 검출 시간(ms), 검출 실패율, 박스 흔들림(연속 프레임 사이 박스 중심 이동량을
+박스 폭으로 나눈 값)과 첫 번째 백엔드 대비 평균 IoU 를 출력한다.
+
+    python -m server.benchmark detectors clip1.mp4 clip2.mp4 --backends haar hog yunet landmark
+"""
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import detectors, features
+from .frame_source import open_frames
+
+
+class _RoiRecorder(features.FeatureExtractor):
+    """프레임 번호별 얼굴 박스와 ROI 평균 RGB 를 기록한다."""
+
+    name = "roi"
+
+    def start(self, meta: features.VideoMeta) -> None:
+        self._rows: Dict[int, Tuple[Tuple[int, int, int, int], np.ndarray]] = {}
+
+    def process(self, ctx: features.FrameContext) -> None:
+        face = ctx.face()
+        if face is None:
+            return
+        x, y, w, h = face
+        self._rows[ctx.index] = (face, ctx.frame[y : y + h, x : x + w].mean(axis=(0, 1))[::-1])
+
+    def result(self) -> Dict[int, Tuple[Tuple[int, int, int, int], np.ndarray]]:
+        return self._rows
+
+
+def _iou(a: Sequence[int], b: Sequence[int]) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def run_pass(video_path: str, detect_interval: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    results = features.run_extractors(video_path, [_RoiRecorder()], detect_interval=detect_interval)
+    elapsed = time.perf_counter() - start
+    meta = results["meta"]
+    return {
+        "detect_interval": detect_interval,
+        "seconds": elapsed,
+        "fps": meta.frame_count / elapsed if elapsed > 0 else 0.0,
+        "rows": results["roi"],
+        "frame_count": meta.frame_count,
+    }
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """기준 대비 후보 설정의 ROI 일치도."""
+    base_rows, rows = baseline["rows"], candidate["rows"]
+    common = sorted(base_rows.keys() & rows.keys())
+    report: Dict[str, Any] = {
+        "detect_interval": candidate["detect_interval"],
+        "fps": round(candidate["fps"], 1),
+        "speedup": round(baseline["seconds"] / candidate["seconds"], 2) if candidate["seconds"] else None,
+        "face_frames": len(rows),
+        "baseline_face_frames": len(base_rows),
+        "common_frames": len(common),
+    }
+    if not common:
+        return report
+
+    ious = np.array([_iou(base_rows[i][0], rows[i][0]) for i in common])
+    base_rgb = np.array([base_rows[i][1] for i in common])
+    rgb = np.array([rows[i][1] for i in common])
+    report.update(
+        mean_iou=round(float(ious.mean()), 4),
+        min_iou=round(float(ious.min()), 4),
+        rgb_mean_abs_diff=[round(float(v), 3) for v in np.abs(rgb - base_rgb).mean(axis=0)],
+    )
+    if len(common) > 2 and base_rgb[:, 1].std() > 0 and rgb[:, 1].std() > 0:
+        report["green_corr"] = round(float(np.corrcoef(base_rgb[:, 1], rgb[:, 1])[0, 1]), 4)
+    return report
+
+
+def benchmark_tracking(video_path: str, intervals: Sequence[int]) -> List[Dict[str, Any]]:
+    """매 프레임 검출(기준)과 각 검출 간격의 속도 / ROI 일치도를 비교한다."""
+    baseline = run_pass(video_path, 1)
+    reports = [compare(baseline, baseline)]
+    for interval in intervals:
+        if interval > 1:
+            reports.append(compare(baseline, run_pass(video_path, interval)))
+    return reports
+
+
+def run_detector(video_path: str, backend: str, max_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """분석 fps 로 솎아낸 모든 프레임에서 검출기를 실행해 프레임별 박스와 검출 시간을 기록한다."""
+    import cv2
+
+    detector = detectors.create_detector(backend)
+    boxes: Dict[int, Tuple[int, int, int, int]] = {}
+    times: List[float] = []
+    frames = 0
+    with open_frames(video_path, end_time=max_seconds, prefetch=0) as source:
+        for index, _, frame in source:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if not frames:
+                detector.detect(gray, frame)  # 모델 로드 시간은 측정에서 제외한다
+                detector.reset()
+            start = time.perf_counter()
+            box = detector.detect(gray, frame)
+            times.append(time.perf_counter() - start)
+            frames += 1
+            if box is not None:
+                boxes[index] = box
+    return {"backend": backend, "frames": frames, "boxes": boxes, "times": np.array(times)}
+
+
+def _jitter(boxes: Dict[int, Tuple[int, int, int, int]]) -> Optional[float]:
+    """연속으로 검출된 프레임 쌍의 박스 중심 이동량 / 박스 폭 평균."""
+    indices = sorted(boxes)
+    steps = []
+    for a, b in zip(indices, indices[1:]):
+        ax, ay, aw, ah = boxes[a]
+        bx, by, bw, bh = boxes[b]
+        dx = (bx + bw / 2.0) - (ax + aw / 2.0)
+        dy = (by + bh / 2.0) - (ay + ah / 2.0)
+        steps.append(np.hypot(dx, dy) / max(aw, 1))
+    return float(np.mean(steps)) if steps else None
+
+
+def detector_report(run: Dict[str, Any], reference: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    times_ms = run["times"] * 1000.0
+    frames, boxes = run["frames"], run["boxes"]
+    jitter = _jitter(boxes)
+    report: Dict[str, Any] = {
+        "backend": run["backend"],
+        "frames": frames,
+        "ms_per_frame": round(float(times_ms.mean()), 2) if frames else None,
+        "p95_ms": round(float(np.percentile(times_ms, 95)), 2) if frames else None,
+        "miss_rate": round(1.0 - len(boxes) / frames, 4) if frames else None,
+        "jitter": round(jitter, 4) if jitter is not None else None,
+    }
+    if reference is not None and reference is not run:
+        common = sorted(reference["boxes"].keys() & boxes.keys())
+        if common:
+            ious = [_iou(reference["boxes"][i], boxes[i]) for i in common]
+            report["reference"] = reference["backend"]
+            report["mean_iou"] = round(float(np.mean(ious)), 4)
+    return report
+
+
+def benchmark_detectors(
+    video_paths: Sequence[str], backends: Sequence[str], max_seconds: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """영상마다 각 검출기 백엔드의 속도 / 실패율 / 흔들림을 비교한다."""
+    reports = []
+    for video_path in video_paths:
+        runs = [run_detector(video_path, backend, max_seconds) for backend in backends]
+        for run in runs:
+            reports.append({"video": video_path, **detector_report(run, runs[0])})
+    return reports
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="프레임 파이프라인 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    tracking = sub.add_parser("tracking", help="얼굴 추적 간격별 속도 / ROI 일치도")
+    tracking.add_argument("video", help="영상 파일 경로")
+    tracking.add_argument("--interval", type=int, nargs="+", default=[5, 10, 30], help="검출 간격 (프레임)")
+
+    detector = sub.add_parser("detectors", help="얼굴 검출기 백엔드별 속도 / 실패율 / 박스 흔들림")
+    detector.add_argument("videos", nargs="+", help="영상 파일 경로")
+    detector.add_argument(
+        "--backends", nargs="+", default=list(detectors.DETECTORS), help="비교할 검출기 (첫 번째가 IoU 기준)"
+    )
+    detector.add_argument("--max-seconds", type=float, default=None, help="영상 앞부분만 사용 (초)")
+    args = parser.parse_args(argv)
+
+    if args.command == "tracking":
+        reports = benchmark_tracking(args.video, args.interval)
+    else:
+        reports = benchmark_detectors(args.videos, args.backends, args.max_seconds)
+    for report in reports:
+        print(json.dumps(report, ensure_ascii=False))
+
+
+# 단독 실행 시 CLI 기능
+if __name__ == "__main__":
+    main()
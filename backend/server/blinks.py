@@ -0,0 +1,153 @@
+"""Vectorized eye aspect ratio and blink event detection.
+
+EAR 은 (N, 68, 2) 랜드마크 배열 전체에 대해 한 번에 계산한다. 깜빡임은 프레임별
+`ear < thresh` 플래그를 세는 대신 히스테리시스(닫힘: ear < close_thresh, 열림:
+ear > open_thresh)로 눈 감김 구간을 하나의 이벤트로 묶어 시작 시각과 지속 시간을
+구한다. 따라서 길게 눈을 감고 있어도 한 번의 깜빡임으로 센다.
+구간별 집계는 np.bincount 로 하므로 1시간 분량도 수 밀리초 안에 끝난다.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .config import BLINK_HYSTERESIS
+
+# 68점 랜드마크의 눈 위치 (imutils FACIAL_LANDMARKS_68_IDXS 와 같음)
+LEFT_EYE = slice(42, 48)
+RIGHT_EYE = slice(36, 42)
+
+
+def eye_aspect_ratio(landmarks: np.ndarray) -> np.ndarray:
+    """양쪽 눈 EAR 평균. (68, 2) 이면 스칼라 배열, (N, 68, 2) 이면 (N,) 을 반환한다."""
+    pts = np.asarray(landmarks, dtype=np.float32)
+    eyes = np.stack([pts[..., LEFT_EYE, :], pts[..., RIGHT_EYE, :]], axis=-3)  # (..., 2, 6, 2)
+    # 세로 거리 |p1-p5|, |p2-p4| 와 가로 거리 |p0-p3|
+    a = np.linalg.norm(eyes[..., 1, :] - eyes[..., 5, :], axis=-1)
+    b = np.linalg.norm(eyes[..., 2, :] - eyes[..., 4, :], axis=-1)
+    c = np.linalg.norm(eyes[..., 0, :] - eyes[..., 3, :], axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ear = (a + b) / (2.0 * c)
+    return ear.mean(axis=-1)
+
+
+@dataclass
+class BlinkEvents:
+    """감지된 깜빡임 이벤트 (시작 시각 / 지속 시간, 초)."""
+
+    onsets: np.ndarray
+    durations: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.onsets)
+
+    def per_minute(self, duration: float) -> Optional[float]:
+        return len(self) / duration * 60.0 if duration > 0 else None
+
+
+def eye_closed(ear: np.ndarray, close_thresh: float, open_thresh: Optional[float] = None) -> np.ndarray:
+    """히스테리시스로 프레임별 눈 감김 상태 (bool) 를 구한다.
+
+    close_thresh 보다 작으면 감김, open_thresh 보다 크면 뜸, 그 사이는 직전 상태를 유지한다.
+    """
+    if open_thresh is None:
+        open_thresh = close_thresh + BLINK_HYSTERESIS
+    ear = np.asarray(ear, dtype=np.float32)
+    decided = (ear < close_thresh) | (ear > open_thresh)
+    # 상태가 결정된 마지막 프레임 번호를 앞으로 채워 "직전 상태 유지" 를 벡터화한다
+    last = np.maximum.accumulate(np.where(decided, np.arange(len(ear)), -1))
+    closed = ear < close_thresh
+    return np.where(last >= 0, closed[np.maximum(last, 0)], False)
+
+
+def detect_blinks(
+    ear: np.ndarray,
+    timestamps: np.ndarray,
+    close_thresh: float,
+    open_thresh: Optional[float] = None,
+) -> BlinkEvents:
+    """EAR 시계열에서 깜빡임 이벤트를 찾는다.
+
+    지속 시간은 눈이 감긴 첫 프레임부터 다시 뜬 첫 프레임까지이다
+    (영상 끝까지 감겨 있으면 마지막 프레임까지).
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    closed = eye_closed(ear, close_thresh, open_thresh).astype(np.int8)
+    if not len(closed):
+        return BlinkEvents(np.empty(0), np.empty(0))
+
+    edges = np.diff(np.concatenate(([0], closed, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)  # 다시 뜬 프레임 (len 이면 끝까지 감김)
+    end_times = timestamps[np.minimum(ends, len(timestamps) - 1)]
+    return BlinkEvents(timestamps[starts], end_times - timestamps[starts])
+
+
+def bin_sum(times: np.ndarray, values: np.ndarray, bin_seconds: float, duration: float) -> np.ndarray:
+    """시각의 값을 [k * bin_seconds, (k + 1) * bin_seconds) 구간별로 합한다.
+
+    duration 끝 시각에 정확히 놓인 값은 마지막 구간에 넣는다.
+    """
+    n_bins = max(int(np.ceil(duration / bin_seconds)), 1)
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(times):
+        return np.zeros(n_bins)
+
+    bins = np.minimum((times // bin_seconds).astype(np.int64), n_bins - 1)
+    keep = bins >= 0
+    return np.bincount(bins[keep], weights=values[keep], minlength=n_bins)[:n_bins]
+
+
+def blink_series(
+    events: BlinkEvents,
+    duration: float,
+    bin_seconds: float = 1.0,
+) -> Dict[str, Any]:
+    """analyze_series 형식의 깜빡임 시계열 (bin_seconds 구간별 이벤트 수) 과 이벤트 목록."""
+    counts = bin_sum(events.onsets, np.ones(len(events)), bin_seconds, duration)
+    return {
+        "time_blink": (np.arange(len(counts)) * bin_seconds).tolist(),
+        "blink_counts": counts.tolist(),
+        "blink_duration": float(duration),
+        "blink_events": {
+            "onsets": events.onsets.tolist(),
+            "durations": events.durations.tolist(),
+            "per_minute": events.per_minute(duration),
+        },
+    }
+
+
+class BlinkDetector:
+    """프레임을 하나씩 받아 히스테리시스로 깜빡임 이벤트를 감지한다 (실시간 분석용).
+
+    Parameters
+    ----------
+    close_thresh : float
+        이 값보다 EAR 이 작으면 눈을 감은 것으로 본다.
+    open_thresh : float, optional
+        이 값보다 EAR 이 크면 다시 뜬 것으로 본다 (기본 close_thresh + BLINK_HYSTERESIS).
+    """
+
+    def __init__(self, close_thresh: float, open_thresh: Optional[float] = None):
+        self.close_thresh = close_thresh
+        self.open_thresh = close_thresh + BLINK_HYSTERESIS if open_thresh is None else open_thresh
+        self.closed = False
+        self.onset: Optional[float] = None
+        self.total = 0
+        self.last_duration: Optional[float] = None
+
+    def update(self, t: float, ear: float) -> Optional[str]:
+        """상태가 바뀌면 "onset" (감기 시작) 또는 "offset" (다시 뜸) 을 반환한다."""
+        if not self.closed and ear < self.close_thresh:
+            self.closed = True
+            self.onset = t
+            self.total += 1
+            return "onset"
+        if self.closed and ear > self.open_thresh:
+            self.closed = False
+            self.last_duration = t - self.onset
+            return "offset"
+        return None
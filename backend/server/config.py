@@ -0,0 +1,191 @@
+"""Server paths and runtime settings.
+
+모든 설정은 환경 변수로 덮어쓸 수 있다.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# ---------------------------------------------------------------------------
+# 경로 설정
+# ---------------------------------------------------------------------------
+BASE_DIR = Path(__file__).resolve().parent            # .../rppg_project/server
+UPLOAD_DIR = BASE_DIR / "uploads"
+CSV_DIR = BASE_DIR / "csvs"
+STATIC_DIR = BASE_DIR / "static"
+# 영상별 바이너리 특징 저장소 (.npy, memmap 으로 읽기)
+FEATURE_DIR = BASE_DIR / "features"
+
+# ---------------------------------------------------------------------------
+# 작업(job) 실행 설정
+# ---------------------------------------------------------------------------
+# 분석을 수행할 워커 프로세스 수
+JOB_WORKERS = _env_int("RPPG_JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+# 대기열에 쌓일 수 있는 최대 작업 수 (초과 시 503)
+JOB_MAX_PENDING = _env_int("RPPG_JOB_MAX_PENDING", 32)
+# 메모리에 보관할 완료 작업 수
+JOB_HISTORY_LIMIT = _env_int("RPPG_JOB_HISTORY_LIMIT", 1000)
+
+# ---------------------------------------------------------------------------
+# 업로드 설정
+# ---------------------------------------------------------------------------
+# 업로드 허용 최대 크기 (MB)
+MAX_UPLOAD_BYTES = _env_int("RPPG_MAX_UPLOAD_MB", 1024) * 1024 * 1024
+# 디스크로 스트리밍할 때의 청크 크기
+UPLOAD_CHUNK_SIZE = _env_int("RPPG_UPLOAD_CHUNK_KB", 1024) * 1024
+# 재개 가능한 업로드의 부분 파일 위치
+PARTIAL_UPLOAD_DIR = UPLOAD_DIR / ".partial"
+
+# ---------------------------------------------------------------------------
+# 결과 캐시 설정
+# ---------------------------------------------------------------------------
+# 영상 해시 → 분석 결과 manifest 저장 위치
+RESULT_CACHE_DIR = BASE_DIR / "cache"
+
+# ---------------------------------------------------------------------------
+# 결과 출력 설정
+# ---------------------------------------------------------------------------
+# 수치 시계열 결과(JSON) 저장 위치
+RESULTS_DIR = BASE_DIR / "results"
+# 분석 직후 PNG 그래프를 static/ 에 미리 생성할지 여부
+# (기본값 0: 그래프는 /download 요청 시점에만 렌더링)
+RENDER_PLOTS = _env_int("RPPG_RENDER_PLOTS", 0) != 0
+# 결과 JSON 의 gzip 사본을 함께 저장할지 여부 (Accept-Encoding: gzip 에 그대로 제공)
+PRECOMPRESS_RESULTS = _env_int("RPPG_PRECOMPRESS_RESULTS", 1) != 0
+# 렌더링된 그래프 LRU 캐시 크기 (MB)
+PLOT_CACHE_BYTES = _env_int("RPPG_PLOT_CACHE_MB", 64) * 1024 * 1024
+
+# ---------------------------------------------------------------------------
+# 보관(retention) 설정
+# ---------------------------------------------------------------------------
+# 아티팩트 인덱스 (SQLite)
+RETENTION_DB = BASE_DIR / "retention.sqlite3"
+# 원본 영상을 특징 추출 후에도 보관할지 여부 (0 이면 추출 직후 삭제)
+RETAIN_RAW_VIDEOS = _env_int("RPPG_RETAIN_RAW_VIDEOS", 0) != 0
+# 원본 영상 최대 보관 시간 (보관하도록 설정했거나 분석이 실패한 경우)
+RAW_VIDEO_TTL_SECONDS = _env_int("RPPG_RAW_VIDEO_TTL_HOURS", 24) * 3600
+# 특징/결과/그래프 전체 용량 한도 (MB, 0 이면 제한 없음)
+ARTIFACT_QUOTA_BYTES = _env_int("RPPG_ARTIFACT_QUOTA_MB", 10 * 1024) * 1024 * 1024
+# 마지막 접근 후 특징/결과/그래프 보관 시간 (0 이면 제한 없음)
+ARTIFACT_TTL_SECONDS = _env_int("RPPG_ARTIFACT_TTL_HOURS", 24 * 30) * 3600
+# 정리 주기 (초)
+RETENTION_INTERVAL_SECONDS = _env_int("RPPG_RETENTION_INTERVAL", 300)
+# 관리자 엔드포인트 토큰 (비어 있으면 인증 없음)
+ADMIN_TOKEN = os.environ.get("RPPG_ADMIN_TOKEN", "")
+
+# ---------------------------------------------------------------------------
+# 실시간(/ws/live) 분석 설정
+# ---------------------------------------------------------------------------
+# 결과를 보내는 주기 (초)
+LIVE_UPDATE_INTERVAL = _env_int("RPPG_LIVE_UPDATE_MS", 1000) / 1000.0
+# BPM 계산에 사용할 최근 구간 (초)
+LIVE_WINDOW_SECONDS = _env_int("RPPG_LIVE_WINDOW_SECONDS", 10)
+# 세션당 JPEG 프레임 처리 상한 (fps, 초과분은 버림)
+LIVE_MAX_FPS = _env_int("RPPG_LIVE_MAX_FPS", 15)
+# 서버 전체 동시 세션 수 상한
+LIVE_MAX_SESSIONS = _env_int("RPPG_LIVE_MAX_SESSIONS", 32)
+
+# ---------------------------------------------------------------------------
+# 계측(metrics) / 프로파일링 설정
+# ---------------------------------------------------------------------------
+# 워커 프로세스별 누적 메트릭 파일 위치 (/metrics 에서 합산)
+METRICS_DIR = BASE_DIR / "metrics"
+# X-RPPG-Profile 헤더로 요청 단위 cProfile 을 허용할지 여부
+PROFILING_ENABLED = _env_int("RPPG_PROFILING", 0) != 0
+# 프로파일 결과(.prof / .txt) 저장 위치
+PROFILE_DIR = BASE_DIR / "profiles"
+
+# ---------------------------------------------------------------------------
+# 진행 상황(/progress) 설정
+# ---------------------------------------------------------------------------
+# 분석 중인 영상별 진행 상황 파일 위치
+PROGRESS_DIR = BASE_DIR / "progress"
+# 워커가 진행 상황을 기록하는 / SSE 가 확인하는 주기 (초)
+PROGRESS_INTERVAL = _env_int("RPPG_PROGRESS_INTERVAL_MS", 500) / 1000.0
+# 이 시간(초) 동안 진행 상황이 갱신되지 않으면 stale 로 표시 (멈춘 워커 감지)
+PROGRESS_STALE_SECONDS = _env_int("RPPG_PROGRESS_STALE_SECONDS", 60)
+
+# ---------------------------------------------------------------------------
+# 얼굴 검출 / 추적 설정
+# ---------------------------------------------------------------------------
+# Haar 검출 간격 (프레임, 1 이면 매 프레임 검출하고 추적하지 않음)
+FACE_DETECT_INTERVAL = _env_int("RPPG_FACE_DETECT_INTERVAL", 10)
+# 템플릿 매칭 신뢰도(정규화 상관계수, %)가 이보다 낮으면 즉시 다시 검출
+FACE_TRACK_MIN_CONFIDENCE = _env_int("RPPG_FACE_TRACK_MIN_CONFIDENCE", 60) / 100.0
+# 얼굴 박스 평활화에서 새 박스의 가중치 (%, 100 이면 평활화하지 않음)
+FACE_BOX_SMOOTHING = _env_int("RPPG_FACE_BOX_SMOOTHING", 50) / 100.0
+# 얼굴 검출(Haar / HOG)용 축소 영상의 최소 폭 (픽셀, 0 이면 원본 해상도에서 검출)
+# 폭이 이 값보다 작아지지 않는 범위에서 피라미드로 절반씩 줄여 검출하고 박스는 원본 좌표로 옮긴다
+FACE_DETECT_WIDTH = _env_int("RPPG_FACE_DETECT_WIDTH", 480)
+
+# ---------------------------------------------------------------------------
+# 분석 프레임 비율 설정
+# ---------------------------------------------------------------------------
+# 특징 추출에 사용할 프레임 비율 (fps, 0 이면 모든 프레임). 나머지 프레임은
+# 디코딩하지 않고 건너뛰며, rPPG 는 실제 프레임 시각을 이 비율로 재샘플링해 계산한다.
+ANALYSIS_FPS = _env_int("RPPG_ANALYSIS_FPS", 15)
+
+# ---------------------------------------------------------------------------
+# 구간 병렬 추출 설정
+# ---------------------------------------------------------------------------
+# 한 영상을 시간 구간으로 나누어 추출할 프로세스 수 (1 이면 순차 추출)
+# 분석 워커(RPPG_JOB_WORKERS)마다 이 수만큼 자식 프로세스가 생기므로 함께 조정한다
+SEGMENT_WORKERS = _env_int("RPPG_SEGMENT_WORKERS", 1)
+# 구간 최소 길이 (초). 이보다 두 배 이상 긴 영상만 나눈다
+MIN_SEGMENT_SECONDS = _env_int("RPPG_MIN_SEGMENT_SECONDS", 30)
+# 구간 시작 앞에서 추적기/움직임 상태를 맞추기 위해 미리 읽는 시간 (초)
+SEGMENT_OVERLAP_SECONDS = _env_int("RPPG_SEGMENT_OVERLAP_SECONDS", 1)
+
+# ---------------------------------------------------------------------------
+# 프레임 디코딩 설정
+# ---------------------------------------------------------------------------
+# 백그라운드 스레드가 미리 디코딩해 둘 프레임 수 (링 버퍼 크기, 0 이면 같은 스레드에서 디코딩)
+PREFETCH_FRAMES = _env_int("RPPG_PREFETCH_FRAMES", 4)
+
+# ---------------------------------------------------------------------------
+# rPPG 신호 영역 설정
+# ---------------------------------------------------------------------------
+# 이마/뺨 영역 안에서 YCrCb 피부색 화소만 평균할지 여부
+ROI_SKIN_MASK = _env_int("RPPG_ROI_SKIN_MASK", 1) != 0
+# rPPG 입력으로 얼굴 박스 평균 대신 이마/뺨 다중 ROI 평균을 사용할지 여부
+USE_SKIN_ROI = _env_int("RPPG_USE_SKIN_ROI", 1) != 0
+
+# ---------------------------------------------------------------------------
+# 깜빡임 검출 설정
+# ---------------------------------------------------------------------------
+# 눈을 감았다고 본 뒤 다시 떴다고 보려면 EAR 이 blink_thresh 보다 이만큼 커야 한다
+# (1/100 단위, 임계값 근처의 흔들림이 여러 번의 깜빡임으로 세어지는 것을 막는다)
+BLINK_HYSTERESIS = _env_int("RPPG_BLINK_HYSTERESIS", 3) / 100.0
+
+# ---------------------------------------------------------------------------
+# 얼굴 검출기 설정
+# ---------------------------------------------------------------------------
+# ROI / EAR 추출에 사용할 얼굴 검출기 (haar, hog, yunet, landmark — detectors 모듈 참고)
+FACE_DETECTOR = os.environ.get("RPPG_FACE_DETECTOR", "haar")
+# analyze_motion(움직임 단독 분석)의 움직임 샘플에 사용할 얼굴 검출기.
+# 전체 분석의 움직임은 RPPG_FACE_DETECTOR 로 만든 랜드마크 트랙에서 계산한다
+MOTION_DETECTOR = os.environ.get("RPPG_MOTION_DETECTOR", "hog")
+# YuNet ONNX 모델 파일 (face_detection_yunet_2023mar.onnx, OpenCV Zoo 배포본)
+YUNET_MODEL = Path(
+    os.environ.get("RPPG_YUNET_MODEL", str(BASE_DIR.parent / "Eye_detection" / "face_detection_yunet_2023mar.onnx"))
+)
+# YuNet 최소 신뢰도 (1/100 단위)
+YUNET_SCORE_THRESHOLD = _env_int("RPPG_YUNET_SCORE_THRESHOLD", 60) / 100.0
+
+# ---------------------------------------------------------------------------
+# 디코딩 백엔드 설정
+# ---------------------------------------------------------------------------
+# 영상 디코더 (auto: PyAV 가 있으면 PyAV, 없으면 OpenCV / pyav / opencv)
+DECODE_BACKEND = os.environ.get("RPPG_DECODE_BACKEND", "auto")
+# PyAV 코덱 스레드 수 (0 이면 FFmpeg 가 CPU 수에 맞춰 정함)
+DECODE_THREADS = _env_int("RPPG_DECODE_THREADS", 0)
+# 디코딩할 때 프레임을 이 폭으로 줄인다 (0 이면 원본 해상도).
+# 랜드마크/박스/움직임 값은 원본 해상도 좌표로 환산해 저장한다
+DECODE_WIDTH = _env_int("RPPG_DECODE_WIDTH", 0)
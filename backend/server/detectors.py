@@ -0,0 +1,194 @@
+"""Pluggable face detector backends.
+
+얼굴 박스 검출 방식을 배포 환경마다 고를 수 있도록 검출기를 같은 인터페이스로 감싼다.
+
+haar      OpenCV Haar cascade (기본값, 가장 빠르지만 측면/조명 변화에 약함)
+hog       dlib HOG + 선형 SVM (Haar 보다 느리지만 오검출이 적음)
+yunet     OpenCV DNN 기반 YuNet (cv2.FaceDetectorYN, 로컬 ONNX 모델 파일 필요)
+landmark  직전 프레임의 68점 랜드마크로 현재 박스를 정하고, 실패하면 다른 검출기로 검출
+
+검출기는 RPPG_FACE_DETECTOR(ROI/EAR 용)와 RPPG_MOTION_DETECTOR(analyze_motion 움직임 샘플용)로
+고르며, `python -m server.benchmark detectors` 로 녹화 영상에서 프레임당 시간, 검출
+실패율, 박스 흔들림을 비교할 수 있다. 모든 검출기는 원본 해상도 (x, y, w, h) 를 반환한다.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from . import metrics, models
+from .config import FACE_DETECT_WIDTH, FACE_DETECTOR
+
+Box = Tuple[int, int, int, int]  # (x, y, w, h)
+
+
+def detection_image(gray: np.ndarray, width: int = FACE_DETECT_WIDTH) -> Tuple[np.ndarray, float]:
+    """검출용 축소 영상과 축척 (축소 영상 좌표 = 원본 좌표 * scale).
+
+    폭이 width 보다 작아지지 않는 범위에서 가우시안 피라미드(pyrDown)로 절반씩 줄인다
+    (1920 → 960 → 480). 검출 비용은 축척의 제곱에 비례해 줄어든다.
+    width 가 0 이면 원본을 그대로 사용한다.
+    """
+    scale = 1.0
+    if width > 0:
+        while gray.shape[1] >= 2 * width:
+            gray = cv2.pyrDown(gray)
+            scale *= 0.5
+    return gray, scale
+
+
+def _to_full_resolution(box: Sequence[float], scale: float, shape: Tuple[int, ...]) -> Box:
+    """축소 영상의 (x, y, w, h) 를 원본 해상도 좌표로 옮긴다 (프레임 안으로 자름)."""
+    height, width = shape[:2]
+    x, y, w, h = (int(round(v / scale)) for v in box)
+    x, y = min(max(x, 0), width - 1), min(max(y, 0), height - 1)
+    return x, y, min(w, width - x), min(h, height - y)
+
+
+class FaceDetector:
+    """얼굴 검출기 공통 인터페이스.
+
+    검출기 객체는 호출자(추출 루프, 실시간 세션)마다 만든다. 상태가 있는 검출기
+    (landmark)도 있으므로 여러 영상/세션이 하나를 공유하면 안 된다. 모델 자체는
+    models 모듈이 프로세스 단위로 공유한다.
+    """
+
+    name = ""
+
+    def detect(self, gray: np.ndarray, frame: Optional[np.ndarray] = None) -> Optional[Box]:
+        """그레이 프레임(필요하면 BGR 프레임도)에서 얼굴 박스 하나를 찾는다. 없으면 None."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """영상이 바뀌거나 이어지지 않는 프레임을 받기 전에 호출한다."""
+
+    def __call__(self, gray: np.ndarray, frame: Optional[np.ndarray] = None) -> Optional[Box]:
+        return self.detect(gray, frame)
+
+
+class HaarDetector(FaceDetector):
+    """OpenCV Haar cascade 검출기 (축소 영상에서 검출)."""
+
+    name = "haar"
+
+    def detect(self, gray: np.ndarray, frame: Optional[np.ndarray] = None) -> Optional[Box]:
+        with metrics.timed("haar"):
+            small, scale = detection_image(gray)
+            faces = models.get_face_cascade().detectMultiScale(small, 1.3, 5)
+        return _to_full_resolution(faces[0], scale, gray.shape) if len(faces) else None
+
+
+class HogDetector(FaceDetector):
+    """dlib HOG 검출기 (축소 영상에서 검출)."""
+
+    name = "hog"
+
+    def detect(self, gray: np.ndarray, frame: Optional[np.ndarray] = None) -> Optional[Box]:
+        with metrics.timed("hog"):
+            small, scale = detection_image(gray)
+            faces = models.get_face_detector()(small)
+        if len(faces) == 0:
+            return None
+        face = faces[0]
+        return _to_full_resolution((face.left(), face.top(), face.width(), face.height()), scale, gray.shape)
+
+
+class YuNetDetector(FaceDetector):
+    """OpenCV DNN YuNet 검출기 (cv2.FaceDetectorYN, BGR 입력).
+
+    모델 파일은 RPPG_YUNET_MODEL 경로에서 읽는다. 신뢰도가 가장 높은 얼굴을 반환한다.
+    """
+
+    name = "yunet"
+
+    def detect(self, gray: np.ndarray, frame: Optional[np.ndarray] = None) -> Optional[Box]:
+        image = frame if frame is not None and frame.ndim == 3 else cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        with metrics.timed("yunet"):
+            # 피라미드 축소는 그레이/컬러 모두 같은 규칙을 따른다
+            small, scale = detection_image(image)
+            net = models.get_yunet()
+            net.setInputSize((small.shape[1], small.shape[0]))
+            _, faces = net.detect(small)
+        if faces is None or len(faces) == 0:
+            return None
+        best = faces[int(np.argmax(faces[:, -1]))]  # 각 행: x, y, w, h, 5점 좌표(10), 점수
+        return _to_full_resolution(best[:4], scale, gray.shape)
+
+
+class LandmarkRoiDetector(FaceDetector):
+    """직전 프레임의 랜드마크를 따라가며 박스를 정하는 검출기.
+
+    직전 박스 안에서 68점 랜드마크를 다시 예측하고, 그 외곽으로 Haar 박스와 비슷한
+    정사각형 박스를 만든다. 첫 프레임, 랜드마크 박스 크기가 급변한 경우, 그리고
+    refresh_interval 프레임마다 fallback 검출기로 다시 검출해 드리프트를 막는다.
+
+    Parameters
+    ----------
+    fallback : FaceDetector, optional
+        랜드마크를 따라갈 수 없을 때 사용할 검출기 (기본 HaarDetector).
+    refresh_interval : int
+        이 프레임 수마다 fallback 검출기로 박스를 다시 잡는다.
+    max_scale_change : float
+        직전 박스 대비 크기 비율이 이 범위를 벗어나면 추적 실패로 본다.
+    """
+
+    name = "landmark"
+
+    def __init__(
+        self,
+        fallback: Optional[FaceDetector] = None,
+        refresh_interval: int = 30,
+        max_scale_change: float = 1.3,
+    ):
+        self.fallback = fallback if fallback is not None else HaarDetector()
+        self.refresh_interval = max(1, int(refresh_interval))
+        self.max_scale_change = max_scale_change
+        self.reset()
+
+    def reset(self) -> None:
+        self._box: Optional[Box] = None
+        self._since_fallback = 0
+        self.fallback.reset()
+
+    def _box_from_landmarks(self, gray: np.ndarray, box: Box) -> Optional[Box]:
+        w = box[2]
+        with metrics.timed("landmark_roi"):
+            pts = models.predict_landmarks(gray, box)
+        x0, y0 = pts.min(axis=0)
+        x1, y1 = pts.max(axis=0)
+        # 랜드마크는 눈썹~턱 범위이므로 Haar 박스처럼 이마까지 덮도록 위로 넓힌 정사각형을 만든다
+        size = 1.15 * max(x1 - x0, y1 - y0)
+        cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0 - 0.1 * size
+        if not 1.0 / self.max_scale_change <= size / w <= self.max_scale_change:
+            return None
+        return _to_full_resolution((cx - size / 2.0, cy - size / 2.0, size, size), 1.0, gray.shape)
+
+    def detect(self, gray: np.ndarray, frame: Optional[np.ndarray] = None) -> Optional[Box]:
+        box = None
+        if self._box is not None and self._since_fallback < self.refresh_interval:
+            box = self._box_from_landmarks(gray, self._box)
+            self._since_fallback += 1
+        if box is None:
+            box = self.fallback.detect(gray, frame)
+            self._since_fallback = 0
+        self._box = box
+        return box
+
+
+DETECTORS: Dict[str, Callable[[], FaceDetector]] = {
+    HaarDetector.name: HaarDetector,
+    HogDetector.name: HogDetector,
+    YuNetDetector.name: YuNetDetector,
+    LandmarkRoiDetector.name: LandmarkRoiDetector,
+}
+
+
+def create_detector(name: str = FACE_DETECTOR) -> FaceDetector:
+    """이름으로 새 검출기 객체를 만든다."""
+    try:
+        factory = DETECTORS[name.lower()]
+    except KeyError:
+        raise ValueError(f"알 수 없는 얼굴 검출기: {name} (가능한 값: {', '.join(DETECTORS)})") from None
+    return factory()
@@ -0,0 +1,226 @@
+"""Per-video binary feature store.
+
+영상별 디렉터리에 특징 배열을 .npy 파일로 하나씩 저장한다. 배열마다 별도
+파일이므로 np.load(mmap_mode="r") 로 복사 없이 바로 열 수 있다.
+
+    features/<video_id>/
+        meta.json         fps, analysis_fps, 프레임 수, 해상도, blink 임계값 등
+        rgb.npy           (N, 3) float32  얼굴 ROI 평균 색 (R, G, B)
+        roi.npy           (N, 3, 3) float32  이마/왼뺨/오른뺨 평균 색 (R, G, B)
+        ear.npy           (N,)   float32  양쪽 눈 EAR 평균
+        blink.npy         (N,)   uint8    EAR < blink_thresh 플래그
+        landmarks.npy     (N, 68, 2) float32
+        boxes.npy         (N, 4) int32    얼굴 박스 (x, y, w, h)
+        timestamps.npy    (N,)   float64  프레임 시각 (초)
+        frame_valid.npy   (F,)   uint8    처리한 프레임별 얼굴 검출 여부 (합계 = N)
+        frame_timestamps.npy (F,) float64 처리한 프레임별 시각 (초)
+        motion.npy        (M,)   float32  second_interval 초 간격 랜드마크 이동량 (landmarks 트랙 기준)
+
+N 은 얼굴이 검출된 프레임 수이며, frame_* 와 motion 을 제외한 배열은 모두 같은 길이로
+정렬된다. F 는 분석한 전체 프레임 수이다.
+프레임은 analysis_fps 비율로 솎아낸 것이므로 시간 축은 timestamps 를 기준으로 한다.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+STORE_VERSION = 1
+
+# 배열 이름 → 저장 dtype
+ARRAY_DTYPES = {
+    "rgb": np.float32,
+    "roi": np.float32,
+    "ear": np.float32,
+    "blink": np.uint8,
+    "landmarks": np.float32,
+    "boxes": np.int32,
+    "timestamps": np.float64,
+    "frame_valid": np.uint8,
+    "frame_timestamps": np.float64,
+    "motion": np.float32,
+}
+
+
+@dataclass
+class FeatureSet:
+    """열린 특징 저장소. 배열은 읽기 전용 memmap 이다 (없는 배열은 None)."""
+
+    path: Path
+    meta: Dict[str, Any]
+    rgb: np.ndarray
+    blink: np.ndarray
+    ear: Optional[np.ndarray] = None
+    roi: Optional[np.ndarray] = None
+    landmarks: Optional[np.ndarray] = None
+    boxes: Optional[np.ndarray] = None
+    timestamps: Optional[np.ndarray] = None
+    frame_valid: Optional[np.ndarray] = None
+    frame_timestamps: Optional[np.ndarray] = None
+    motion: Optional[np.ndarray] = None
+
+    @property
+    def fps(self) -> float:
+        return self.meta["fps"]
+
+    def skin_rgb(self) -> np.ndarray:
+        """이마/뺨 ROI 평균 (N, 3). 이전 저장소나 ROI 가 한 번도 측정되지 않은 영상은 얼굴 박스 평균.
+
+        영역 구성이 프레임마다 바뀌면(3개 → 2개, 얼굴 박스 평균) 계단형 불연속이 생겨
+        CHROM/POS 가 신호로 받아들이므로, 비어 있는 ROI 샘플은 영역별로 시간축을 따라
+        보간해 채운 뒤 항상 같은 영역들의 평균을 사용한다. 한 번도 측정되지 않은 영역은
+        전 구간에서 제외한다.
+        """
+        if self.roi is None or not len(self.roi):
+            return np.asarray(self.rgb)
+        return combine_skin_rois(self.roi, self.timestamps, self.rgb)
+
+    @property
+    def analysis_fps(self) -> float:
+        """특징을 추출한 프레임 비율 (이전 저장소는 원본 fps)."""
+        return self.meta.get("analysis_fps") or self.meta["fps"]
+
+
+def combine_skin_rois(roi: np.ndarray, times: Optional[np.ndarray], fallback: np.ndarray) -> np.ndarray:
+    """영역별 ROI 평균 (N, R, 3) 을 하나의 RGB 트랙 (N, 3) 으로 합친다 (FeatureSet.skin_rgb).
+
+    비어 있는(NaN) 샘플은 영역별로 times 축을 따라 보간하고, 한 번도 측정되지 않은
+    영역은 제외한다. 측정된 영역이 없으면 fallback (얼굴 박스 평균) 을 반환한다.
+    실시간 세션(live)도 같은 규칙으로 합쳐 오프라인 결과와 같은 신호를 쓴다.
+    """
+    roi = np.array(roi, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64) if times is not None else None
+    if times is None or len(times) != len(roi):
+        times = np.arange(len(roi), dtype=np.float64)
+
+    filled = []
+    for region in np.moveaxis(roi, 1, 0):  # (N, 3) 영역별 RGB 트랙
+        valid = ~np.isnan(region[:, 0])
+        if not valid.any():
+            continue
+        if not valid.all():
+            region = np.column_stack(
+                [np.interp(times, times[valid], region[valid, c]) for c in range(region.shape[1])]
+            )
+        filled.append(region)
+    if not filled:
+        return np.asarray(fallback)
+    return np.mean(filled, axis=0).astype(np.float32)
+
+
+def write_features(path: Path, meta: Dict[str, Any], **arrays: np.ndarray) -> Path:
+    """특징 배열을 path 디렉터리에 저장한다.
+
+    임시 디렉터리에 모두 쓴 뒤 이름을 바꾸므로, 읽는 쪽은 완성된 저장소만 보게 된다.
+    """
+    unknown = set(arrays) - ARRAY_DTYPES.keys()
+    if unknown:
+        raise ValueError(f"Unknown feature arrays: {sorted(unknown)}")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}."))
+    try:
+        for name, array in arrays.items():
+            if array is None:
+                continue
+            np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(array, dtype=ARRAY_DTYPES[name]))
+
+        full_meta = {"version": STORE_VERSION, **meta}
+        full_meta["length"] = int(len(arrays["rgb"])) if "rgb" in arrays else 0
+        (tmp_dir / "meta.json").write_text(json.dumps(full_meta))
+
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp_dir, path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return path
+
+
+def open_features(path: Path) -> FeatureSet:
+    """저장소를 zero-copy(memmap)로 연다."""
+    path = Path(path)
+    meta_path = path / "meta.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"Feature store not found: {path}")
+    meta = json.loads(meta_path.read_text())
+
+    def _load(name: str) -> Optional[np.ndarray]:
+        file = path / f"{name}.npy"
+        return np.load(file, mmap_mode="r") if file.exists() else None
+
+    return FeatureSet(
+        path=path,
+        meta=meta,
+        rgb=_load("rgb"),
+        blink=_load("blink"),
+        ear=_load("ear"),
+        roi=_load("roi"),
+        landmarks=_load("landmarks"),
+        boxes=_load("boxes"),
+        timestamps=_load("timestamps"),
+        frame_valid=_load("frame_valid"),
+        frame_timestamps=_load("frame_timestamps"),
+        motion=_load("motion"),
+    )
+
+
+def convert_csvs(
+    rgb_csv_path: str,
+    out_path: Path,
+    blink_csv_path: Optional[str] = None,
+    fps: float = 15,
+) -> Path:
+    """기존 탭 구분 CSV 를 특징 저장소로 변환한다.
+
+    rgb_csv_path 가 4열이면 (test_data/eye_bpm_v1.csv 형식) 네 번째 열을 blink
+    플래그로 사용한다. 프레임 시각은 CSV 에 없으므로 fps 로부터 만든다.
+    """
+    data = np.loadtxt(rgb_csv_path, delimiter="\t", ndmin=2)
+    rgb = data[:, :3]
+
+    if blink_csv_path is not None:
+        blink = np.loadtxt(blink_csv_path, delimiter="\t", ndmin=1).reshape(-1)
+    elif data.shape[1] >= 4:
+        blink = data[:, 3]
+    else:
+        blink = np.zeros(len(rgb))
+
+    meta = {
+        "fps": fps,
+        "source": "csv",
+        "timestamps_synthetic": True,
+    }
+    return write_features(
+        out_path,
+        meta,
+        rgb=rgb,
+        blink=blink,
+        timestamps=np.arange(len(rgb)) / fps,
+    )
+
+
+# 단독 실행 시 CLI 기능 (CSV → 특징 저장소 변환)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CSV 특징 파일을 .npy 저장소로 변환")
+    parser.add_argument("--rgb_csv", required=True, help="RGB CSV 경로 (4열이면 마지막 열은 blink)")
+    parser.add_argument("--blink_csv", default=None, help="Blink CSV 경로")
+    parser.add_argument("--out", required=True, help="저장소 디렉터리")
+    parser.add_argument("--fps", type=float, default=15)
+    args = parser.parse_args()
+
+    out = convert_csvs(args.rgb_csv, Path(args.out), args.blink_csv, args.fps)
+    # benchmark CLI 와 같이 결과를 JSON 한 줄로 출력한다
+    report = {"features": str(out), "samples": len(open_features(out).rgb), "fps": args.fps}
+    print(json.dumps(report, ensure_ascii=False))
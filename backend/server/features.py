@@ -0,0 +1,418 @@
+"""Single-pass fused frame pipeline.
+
+영상을 한 번만 디코딩하면서 각 프레임을 여러 특징 추출기(ROI RGB 평균,
+이마/뺨 다중 ROI, 눈 종횡비, 랜드마크 움직임)에 전달하고 결과를 한꺼번에 반환한다.
+그레이 변환, 얼굴 검출(detectors 모듈), 랜드마크 예측처럼 여러 추출기가 공유하는
+프레임 단위 작업은 FrameContext 에서 한 번만 계산된다.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from . import metrics, models
+from .blinks import eye_aspect_ratio
+from .config import (
+    ANALYSIS_FPS,
+    DECODE_WIDTH,
+    FACE_DETECT_INTERVAL,
+    FACE_DETECTOR,
+    MOTION_DETECTOR,
+    PREFETCH_FRAMES,
+    ROI_SKIN_MASK,
+)
+from .detectors import FaceDetector, create_detector
+from .frame_source import FrameSampler, VideoMeta, open_frames, read_video_meta  # noqa: F401
+from .tracking import FaceTracker
+
+
+class FrameContext:
+    """한 프레임에 대한 공유 계산 캐시.
+
+    얼굴 박스는 detector 로 검출한다 (생략하면 RPPG_FACE_DETECTOR 검출기를 새로 만든다).
+    tracker 가 주어지면 매 프레임 검출하는 대신 FaceTracker 에서 얻는다.
+    """
+
+    __slots__ = (
+        "index", "timestamp", "frame", "tracker", "detector", "_gray", "_face", "_face_done", "_landmarks",
+    )
+
+    def __init__(
+        self,
+        index: int,
+        frame: np.ndarray,
+        timestamp: float = 0.0,
+        tracker: Optional[FaceTracker] = None,
+        detector: Optional[FaceDetector] = None,
+    ):
+        self.index = index
+        self.timestamp = timestamp  # 초 단위 프레임 시각
+        self.frame = frame
+        self.tracker = tracker
+        self.detector = detector
+        self._gray: Optional[np.ndarray] = None
+        self._face: Optional[Tuple[int, int, int, int]] = None
+        self._face_done = False
+        self._landmarks: Optional[np.ndarray] = None
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            # 그레이로 디코딩한 프레임은 변환하지 않는다 (open_frames(gray=True))
+            self._gray = self.frame if self.frame.ndim == 2 else cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def face(self) -> Optional[Tuple[int, int, int, int]]:
+        """얼굴 박스 (x, y, w, h). 없으면 None."""
+        if not self._face_done:
+            if self.tracker is not None:
+                self._face = self.tracker.update(self.gray, self.frame)
+            else:
+                if self.detector is None:
+                    self.detector = create_detector()
+                self._face = self.detector.detect(self.gray, self.frame)
+            self._face_done = True
+            if self._face is None:
+                metrics.inc("rppg_faces_missed_total")
+        return self._face
+
+    def landmarks(self) -> Optional[np.ndarray]:
+        """얼굴 박스 기준 68점 랜드마크 (68, 2). 얼굴이 없으면 None."""
+        if self._landmarks is None:
+            face = self.face()
+            if face is None:
+                return None
+            with metrics.timed("landmarks"):
+                self._landmarks = models.predict_landmarks(self.gray, face)
+        return self._landmarks
+
+
+class FeatureExtractor:
+    """프레임 단위 특징 추출기 기본 클래스."""
+
+    name = "feature"
+
+    def start(self, meta: VideoMeta) -> None:
+        """디코딩 시작 전에 한 번 호출된다."""
+
+    def warmup(self, ctx: FrameContext) -> None:
+        """구간 분할 추출에서 구간 시작 전 겹침 프레임마다 호출된다 (결과에 기록하지 않음)."""
+
+    def process(self, ctx: FrameContext) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------------------------
+# 추출기 구현
+# ---------------------------------------------------------------------------
+class RoiRgbExtractor(FeatureExtractor):
+    """얼굴 박스의 평균 색 (R, G, B). 얼굴이 검출된 프레임만 기록한다."""
+
+    name = "rgb"
+
+    def start(self, meta: VideoMeta) -> None:
+        self._means: List[np.ndarray] = []
+
+    @staticmethod
+    def measure(ctx: FrameContext) -> Optional[Tuple[float, float, float]]:
+        """한 프레임의 얼굴 박스 평균 (R, G, B). 얼굴이 없으면 None (실시간 세션도 사용)."""
+        face = ctx.face()
+        if face is None:
+            return None
+        x, y, w, h = face
+        face_roi = ctx.frame[y : y + h, x : x + w]
+
+        # RGB 평균 (cv2.mean 은 uint8 을 float64 배열로 복사하지 않고 바로 합산한다)
+        b, g, r, _ = cv2.mean(face_roi)
+        return r, g, b  # R,G,B 순으로 저장
+
+    def process(self, ctx: FrameContext) -> None:
+        means = self.measure(ctx)
+        if means is not None:
+            self._means.append(means)
+
+    def result(self) -> np.ndarray:
+        return np.array(self._means, dtype=np.float32).reshape(-1, 3)
+
+
+# 다중 ROI 순서 (MultiRoiExtractor 결과의 두 번째 축)
+ROI_NAMES = ("forehead", "left_cheek", "right_cheek")
+
+# YCrCb 피부색 범위 (Cr 133~173, Cb 77~127)
+_SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+_SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+
+def skin_regions(shape: np.ndarray, frame_shape: Tuple[int, ...]) -> np.ndarray:
+    """68점 랜드마크로 이마 / 왼뺨 / 오른뺨 사각형 (3, 4) [x0, y0, x1, y1] 을 만든다.
+
+    이마는 눈썹 안쪽 끝(19, 24) 사이에서 눈썹 위로 얼굴 높이의 1/5,
+    뺨은 코 옆(31 / 35)과 턱선(2 / 14) 사이에서 콧등(29)부터 코끝(33) 높이까지다.
+    좌우는 영상 기준이다.
+    """
+    pts = np.asarray(shape, dtype=np.float32)
+    brow_top = pts[17:27, 1].min()
+    forehead_h = 0.2 * (pts[8, 1] - brow_top)
+    cheek_top, cheek_bottom = pts[29, 1], pts[33, 1]
+    # 뺨 가장자리는 턱선/코에서 안쪽으로 1/5 만큼 물려 배경과 코 그림자를 피한다
+    left_in = 0.2 * (pts[31, 0] - pts[2, 0])
+    right_in = 0.2 * (pts[14, 0] - pts[35, 0])
+    boxes = np.array(
+        [
+            [pts[19, 0], brow_top - forehead_h, pts[24, 0], brow_top - 0.25 * forehead_h],
+            [pts[2, 0] + left_in, cheek_top, pts[31, 0] - left_in, cheek_bottom],
+            [pts[35, 0] + right_in, cheek_top, pts[14, 0] - right_in, cheek_bottom],
+        ]
+    )
+    height, width = frame_shape[:2]
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height)
+    return np.rint(boxes).astype(np.int32)
+
+
+class MultiRoiExtractor(FeatureExtractor):
+    """이마 / 왼뺨 / 오른뺨 영역의 평균 색 (N, 3, 3) [R, G, B].
+
+    EAR 계산에 쓰는 랜드마크를 그대로 사용하므로 추가 예측 비용이 없고,
+    얼굴 박스 전체 대신 피부 영역만 평균해 머리카락/배경이 섞이지 않는다.
+    skin_mask 가 True 면 각 영역 안에서도 YCrCb 피부색 화소만 평균한다.
+    영역이 비어 있거나 피부색 화소가 없으면 NaN 을 기록한다 (영역 전체 평균으로
+    대신하면 같은 트랙 안에서 측정 방식이 바뀌어 계단형 불연속이 생기므로,
+    빈 샘플은 FeatureSet.skin_rgb 가 시간축으로 보간한다).
+    """
+
+    name = "roi"
+
+    def __init__(self, skin_mask: bool = ROI_SKIN_MASK):
+        self.skin_mask = skin_mask
+
+    def start(self, meta: VideoMeta) -> None:
+        self._means: List[np.ndarray] = []
+
+    def measure(self, ctx: FrameContext) -> Optional[np.ndarray]:
+        """한 프레임의 영역별 평균 (3, 3). 랜드마크가 없으면 None (실시간 세션도 사용)."""
+        shape = ctx.landmarks()
+        if shape is None:
+            return None
+        means = np.full((len(ROI_NAMES), 3), np.nan, dtype=np.float32)
+        with metrics.timed("roi"):
+            for i, (x0, y0, x1, y1) in enumerate(skin_regions(shape, ctx.frame.shape)):
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                region = ctx.frame[y0:y1, x0:x1]
+                mask = None
+                if self.skin_mask:
+                    mask = cv2.inRange(cv2.cvtColor(region, cv2.COLOR_BGR2YCrCb), _SKIN_LOWER, _SKIN_UPPER)
+                    if not cv2.countNonZero(mask):
+                        continue
+                b, g, r, _ = cv2.mean(region, mask=mask)
+                means[i] = (r, g, b)
+        return means
+
+    def process(self, ctx: FrameContext) -> None:
+        means = self.measure(ctx)
+        if means is not None:
+            self._means.append(means)
+
+    def result(self) -> np.ndarray:
+        return np.array(self._means, dtype=np.float32).reshape(-1, len(ROI_NAMES), 3)
+
+
+class EyeAspectRatioExtractor(FeatureExtractor):
+    """양쪽 눈 EAR 평균. 얼굴이 검출된 프레임만 기록한다 (RoiRgbExtractor 와 정렬)."""
+
+    name = "ear"
+
+    def start(self, meta: VideoMeta) -> None:
+        self._ears: List[float] = []
+
+    def process(self, ctx: FrameContext) -> None:
+        shape = ctx.landmarks()
+        if shape is None:
+            return
+        with metrics.timed("ear"):
+            self._ears.append(float(eye_aspect_ratio(shape)))
+
+    def result(self) -> np.ndarray:
+        return np.array(self._ears, dtype=float)
+
+
+class LandmarkExtractor(FeatureExtractor):
+    """프레임별 랜드마크 트랙을 기록한다.
+
+    얼굴이 검출된 프레임(N)의 68점 랜드마크, 얼굴 박스, 프레임 시각과 함께
+    처리한 모든 프레임(F)의 시각과 얼굴 검출 여부(valid)를 남긴다.
+    깜빡임/움직임 지표는 영상을 다시 디코딩하지 않고 이 트랙에서 다시 계산할 수 있다
+    (reanalysis 모듈). 랜드마크는 FrameContext 에서 EAR 계산과 공유되므로 추가 예측 비용이 없다.
+    디코딩 시 축소한 경우에도 랜드마크와 박스는 원본 해상도 좌표로 기록한다.
+    """
+
+    name = "landmarks"
+
+    def start(self, meta: VideoMeta) -> None:
+        self._scale = meta.scale
+        self._landmarks: List[np.ndarray] = []
+        self._boxes: List[Tuple[int, int, int, int]] = []
+        self._timestamps: List[float] = []
+        self._frame_valid: List[bool] = []
+        self._frame_timestamps: List[float] = []
+
+    def process(self, ctx: FrameContext) -> None:
+        shape = ctx.landmarks()
+        self._frame_timestamps.append(ctx.timestamp)
+        self._frame_valid.append(shape is not None)
+        if shape is None:
+            return
+        self._landmarks.append(shape.astype(np.float32))
+        self._boxes.append(ctx.face())
+        self._timestamps.append(ctx.timestamp)
+
+    def result(self) -> Dict[str, np.ndarray]:
+        return {
+            "landmarks": (np.array(self._landmarks, dtype=np.float32) / self._scale).reshape(-1, 68, 2),
+            "boxes": np.rint(np.array(self._boxes, dtype=np.float64) / self._scale)
+            .astype(np.int32)
+            .reshape(-1, 4),
+            "timestamps": np.array(self._timestamps, dtype=np.float64),
+            "frame_valid": np.array(self._frame_valid, dtype=np.uint8),
+            "frame_timestamps": np.array(self._frame_timestamps, dtype=np.float64),
+        }
+
+
+class MotionExtractor(FeatureExtractor):
+    """second_interval 초마다 얼굴 랜드마크 평균 이동량을 기록한다.
+
+    얼굴은 ROI 추출과 별도로 detector_name 검출기(기본 RPPG_MOTION_DETECTOR, dlib HOG)로
+    샘플 프레임에서만 검출한다. 이동량은 원본 해상도 픽셀 단위이다.
+    second_interval 은 1초 미만(예: 0.25)도 가능하다. 움직임만 필요하면
+    run_extractors(target_fps=1 / second_interval) 로 샘플 프레임만 디코딩한다
+    (analyzer.analyze_motion 의 sparse 모드).
+    """
+
+    name = "motion"
+
+    def __init__(self, second_interval: float = 1, detector_name: str = MOTION_DETECTOR):
+        self.second_interval = second_interval
+        self.detector_name = detector_name
+
+    def start(self, meta: VideoMeta) -> None:
+        self._detector = create_detector(self.detector_name)
+        self._scale = meta.scale
+        # 프레임 번호 대신 프레임 시각으로 간격을 정한다 (프레임 솎아내기와 무관하게 간격마다 1회)
+        self._tolerance = 0.5 / meta.fps if meta.fps > 0 else 0.0
+        self._next_time = 0.0
+        self._prev: Optional[np.ndarray] = None
+        self._motions: List[float] = []
+
+    def _detect_landmarks(self, ctx: FrameContext) -> Optional[np.ndarray]:
+        face = self._detector.detect(ctx.gray, ctx.frame)
+        if face is None:
+            return None
+        # 랜드마크는 검출용 축소 영상이 아닌 프레임 해상도에서 예측한다
+        with metrics.timed("landmarks"):
+            return models.predict_landmarks(ctx.gray, face)
+
+    def warmup(self, ctx: FrameContext) -> None:
+        # 구간 첫 샘플의 이동량이 순차 실행과 같은 간격이 되도록, 겹침 구간에서
+        # second_interval 격자에 놓인 프레임만 검출해 구간 시작 직전 격자 프레임의 랜드마크를 남긴다
+        # (구간 경계는 segments.plan_segments 가 second_interval 배수로 맞춘다)
+        if ctx.timestamp + self._tolerance < self._next_time:
+            return
+        self._next_time = (np.floor((ctx.timestamp + self._tolerance) / self.second_interval) + 1) * self.second_interval
+        landmarks = self._detect_landmarks(ctx)
+        if landmarks is not None:
+            self._prev = landmarks
+
+    def process(self, ctx: FrameContext) -> None:
+        if ctx.timestamp + self._tolerance < self._next_time:
+            return
+        self._next_time += self.second_interval
+        if self._next_time <= ctx.timestamp:  # 긴 공백 뒤에는 현재 시각 기준으로 다시 맞춘다
+            self._next_time = ctx.timestamp + self.second_interval
+
+        landmarks = self._detect_landmarks(ctx)
+        if landmarks is not None:
+            if self._prev is not None:
+                self._motions.append(float(np.linalg.norm(landmarks - self._prev, axis=1).mean()) / self._scale)
+            else:
+                self._motions.append(0)
+            self._prev = landmarks
+        else:
+            self._motions.append(0)
+
+    def result(self) -> List[float]:
+        return self._motions
+
+
+# ---------------------------------------------------------------------------
+# 디코딩 루프
+# ---------------------------------------------------------------------------
+def run_extractors(
+    video_path: str,
+    extractors: Sequence[FeatureExtractor],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    detect_interval: int = FACE_DETECT_INTERVAL,
+    target_fps: float = ANALYSIS_FPS,
+    start_time: float = 0.0,
+    end_time: Optional[float] = None,
+    overlap: float = 0.0,
+    prefetch: int = PREFETCH_FRAMES,
+    detector_name: str = FACE_DETECTOR,
+    decode_width: int = DECODE_WIDTH,
+    gray: bool = False,
+) -> Dict[str, Any]:
+    """영상을 한 번 디코딩하며 모든 추출기를 실행하고 {name: result} 를 반환한다.
+
+    반환값의 "meta" 키에는 VideoMeta 가 담긴다. on_progress 가 주어지면 처리한 프레임마다
+    (원본 기준 읽은 프레임 수, CAP_PROP_FRAME_COUNT) 로 호출한다. detect_interval 이 1 보다
+    크면 얼굴은 그 간격으로만 검출하고 사이 프레임은 FaceTracker 로 추적한다.
+    검출에는 detector_name 검출기(detectors 모듈)를 사용한다.
+
+    target_fps 가 원본 fps 보다 낮으면 필요한 프레임만 cap.retrieve() 로 디코딩하고
+    나머지는 cap.grab() 으로 건너뛴다. 추출기는 실제 프레임 시각(ctx.timestamp)을 받는다.
+
+    start_time / end_time (초) 을 주면 [start_time, end_time) 구간만 처리한다
+    (segments 모듈의 구간 병렬 추출). start_time 앞 overlap 초는 추적기와
+    추출기 상태를 맞추는 데만 쓰고(FeatureExtractor.warmup) 결과에는 넣지 않는다.
+
+    prefetch 가 0 보다 크면 별도 스레드가 그만큼의 프레임을 미리 디코딩해 둔다
+    (frame_source.PrefetchingFrameSource). 추출기는 ctx.frame 을 보관하면 안 된다.
+
+    디코딩은 frame_source.open_source 가 고른 백엔드(PyAV 또는 OpenCV)로 하며,
+    decode_width 가 0 보다 크면 그 폭으로 축소된 프레임을 받는다 (meta.scale).
+    gray 가 True 이면 ctx.frame 은 그레이 영상이다 (움직임 분석처럼 색이 필요 없을 때).
+    """
+    source = open_frames(
+        video_path, target_fps, max(start_time - overlap, 0.0), end_time, prefetch, decode_width, gray
+    )
+    meta = source.meta
+    detector = create_detector(detector_name)
+    tracker = FaceTracker(detector, detect_interval) if detect_interval > 1 else None
+
+    try:
+        with source:
+            for extractor in extractors:
+                extractor.start(meta)
+            for index, t, frame in source:
+                ctx = FrameContext(index, frame, t, tracker, detector)
+                if t < start_time:
+                    if tracker is not None:
+                        ctx.face()  # 추적기 상태만 갱신
+                    for extractor in extractors:
+                        extractor.warmup(ctx)
+                else:
+                    for extractor in extractors:
+                        extractor.process(ctx)
+                if on_progress is not None:
+                    on_progress(index + 1, meta.frame_count)
+    finally:
+        metrics.inc("rppg_frames_processed_total", source.decoded)
+
+    results: Dict[str, Any] = {extractor.name: extractor.result() for extractor in extractors}
+    results["meta"] = meta
+    return results
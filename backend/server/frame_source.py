@@ -0,0 +1,436 @@
+"""Frame sources for the feature pipeline.
+
+VideoFrameSource 는 cv2.VideoCapture 로 영상을 읽으면서 분석 fps 에 필요한
+프레임만 디코딩한다 (나머지는 grab() 으로 건너뜀). PyAVFrameSource 는 PyAV(FFmpeg)
+코덱 스레드로 디코딩하고, 필요한 프레임만 swscale 한 번으로 축소 + BGR/그레이 변환한다
+(1080p/60 영상에서 단일 스레드 디코딩과 원본 해상도 BGR 변환 비용을 줄임). PyAV 가
+설치되어 있지 않거나 영상을 열지 못하면 OpenCV 로 대체한다 (open_frames).
+
+width 를 주면 프레임은 그 폭으로 축소되어 전달되고 VideoMeta.scale 에 축척이 담긴다
+(디코딩 프레임 좌표 = 원본 좌표 * scale). PrefetchingFrameSource 는
+같은 읽기를 백그라운드 스레드에서 수행해 디코딩(FFmpeg, GIL 해제)과 검출/랜드마크
+계산이 겹치도록 한다. 디코딩 결과는 미리 할당한 고정 크기 링 버퍼의 배열에
+retrieve() 로 직접 쓰므로 프레임마다 새 배열을 만들지 않으며, 버퍼가 가득 차면
+읽기 스레드가 기다린다 (backpressure).
+
+소비자가 받는 프레임 배열은 다음 프레임을 요청할 때까지만 유효하다.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from . import metrics
+from .config import ANALYSIS_FPS, DECODE_BACKEND, DECODE_THREADS, DECODE_WIDTH, PREFETCH_FRAMES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VideoMeta:
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+    analysis_fps: float = 0.0  # 추출기에 전달하는 프레임 비율 (0 이면 모든 프레임)
+    scale: float = 1.0  # 디코딩한 프레임 폭 / 원본 폭 (디코딩 시 축소)
+
+
+def read_video_meta(cap: cv2.VideoCapture) -> VideoMeta:
+    return VideoMeta(
+        fps=cap.get(cv2.CAP_PROP_FPS),
+        frame_count=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    )
+
+
+def decoded_size(width: int, height: int, target_width: int) -> Tuple[int, int, float]:
+    """target_width 폭으로 축소한 (폭, 높이, 축척). 0 이거나 원본보다 크면 원본 크기."""
+    if target_width <= 0 or target_width >= width:
+        return width, height, 1.0
+    new_width = target_width - target_width % 2  # 코덱/스케일러가 짝수 크기를 선호
+    new_height = int(round(height * new_width / width / 2.0)) * 2
+    return new_width, new_height, new_width / float(width)
+
+
+class FrameSampler:
+    """프레임 시각을 보고 target_fps 에 필요한 프레임만 고른다.
+
+    Parameters
+    ----------
+    target_fps : float
+        남길 프레임 비율. 0 이거나 원본 fps 이상이면 모든 프레임을 남긴다.
+    source_fps : float
+        컨테이너가 알려주는 원본 fps. 시각 비교 허용 오차와 시각 보정에 사용한다.
+    start_time : float
+        중간부터 읽을 때의 시작 시각 (초). 남길 프레임 시각을 0 초 기준 격자(k / target_fps)에
+        맞춰, 구간별로 나누어 읽어도 처음부터 읽을 때와 같은 프레임을 고른다.
+    """
+
+    def __init__(self, target_fps: float, source_fps: float, start_time: float = 0.0):
+        self.keep_all = target_fps <= 0 or (source_fps > 0 and target_fps >= source_fps)
+        self.period = 1.0 / target_fps if target_fps > 0 else 0.0
+        self.source_period = 1.0 / source_fps if source_fps > 0 else 0.0
+        self._next_time = math.ceil(start_time / self.period - 1e-6) * self.period if self.period > 0 else 0.0
+        self._last_time: Optional[float] = None
+
+    def timestamp(self, position_msec: float) -> float:
+        """CAP_PROP_POS_MSEC 값을 초 단위 시각으로 바꾼다.
+
+        일부 백엔드는 항상 0 이나 감소하는 값을 돌려주므로, 그 경우 직전 시각에 원본
+        프레임 간격을 더한 값을 사용한다 (시각은 항상 증가).
+        """
+        t = position_msec / 1000.0
+        if self._last_time is not None and t <= self._last_time:
+            t = self._last_time + (self.source_period or 1e-3)
+        self._last_time = t
+        return t
+
+    def keep(self, t: float) -> bool:
+        if self.keep_all:
+            return True
+        # 부동소수점 오차로 예정 시각의 프레임을 놓치지 않도록 원본 프레임 간격의 절반을 허용
+        if t + 0.5 * self.source_period < self._next_time:
+            return False
+        self._next_time += self.period
+        if self._next_time <= t:  # 시각이 건너뛴 경우 현재 프레임 기준으로 다시 맞춘다
+            self._next_time = t + self.period
+        return True
+
+
+# (원본 프레임 번호, 초 단위 시각, BGR 프레임)
+FrameItem = Tuple[int, float, np.ndarray]
+
+
+class VideoFrameSource:
+    """분석에 필요한 프레임만 순서대로 디코딩하는 프레임 소스 (OpenCV).
+
+    Parameters
+    ----------
+    video_path : str
+    target_fps : float
+        남길 프레임 비율 (FrameSampler 참고).
+    start_time : float
+        이 시각(초)으로 이동한 뒤 읽기 시작한다.
+    end_time : float, optional
+        이 시각 이후의 프레임은 읽지 않는다.
+    width : int
+        프레임을 이 폭으로 축소해 전달한다 (0 이면 원본 해상도).
+    gray : bool
+        BGR 대신 그레이 프레임을 전달한다.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        target_fps: float = ANALYSIS_FPS,
+        start_time: float = 0.0,
+        end_time: Optional[float] = None,
+        width: int = 0,
+        gray: bool = False,
+    ):
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"영상 파일을 열 수 없습니다: {video_path}")
+
+        self.meta = read_video_meta(self.cap)
+        self.sampler = FrameSampler(target_fps, self.meta.fps, start_time)
+        self.meta.analysis_fps = 0.0 if self.sampler.keep_all else float(target_fps)
+        out_width, out_height, self.meta.scale = decoded_size(self.meta.width, self.meta.height, width)
+        self.size = (out_width, out_height)
+        self.gray = gray
+        self.frame_shape: Tuple[int, ...] = (out_height, out_width) if gray else (out_height, out_width, 3)
+        self._full: Optional[np.ndarray] = None  # 축소/변환 전 원본 프레임 (재사용)
+        self.end_time = end_time
+        self.index = 0  # 다음에 읽을 원본 프레임 번호
+        self.decoded = 0
+        if start_time > 0:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000.0)
+            self.index = int(round(start_time * self.meta.fps))
+
+    def read(self, out: Optional[np.ndarray] = None) -> Optional[FrameItem]:
+        """다음으로 남길 프레임을 디코딩한다 (out 이 주어지면 그 배열에 쓴다). 끝이면 None."""
+        with metrics.timed("decode"):
+            while self.cap.grab():
+                index = self.index
+                self.index += 1
+                t = self.sampler.timestamp(self.cap.get(cv2.CAP_PROP_POS_MSEC))
+                if self.end_time is not None and t >= self.end_time:
+                    return None
+                if not self.sampler.keep(t):
+                    continue
+                converted = self.gray or self.meta.scale != 1.0
+                ret, frame = self.cap.retrieve(self._full if converted else out)
+                if not ret:
+                    return None
+                if converted:
+                    self._full = frame
+                    frame = self._convert(frame, out)
+                self.decoded += 1
+                return index, t, frame
+        return None
+
+    def _convert(self, frame: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        if self.meta.scale != 1.0:
+            frame = cv2.resize(frame, self.size, None if self.gray else out, interpolation=cv2.INTER_AREA)
+        if self.gray:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, out)
+        return frame
+
+    def __iter__(self) -> Iterator[FrameItem]:
+        while True:
+            item = self.read()
+            if item is None:
+                return
+            yield item
+
+    def close(self) -> None:
+        self.cap.release()
+
+    def __enter__(self) -> "VideoFrameSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PyAVFrameSource:
+    """PyAV(FFmpeg) 로 디코딩하는 프레임 소스. 인자는 VideoFrameSource 와 같다.
+
+    코덱 스레드(frame/slice threading)로 디코딩하며, 남길 프레임만 YUV 에서 바로
+    축소된 BGR/그레이 배열로 변환한다 (건너뛰는 프레임은 변환하지 않음).
+    PyAV 는 기존 배열에 변환 결과를 쓰는 API 가 없으므로 read() 의 out 은 쓰지 않고
+    to_ndarray() 가 만든 배열을 그대로 돌려준다 (추가 복사 없음).
+    프레임 시각은 스트림 시작 PTS 를 빼 0 부터 시작하도록 맞춘다 (OpenCV 백엔드와 같은 기준).
+
+    Parameters
+    ----------
+    threads : int
+        코덱 스레드 수 (0 이면 FFmpeg 가 CPU 수에 맞춰 정함).
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        target_fps: float = ANALYSIS_FPS,
+        start_time: float = 0.0,
+        end_time: Optional[float] = None,
+        width: int = 0,
+        gray: bool = False,
+        threads: int = DECODE_THREADS,
+    ):
+        import av
+
+        self.container = av.open(video_path)
+        try:
+            self.stream = self.container.streams.video[0]
+        except IndexError:
+            self.container.close()
+            raise FileNotFoundError(f"영상 스트림이 없습니다: {video_path}") from None
+        self.stream.thread_type = "AUTO"
+        if threads > 0:
+            self.stream.codec_context.thread_count = threads
+
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        fps = float(rate) if rate else 0.0
+        frame_count = self.stream.frames
+        if not frame_count and self.stream.duration is not None and fps > 0:
+            frame_count = int(float(self.stream.duration * self.stream.time_base) * fps)
+        context = self.stream.codec_context
+        self.meta = VideoMeta(fps=fps, frame_count=frame_count, width=context.width, height=context.height)
+        self.sampler = FrameSampler(target_fps, fps, start_time)
+        self.meta.analysis_fps = 0.0 if self.sampler.keep_all else float(target_fps)
+        out_width, out_height, self.meta.scale = decoded_size(context.width, context.height, width)
+        self.size = (out_width, out_height)
+        self.format = "gray" if gray else "bgr24"
+        self.frame_shape: Tuple[int, ...] = (out_height, out_width) if gray else (out_height, out_width, 3)
+
+        # 시작 PTS 가 0 이 아닌 스트림(MPEG-TS, 잘라낸 MP4 등)도 시각이 0 부터 시작하도록 뺀다
+        start_pts = self.stream.start_time
+        self._time_offset = float(start_pts * self.stream.time_base) if start_pts is not None else 0.0
+        self.start_time = start_time
+        self.end_time = end_time
+        self.index = 0
+        self.decoded = 0
+        if start_time > 0:
+            # 직전 키프레임으로 이동한 뒤 start_time 앞 프레임은 변환 없이 버린다
+            target = (start_time + self._time_offset) / self.stream.time_base
+            self.container.seek(int(target), stream=self.stream, backward=True)
+        self._frames = self.container.decode(self.stream)
+
+    def read(self, out: Optional[np.ndarray] = None) -> Optional[FrameItem]:
+        """다음으로 남길 프레임을 디코딩한다 (out 은 쓰지 않는다, 클래스 설명 참고). 끝이면 None."""
+        with metrics.timed("decode"):
+            for frame in self._frames:
+                position = (frame.time - self._time_offset) * 1000.0 if frame.time is not None else 0.0
+                t = self.sampler.timestamp(position)
+                if t + 0.5 * self.sampler.source_period < self.start_time:
+                    continue
+                # 탐색 후에는 읽은 프레임 수를 알 수 없으므로 시각에서 원본 프레임 번호를 구한다
+                index = int(round(t * self.meta.fps)) if self.meta.fps > 0 else self.index
+                self.index = index + 1
+                if self.end_time is not None and t >= self.end_time:
+                    return None
+                if not self.sampler.keep(t):
+                    continue
+                width, height = self.size
+                image = frame.to_ndarray(format=self.format, width=width, height=height)
+                self.decoded += 1
+                return index, t, image
+        return None
+
+    def __iter__(self) -> Iterator[FrameItem]:
+        while True:
+            item = self.read()
+            if item is None:
+                return
+            yield item
+
+    def close(self) -> None:
+        self.container.close()
+
+    def __enter__(self) -> "PyAVFrameSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PrefetchingFrameSource:
+    """VideoFrameSource 를 백그라운드 스레드에서 읽어 링 버퍼로 전달한다.
+
+    Parameters
+    ----------
+    source : VideoFrameSource or PyAVFrameSource
+    buffer_size : int
+        미리 디코딩해 둘 최대 프레임 수 (링 버퍼 슬롯 수).
+    """
+
+    _END = object()
+
+    def __init__(self, source, buffer_size: int = PREFETCH_FRAMES):
+        self.source = source
+        self.meta = source.meta
+        shape = source.frame_shape
+        # 슬롯 하나는 소비자가 사용 중일 수 있으므로 buffer_size + 1 개를 할당한다
+        self._ring: List[np.ndarray] = [np.empty(shape, dtype=np.uint8) for _ in range(max(1, buffer_size) + 1)]
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(len(self._ring)):
+            self._free.put(slot)
+        self._filled: "queue.Queue[object]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._reader, name="frame-prefetch", daemon=True)
+        self._thread.start()
+
+    @property
+    def decoded(self) -> int:
+        return self.source.decoded
+
+    def _take_free_slot(self) -> Optional[int]:
+        # 버퍼가 가득 차면 소비자가 슬롯을 돌려줄 때까지 기다린다 (중단 요청은 주기적으로 확인)
+        while not self._stop.is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _reader(self) -> None:
+        try:
+            while True:
+                slot = self._take_free_slot()
+                if slot is None:
+                    return
+                item = self.source.read(self._ring[slot])
+                if item is None:
+                    return
+                index, t, frame = item
+                if frame is not self._ring[slot]:
+                    # 해상도가 메타데이터와 다르면 retrieve 가 새 배열을 만든다 → 슬롯을 교체
+                    # (PyAV 소스는 항상 새 배열을 돌려주므로 복사 없이 슬롯만 바꾼다)
+                    self._ring[slot] = frame
+                self._filled.put((slot, index, t))
+        except BaseException as exc:  # 소비자 쪽에서 다시 발생시킨다
+            self._filled.put(exc)
+        finally:
+            self._filled.put(self._END)
+
+    def __iter__(self) -> Iterator[FrameItem]:
+        previous: Optional[int] = None
+        try:
+            while True:
+                item = self._filled.get()
+                if previous is not None:
+                    self._free.put(previous)  # 직전 프레임은 더 이상 사용하지 않는다
+                    previous = None
+                if item is self._END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                slot, index, t = item
+                previous = slot
+                yield index, t, self._ring[slot]
+        finally:
+            if previous is not None:
+                self._free.put(previous)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.source.close()
+
+    def __enter__(self) -> "PrefetchingFrameSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_source(
+    video_path: str,
+    target_fps: float = ANALYSIS_FPS,
+    start_time: float = 0.0,
+    end_time: Optional[float] = None,
+    width: int = DECODE_WIDTH,
+    gray: bool = False,
+    backend: str = DECODE_BACKEND,
+):
+    """backend (auto, pyav, opencv) 에 맞는 프레임 소스를 연다.
+
+    auto 는 PyAV 가 설치되어 있으면 PyAV, 아니면 OpenCV 를 사용한다. PyAV 로 열지
+    못한 영상도 OpenCV 로 다시 시도한다.
+    """
+    backend = backend.lower()
+    if backend in ("auto", "pyav"):
+        try:
+            return PyAVFrameSource(video_path, target_fps, start_time, end_time, width, gray)
+        except ImportError:
+            if backend == "pyav":
+                logger.warning("PyAV 가 설치되어 있지 않아 OpenCV 로 디코딩합니다")
+        except Exception as exc:  # PyAV 가 지원하지 않는 컨테이너/코덱
+            logger.warning("PyAV 로 영상을 열지 못해 OpenCV 로 디코딩합니다: %s (%s)", video_path, exc)
+    elif backend != "opencv":
+        raise ValueError(f"알 수 없는 디코딩 백엔드: {backend} (auto, pyav, opencv)")
+    return VideoFrameSource(video_path, target_fps, start_time, end_time, width, gray)
+
+
+def open_frames(
+    video_path: str,
+    target_fps: float = ANALYSIS_FPS,
+    start_time: float = 0.0,
+    end_time: Optional[float] = None,
+    prefetch: int = PREFETCH_FRAMES,
+    width: int = DECODE_WIDTH,
+    gray: bool = False,
+):
+    """open_source 로 연 소스를 prefetch 가 0 보다 크면 PrefetchingFrameSource 로 감싼다."""
+    source = open_source(video_path, target_fps, start_time, end_time, width, gray)
+    return PrefetchingFrameSource(source, prefetch) if prefetch > 0 else source
@@ -0,0 +1,179 @@
+"""HTTP caching helpers for immutable per-video artifacts.
+
+video_id 는 영상 해시와 분석 버전으로 정해지므로 같은 URL 의 내용은 바뀌지 않는다.
+따라서 응답에 강한 ETag 와 Cache-Control: immutable 을 붙이고, 조건부 요청(304)과
+바이트 범위 요청(206)을 처리한다. 텍스트 형식은 gzip 으로 미리 압축한 변형을
+Accept-Encoding 에 따라 제공할 수 있다.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+
+from .results import gzip_bytes
+
+# 1년 + immutable: 브라우저/앱은 재검증 없이 캐시를 사용한다
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# gzip 이 의미 있는 (이미 압축되지 않은) 형식
+COMPRESSIBLE_TYPES = ("application/json", "image/svg+xml", "text/")
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def make_etag(*parts: object) -> str:
+    """내용을 유일하게 결정하는 값들로 강한 ETag 를 만든다 (본문을 읽지 않아도 됨)."""
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match 는 약한 비교를 사용한다 (W/ 접두사 무시)
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def is_compressible(media_type: str) -> bool:
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def accepts_gzip(request: Request) -> bool:
+    accept = request.headers.get("accept-encoding", "")
+    for item in accept.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """단일 바이트 범위 헤더를 (start, end) 포함 구간으로 변환한다.
+
+    형식이 다르거나 여러 범위면 None (전체 응답), 만족할 수 없는 범위면 ValueError.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # 마지막 N 바이트
+        length = int(last)
+        if length == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def _representation(
+    request: Request, etag: str, media_type: str, headers: Optional[Dict[str, str]]
+) -> Tuple[str, bool, Dict[str, str]]:
+    """gzip 변형 여부에 따라 (ETag, gzip 사용 여부, 공통 헤더) 를 정한다."""
+    use_gzip = is_compressible(media_type) and accepts_gzip(request)
+    if use_gzip:
+        etag = etag[:-1] + '-gz"'
+
+    base_headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE,
+        "Accept-Ranges": "bytes",
+        **(headers or {}),
+    }
+    if is_compressible(media_type):
+        base_headers["Vary"] = "Accept-Encoding"
+    if use_gzip:
+        base_headers["Content-Encoding"] = "gzip"
+    return etag, use_gzip, base_headers
+
+
+def _not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Content-Encoding"})
+
+
+def not_modified(
+    request: Request, etag: str, media_type: str, headers: Optional[Dict[str, str]] = None
+) -> Optional[Response]:
+    """본문을 만들기 전에 304 로 응답할 수 있으면 그 응답을, 아니면 None 을 반환한다."""
+    etag, _, base_headers = _representation(request, etag, media_type, headers)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(base_headers)
+    return None
+
+
+def cached_response(
+    request: Request,
+    etag: str,
+    media_type: str,
+    load: Callable[[], bytes],
+    headers: Optional[Dict[str, str]] = None,
+    load_gzip: Optional[Callable[[], bytes]] = None,
+) -> Response:
+    """ETag / 304 / Range / gzip 변형을 처리한 응답을 만든다.
+
+    Parameters
+    ----------
+    etag : str
+        make_etag 로 만든 원본 표현의 ETag. gzip 변형은 "-gz" 가 붙은 별도 ETag 를 쓴다.
+    load : Callable[[], bytes]
+        본문을 돌려주는 함수. 304 응답이면 호출되지 않는다.
+    load_gzip : Callable[[], bytes], optional
+        미리 압축된 본문. 없고 압축 가능한 형식이면 load() 결과를 압축한다.
+    """
+    etag, use_gzip, base_headers = _representation(request, etag, media_type, headers)
+
+    # 조건부 요청: 클라이언트 사본이 최신이면 본문 없이 304
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(base_headers)
+
+    if use_gzip:
+        body = load_gzip() if load_gzip is not None else gzip_bytes(load())
+    else:
+        body = load()
+
+    # 범위 요청 (If-Range 가 현재 ETag 와 다르면 전체 응답)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, len(body))
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**base_headers, "Content-Range": f"bytes */{len(body)}"},
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            return Response(
+                content=body[start : end + 1],
+                status_code=206,
+                media_type=media_type,
+                headers={**base_headers, "Content-Range": f"bytes {start}-{end}/{len(body)}"},
+            )
+
+    return Response(content=body, media_type=media_type, headers=base_headers)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles 응답에 Cache-Control: immutable 을 추가한다.
+
+    ETag / 304 처리는 StaticFiles 가 이미 수행한다. 파일명이 video_id 를 포함하므로
+    같은 경로의 내용은 바뀌지 않는다.
+    """
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", IMMUTABLE)
+        return response
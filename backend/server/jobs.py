@@ -0,0 +1,227 @@
+"""Bounded process-pool job manager for CPU-heavy video analysis."""
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """대기 중인 작업 수가 상한을 넘었을 때 발생한다."""
+
+
+class WorkerPoolError(RuntimeError):
+    """워커 프로세스 풀이 깨져(초기화 실패, 워커 강제 종료 등) 작업을 받을 수 없을 때 발생한다."""
+
+
+@dataclass
+class Job:
+    job_id: str
+    video_id: str
+    future: Future
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return JobStatus.RUNNING if self.future.running() else JobStatus.QUEUED
+        if self.future.cancelled() or self.future.exception() is not None:
+            return JobStatus.FAILED
+        return JobStatus.DONE
+
+    @property
+    def result(self) -> Optional[Dict[str, Any]]:
+        if self.status != JobStatus.DONE:
+            return None
+        return self.future.result()
+
+    @property
+    def error(self) -> Optional[str]:
+        if not self.future.done():
+            return None
+        if self.future.cancelled():
+            return "cancelled"
+        exc = self.future.exception()
+        return str(exc) if exc is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "video_id": self.video_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """분석 작업을 프로세스 풀에서 실행하고 상태를 추적한다.
+
+    Parameters
+    ----------
+    max_workers : int
+        동시에 실행할 워커 프로세스 수
+    max_pending : int
+        완료되지 않은 작업(대기 + 실행)의 최대 개수
+    history_limit : int
+        메모리에 보관할 작업 기록 수 (오래된 완료 작업부터 제거)
+    initializer : Callable, optional
+        각 워커 프로세스가 시작될 때 한 번 실행할 함수 (모델 프리로드 등)
+    restart_interval : float
+        깨진 풀을 다시 만드는 최소 간격 (초). 초기화가 계속 실패할 때 요청마다
+        프로세스를 띄우지 않도록 한다.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        history_limit: int = 1000,
+        initializer: Optional[Callable[[], Any]] = None,
+        restart_interval: float = 30.0,
+    ):
+        self._max_workers = max_workers
+        self._initializer = initializer
+        self._restart_interval = restart_interval
+        self._executor = self._create_executor()
+        self._restarted_at = time.monotonic()
+        self._restarts = 0
+        self._pool_error: Optional[str] = None
+        self._warmup_fn: Optional[Callable[[], Dict[str, Any]]] = None
+        self._warmup: List[Future] = []
+        self._max_pending = max_pending
+        self._history_limit = history_limit
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # fork 는 uvicorn 스레드 상태를 복제하므로 spawn 을 사용한다
+        return ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self._initializer,
+        )
+
+    def _restart_locked(self, reason: str) -> None:
+        """깨진 풀을 버리고 새 풀을 만든 뒤 warm-up 을 다시 시작한다 (restart_interval 마다 최대 한 번)."""
+        self._pool_error = reason
+        if time.monotonic() - self._restarted_at < self._restart_interval:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+        self._restarted_at = time.monotonic()
+        self._restarts += 1
+        if self._warmup_fn is not None:
+            self._warmup = [self._executor.submit(self._warmup_fn) for _ in range(self._max_workers)]
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args: Any, video_id: str) -> Job:
+        """작업을 대기열에 넣고 즉시 Job 을 반환한다.
+
+        풀이 깨져 있으면 풀을 다시 만들고 WorkerPoolError 를 발생시킨다 (호출자는 503).
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.future.done())
+            if pending >= self._max_pending:
+                raise QueueFullError(f"Too many pending jobs ({pending})")
+
+            try:
+                future = self._executor.submit(fn, *args)
+            except BrokenProcessPool as exc:
+                self._restart_locked(str(exc))
+                raise WorkerPoolError(f"Analysis workers unavailable, restarting: {exc}") from exc
+            job = Job(job_id=uuid.uuid4().hex, video_id=video_id, future=future)
+            self._jobs[job.job_id] = job
+            self._prune_locked()
+
+        future.add_done_callback(lambda _f, j=job: setattr(j, "finished_at", time.time()))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find_active(self, video_id: str) -> Optional[Job]:
+        """같은 video_id 로 아직 끝나지 않은 작업을 찾는다 (중복 업로드 병합용)."""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job.video_id == video_id and not job.future.done():
+                    return job
+        return None
+
+    def add_completed(self, video_id: str, result: Dict[str, Any]) -> Job:
+        """이미 결과가 있는 영상(캐시 적중)을 완료된 작업으로 등록한다."""
+        future: Future = Future()
+        future.set_result(result)
+        job = Job(job_id=uuid.uuid4().hex, video_id=video_id, future=future)
+        job.finished_at = job.created_at
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune_locked()
+        return job
+
+    def warm_up(self, fn: Callable[[], Dict[str, Any]]) -> None:
+        """워커 수만큼 fn 을 제출해 모든 워커 프로세스를 미리 띄운다.
+
+        fn 은 {"pid": 워커 pid, "loaded": 초기화 완료 여부} 를 반환해야 한다.
+        """
+        with self._lock:
+            self._warmup_fn = fn
+            self._warmup = [self._executor.submit(fn) for _ in range(self._max_workers)]
+
+    def readiness(self) -> Dict[str, Any]:
+        """워커 준비 상태. 서로 다른 워커 max_workers 개가 모두 초기화를 마쳤으면 ready 이다.
+
+        한 워커가 warm-up 작업을 여러 개 처리했을 수 있으므로 pid 로 워커를 센다.
+        모든 warm-up 작업이 끝났는데 확인된 워커가 모자라면 남은 수만큼 다시 제출한다.
+        풀이 깨졌으면 (초기화 실패 등) 풀을 다시 만든다.
+        """
+        with self._lock:
+            done = [f for f in self._warmup if f.done()]
+            errors = [str(f.exception()) for f in done if f.exception() is not None]
+            pids = {f.result()["pid"] for f in done if f.exception() is None and f.result().get("loaded")}
+            if any(isinstance(f.exception(), BrokenProcessPool) for f in done):
+                self._restart_locked(errors[0])
+            elif self._warmup_fn is not None and len(done) == len(self._warmup) and not errors:
+                missing = self._max_workers - len(pids)
+                if missing > 0:
+                    self._warmup += [self._executor.submit(self._warmup_fn) for _ in range(missing)]
+            if not errors and len(pids) >= self._max_workers:
+                self._pool_error = None
+            return {
+                "ready": len(pids) >= self._max_workers and not errors,
+                "workers": self._max_workers,
+                "warmed": len(pids),
+                "errors": errors,
+                "restarts": self._restarts,
+                "pool_error": self._pool_error,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _prune_locked(self) -> None:
+        # 완료된 작업만 오래된 순으로 제거한다
+        excess = len(self._jobs) - self._history_limit
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, job in self._jobs.items() if job.future.done()][:excess]:
+            del self._jobs[job_id]
@@ -0,0 +1,232 @@
+"""Incremental real-time analysis for the /ws/live WebSocket.
+
+클라이언트가 보내는 프레임(JPEG) 또는 미리 계산한 ROI RGB 평균을 세션별
+슬라이딩 윈도우에 쌓고, 1초마다 BPM / 깜빡임 / 움직임 값을 갱신한다.
+BPM 은 오프라인 분석과 같은 AdvancedRPPGAnalyzer 의 CHROM/POS 를 사용한다.
+JPEG 프레임은 오프라인 추출기(RoiRgbExtractor, MultiRoiExtractor)로 측정하고,
+RPPG_USE_SKIN_ROI 가 켜져 있으면 오프라인과 같은 규칙(feature_store.combine_skin_rois)으로
+이마/뺨 피부 영역 평균을 신호로 쓴다.
+
+메시지 형식
+-----------
+binary   JPEG 프레임 한 장. 시각은 서버 수신 시각을 사용한다.
+text     JSON 샘플 {"t": 초, "rgb": [R, G, B], "ear": float, "landmarks": [[x, y] * 68]}
+         ("rgb" 외에는 모두 생략 가능. "t" 가 없으면 서버 수신 시각)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import analyzer
+from .blinks import BlinkDetector, eye_aspect_ratio
+from .config import USE_SKIN_ROI
+from .feature_store import combine_skin_rois
+
+# 여러 세션이 공유하는 검출 모델(Haar, YuNet, shape predictor)은 동시에 호출하지 않는다
+_detect_lock = threading.Lock()
+
+# 유효한 BPM 범위 (오프라인 시간별 BPM 의 이상치 필터와 동일)
+BPM_RANGE = (40.0, 180.0)
+
+
+def estimate_bpm(times: np.ndarray, rgb: np.ndarray, fps: float) -> Tuple[Optional[float], Optional[str]]:
+    """불규칙한 시각의 RGB 샘플을 fps 로 재샘플링한 뒤 BPM 과 사용한 알고리즘을 반환한다."""
+    grid = np.arange(times[0], times[-1], 1.0 / fps)
+    if len(grid) < 2 * fps:  # CHROM/POS 슬라이딩 윈도우(2초)보다 짧으면 계산 불가
+        return None, None
+    resampled = np.column_stack([np.interp(grid, times, rgb[:, c]) for c in range(3)])
+
+    rppg = analyzer.AdvancedRPPGAnalyzer(fps=int(round(fps)))
+    signal, algorithm = rppg.select_signal(resampled)
+    if signal is None or len(signal) == 0:
+        return None, None
+
+    bpm = float(rppg.calculate_fft_bpm(signal))
+    if not BPM_RANGE[0] <= bpm <= BPM_RANGE[1]:
+        return None, algorithm
+    return bpm, algorithm
+
+
+class LiveSession:
+    """WebSocket 연결 하나의 분석 상태.
+
+    Parameters
+    ----------
+    fps : float
+        BPM 계산 시 재샘플링할 샘플링 주파수
+    window_seconds : float
+        BPM 계산에 사용할 최근 구간 길이
+    min_seconds : float
+        첫 BPM 을 내보내기 위해 필요한 최소 구간 길이
+    blink_thresh : float
+        EAR 이 이 값 아래로 내려가는 순간을 깜빡임 한 번으로 센다
+        (다시 뜬 것으로 보려면 BLINK_HYSTERESIS 만큼 더 올라가야 한다)
+    max_fps : float
+        JPEG 프레임 처리 상한. 더 빨리 도착한 프레임은 버린다
+    """
+
+    def __init__(
+        self,
+        fps: float = 15,
+        window_seconds: float = 10.0,
+        min_seconds: float = 5.0,
+        blink_thresh: float = 0.25,
+        max_fps: float = 15,
+    ):
+        self.fps = fps
+        self.window_seconds = window_seconds
+        self.min_seconds = min_seconds
+        self.blink_thresh = blink_thresh
+        self.min_frame_gap = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.started = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._times: Deque[float] = deque()
+        self._rgb: Deque[Sequence[float]] = deque()
+        self._roi: Deque[np.ndarray] = deque()  # 이마/뺨 평균 (3, 3). JSON 샘플은 NaN
+        self._blinks = BlinkDetector(blink_thresh)
+        self._blink_times: Deque[float] = deque()  # 최근 60초 깜빡임 시각
+        self._landmarks: Optional[np.ndarray] = None  # 가장 최근 랜드마크
+        self._prev_landmarks: Optional[np.ndarray] = None  # 직전 갱신 시점의 랜드마크
+        self._last_frame_at = float("-inf")
+        self._detector: Any = None  # JPEG 모드에서 처음 쓸 때 만드는 얼굴 검출기
+        self._extractors: Any = None  # JPEG 모드의 (RoiRgbExtractor, MultiRoiExtractor)
+        self.frames = 0
+        self.frames_dropped = 0
+        self.faces_missed = 0
+
+    @property
+    def blink_total(self) -> int:
+        return self._blinks.total
+
+    def now(self) -> float:
+        return time.monotonic() - self.started
+
+    # 입력 ------------------------------------------------------------------
+    def add_sample(
+        self,
+        rgb: Sequence[float],
+        t: Optional[float] = None,
+        ear: Optional[float] = None,
+        landmarks: Optional[np.ndarray] = None,
+        roi: Optional[np.ndarray] = None,
+    ) -> None:
+        """ROI 평균 색 (R, G, B) 샘플 하나를 추가한다 (roi: 이마/뺨 영역별 평균 (3, 3))."""
+        if len(rgb) != 3:
+            raise ValueError("rgb must have 3 values (R, G, B)")
+        t = self.now() if t is None else float(t)
+        with self._lock:
+            if self._times and t <= self._times[-1]:
+                raise ValueError("timestamps must increase")
+            self._times.append(t)
+            self._rgb.append([float(v) for v in rgb])
+            self._roi.append(np.full((3, 3), np.nan, dtype=np.float32) if roi is None else roi)
+            while self._times and self._times[0] < t - self.window_seconds:
+                self._times.popleft()
+                self._rgb.popleft()
+                self._roi.popleft()
+
+            if ear is not None and self._blinks.update(t, float(ear)) == "onset":
+                self._blink_times.append(t)
+            if landmarks is not None:
+                self._landmarks = np.asarray(landmarks, dtype=np.float32).reshape(68, 2)
+
+    def add_message(self, message: Dict[str, Any]) -> None:
+        """JSON 샘플 메시지를 추가한다."""
+        if "rgb" not in message:
+            raise ValueError("missing 'rgb'")
+        self.add_sample(
+            message["rgb"],
+            t=message.get("t"),
+            ear=message.get("ear"),
+            landmarks=message.get("landmarks"),
+        )
+
+    def add_jpeg(self, data: bytes) -> bool:
+        """JPEG 프레임에서 ROI 평균/EAR/랜드마크를 계산해 추가한다.
+
+        처리 상한보다 빨리 도착했거나 얼굴이 없으면 False 를 반환한다.
+        """
+        # cv2/dlib 는 JPEG 모드에서만 필요하다
+        import cv2
+
+        from .detectors import create_detector
+        from .features import FrameContext, MultiRoiExtractor, RoiRgbExtractor
+
+        t = self.now()
+        if t - self._last_frame_at < self.min_frame_gap:
+            self.frames_dropped += 1
+            return False
+        self._last_frame_at = t
+
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("invalid JPEG frame")
+        self.frames += 1
+
+        if self._detector is None:
+            self._detector = create_detector()  # 세션마다 별도 (landmark 검출기는 상태를 가짐)
+            self._extractors = (RoiRgbExtractor(), MultiRoiExtractor())
+        ctx = FrameContext(self.frames, frame, t, detector=self._detector)
+        with _detect_lock:
+            face = ctx.face()
+            shape = ctx.landmarks() if face is not None else None
+        if face is None:
+            self.faces_missed += 1
+            return False
+
+        # 오프라인 분석과 같은 측정 (얼굴 박스 cv2.mean, 이마/뺨 피부 마스크 평균)
+        face_rgb, multi_roi = self._extractors
+        rgb = face_rgb.measure(ctx)
+        roi = multi_roi.measure(ctx) if shape is not None else None
+        ear = float(eye_aspect_ratio(shape)) if shape is not None else None
+        self.add_sample(rgb, t=t, ear=ear, landmarks=shape, roi=roi)
+        return True
+
+    # 출력 ------------------------------------------------------------------
+    def update(self) -> Dict[str, Any]:
+        """현재 윈도우로 BPM / 깜빡임 / 움직임 값을 계산한다 (1초마다 호출)."""
+        t = self.now()
+        with self._lock:
+            times = np.array(self._times, dtype=np.float64)
+            rgb = np.array(self._rgb, dtype=np.float64).reshape(-1, 3)
+            roi = np.array(self._roi, dtype=np.float64).reshape(-1, 3, 3)
+            # 샘플 시각은 클라이언트 기준일 수 있으므로 마지막 샘플 시각으로 자른다
+            latest = self._times[-1] if self._times else t
+            while self._blink_times and self._blink_times[0] < latest - 60.0:
+                self._blink_times.popleft()
+            blinks_last_minute = len(self._blink_times)
+            landmarks, prev = self._landmarks, self._prev_landmarks
+            self._prev_landmarks = landmarks
+
+        bpm, algorithm = None, None
+        if len(times) > 1 and times[-1] - times[0] >= self.min_seconds:
+            # 오프라인(reanalysis.score_features)과 같은 신호: 피부 ROI 가 측정되었으면 그 평균
+            signal = combine_skin_rois(roi, times, rgb) if USE_SKIN_ROI else rgb
+            bpm, algorithm = estimate_bpm(times, np.asarray(signal, dtype=np.float64), self.fps)
+
+        # 직전 갱신 이후 랜드마크 평균 이동량 (오프라인 움직임 분석과 같은 정의)
+        motion = None
+        if landmarks is not None and prev is not None:
+            motion = float(np.linalg.norm(landmarks - prev, axis=1).mean())
+
+        return {
+            "type": "update",
+            "t": round(t, 3),
+            "bpm": bpm,
+            "algorithm": algorithm,
+            "window_seconds": float(times[-1] - times[0]) if len(times) > 1 else 0.0,
+            "samples": int(len(times)),
+            "blink_total": self.blink_total,
+            "last_blink_duration": self._blinks.last_duration,
+            "blinks_last_minute": blinks_last_minute,
+            "motion": motion,
+            "frames": self.frames,
+            "frames_dropped": self.frames_dropped,
+            "faces_missed": self.faces_missed,
+        }
@@ -0,0 +1,231 @@
+"""Per-stage timing and counters with Prometheus text exposition.
+
+각 프로세스는 자체 레지스트리에 단계별 소요 시간(히스토그램)과 카운터를 기록한다.
+분석 워커 프로세스는 작업이 끝날 때마다 누적값을 METRICS_DIR/<pid>.json 으로
+덮어쓰고, API 프로세스는 /metrics 요청 시 자신의 값과 워커 파일들을 합산해 내보낸다.
+
+단계(stage) 이름
+----------------
+decode, haar, yunet, landmark_roi, track, landmarks, roi, hog, ear, chrom_pos, bpm_metrics, plot, file_io, analysis
+"""
+from __future__ import annotations
+
+import bisect
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from .config import METRICS_DIR
+
+# 프레임 단위(~ms) 와 영상 단위(~분) 단계를 모두 담을 수 있는 버킷 (초)
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+# 이름 → (종류, 설명, 라벨 이름)
+FAMILIES: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "rppg_stage_seconds": ("histogram", "Time spent in each analysis stage.", ("stage",)),
+    "rppg_frames_processed_total": ("counter", "Decoded frames passed to the feature extractors.", ()),
+    "rppg_faces_missed_total": ("counter", "Frames in which no face box was detected or tracked.", ()),
+    "rppg_legacy_fallbacks_total": ("counter", "Analyses that fell back to the legacy rPPG path.", ()),
+    "rppg_analyses_total": ("counter", "Finished video analyses by status.", ("status",)),
+}
+
+
+class Registry:
+    """스레드 안전한 카운터/히스토그램 모음."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name → {라벨 값 튜플: 값}
+        self._counters: Dict[str, Dict[Tuple[str, ...], float]] = {}
+        # name → {라벨 값 튜플: [버킷별 개수..., +Inf 개수, 합계]}
+        self._histograms: Dict[str, Dict[Tuple[str, ...], List[float]]] = {}
+
+    @staticmethod
+    def _labels(name: str, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[label]) for label in FAMILIES[name][2])
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = self._labels(name, labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = self._labels(name, labels)
+        slot = bisect.bisect_left(BUCKETS, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0.0] * (len(BUCKETS) + 2)
+            counts[slot] += 1
+            counts[-1] += value
+
+    # 직렬화 / 합산 -----------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": {
+                    name: [[list(key), value] for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [[list(key), list(counts)] for key, counts in series.items()]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            for name, rows in snapshot.get("counters", {}).items():
+                series = self._counters.setdefault(name, {})
+                for key, value in rows:
+                    series[tuple(key)] = series.get(tuple(key), 0.0) + value
+            for name, rows in snapshot.get("histograms", {}).items():
+                series = self._histograms.setdefault(name, {})
+                for key, counts in rows:
+                    current = series.setdefault(tuple(key), [0.0] * len(counts))
+                    for i, count in enumerate(counts):
+                        current[i] += count
+
+    def render(self) -> str:
+        """Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text, label_names) in FAMILIES.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for key, value in sorted(self._counters.get(name, {}).items()):
+                        lines.append(f"{name}{_format_labels(label_names, key)} {value:g}")
+                    continue
+                for key, counts in sorted(self._histograms.get(name, {}).items()):
+                    cumulative = 0.0
+                    for bound, count in zip(BUCKETS + (float("inf"),), counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        labels = _format_labels(label_names + ("le",), key + (le,))
+                        lines.append(f"{name}_bucket{labels} {cumulative:g}")
+                    labels = _format_labels(label_names, key)
+                    lines.append(f"{name}_sum{labels} {counts[-1]:.6f}")
+                    lines.append(f"{name}_count{labels} {cumulative:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# 프로세스 전역 레지스트리
+REGISTRY = Registry()
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    REGISTRY.inc(name, value, **labels)
+
+
+class timed:
+    """with timed("haar"): ... 블록의 소요 시간을 rppg_stage_seconds 에 기록한다."""
+
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "timed":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        REGISTRY.observe("rppg_stage_seconds", time.perf_counter() - self._start, stage=self.stage)
+
+
+def instrument(owner: Any, attr: str, stage: str) -> None:
+    """owner.attr(함수/메서드)를 호출할 때마다 stage 시간으로 기록하도록 감싼다.
+
+    rppg_bpm 처럼 서버 패키지를 모르는 모듈을 수정하지 않고 계측할 때 사용한다.
+    """
+    fn = getattr(owner, attr)
+    if getattr(fn, "_metrics_stage", None) is not None:
+        return
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with timed(stage):
+            return fn(*args, **kwargs)
+
+    wrapper._metrics_stage = stage  # type: ignore[attr-defined]
+    wrapper.__name__ = getattr(fn, "__name__", attr)
+    wrapper.__doc__ = fn.__doc__
+    setattr(owner, attr, wrapper)
+
+
+def count_calls(owner: Any, attr: str, name: str) -> None:
+    """owner.attr 가 호출될 때마다 카운터 name 을 1 증가시킨다."""
+    fn = getattr(owner, attr)
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        inc(name)
+        return fn(*args, **kwargs)
+
+    wrapper.__name__ = getattr(fn, "__name__", attr)
+    wrapper.__doc__ = fn.__doc__
+    setattr(owner, attr, wrapper)
+
+
+# ---------------------------------------------------------------------------
+# 다중 프로세스 집계
+# ---------------------------------------------------------------------------
+def dump() -> None:
+    """현재 프로세스의 누적값을 METRICS_DIR/<pid>.json 에 기록한다 (워커에서 호출)."""
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    path = METRICS_DIR / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(REGISTRY.snapshot()))
+    os.replace(tmp, path)
+
+
+def reset_dir() -> None:
+    """이전 실행의 워커 파일을 지운다 (워커를 띄우기 전 API 프로세스에서 호출)."""
+    if METRICS_DIR.exists():
+        for path in METRICS_DIR.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+def render_all() -> str:
+    """이 프로세스와 모든 워커의 값을 합산한 Prometheus 텍스트."""
+    combined = Registry()
+    combined.merge(REGISTRY.snapshot())
+    if METRICS_DIR.exists():
+        for path in METRICS_DIR.glob("*.json"):
+            try:
+                combined.merge(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # 기록 중인 파일은 다음 수집 때 반영
+    return combined.render()
+
+
+# ---------------------------------------------------------------------------
+# 요청 단위 프로파일링
+# ---------------------------------------------------------------------------
+def run_profiled(profile_path: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """fn(*args) 를 cProfile 로 실행하고 .prof 와 누적 시간 상위 50개 요약(.txt)을 저장한다."""
+    profile_path = Path(profile_path)
+    profile_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args)
+    finally:
+        profiler.dump_stats(str(profile_path))
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(50)
+        profile_path.with_suffix(".txt").write_text(summary.getvalue())
@@ -0,0 +1,126 @@
+"""Process-wide registry for face detection / landmark models.
+
+Haar cascade, dlib HOG 검출기, YuNet(선택), 68점 shape predictor(~100MB)는 프로세스당
+한 번만 로드하고 이후 요청에서 재사용한다. 워커 프로세스는 시작 시 warm_up() 으로
+미리 로드해 첫 요청이 역직렬화 비용을 치르지 않도록 한다.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from itertools import chain
+from pathlib import Path
+from typing import Any, Callable, Dict, Sequence
+
+import numpy as np
+
+from .config import FACE_DETECTOR, MOTION_DETECTOR, YUNET_MODEL, YUNET_SCORE_THRESHOLD
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+
+_lock = threading.Lock()
+_models: Dict[str, Any] = {}
+_load_seconds: Dict[str, float] = {}
+
+
+def predictor_path() -> str:
+    # 모델 불러오기
+    predictor_local = BASE_DIR / "Eye_detection" / "shape_predictor_68_face_landmarks.dat"
+    return str(predictor_local) if predictor_local.exists() else "shape_predictor_68_face_landmarks.dat"
+
+
+def _get(name: str, loader: Callable[[], Any]) -> Any:
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _lock:
+        # 다른 스레드가 먼저 로드했을 수 있으므로 다시 확인
+        model = _models.get(name)
+        if model is None:
+            start = time.perf_counter()
+            model = loader()
+            _load_seconds[name] = time.perf_counter() - start
+            _models[name] = model
+    return model
+
+
+# cv2 / dlib 는 모델을 처음 로드할 때 임포트한다 (API 프로세스 시작 시간 단축)
+def _load_face_cascade():
+    import cv2
+
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+
+def _load_face_detector():
+    import dlib
+
+    return dlib.get_frontal_face_detector()
+
+
+def _load_yunet():
+    import cv2
+
+    if not YUNET_MODEL.exists():
+        raise FileNotFoundError(f"YuNet 모델 파일이 없습니다: {YUNET_MODEL} (RPPG_YUNET_MODEL 로 지정)")
+    # 입력 크기는 검출할 때마다 setInputSize 로 맞춘다
+    return cv2.FaceDetectorYN.create(str(YUNET_MODEL), "", (320, 320), YUNET_SCORE_THRESHOLD)
+
+
+def _load_shape_predictor():
+    import dlib
+
+    return dlib.shape_predictor(predictor_path())
+
+
+def get_face_cascade():
+    """Haar frontal face cascade (cv2.CascadeClassifier)."""
+    return _get("face_cascade", _load_face_cascade)
+
+
+def get_face_detector():
+    """dlib HOG frontal face detector."""
+    return _get("face_detector", _load_face_detector)
+
+
+def get_yunet():
+    """OpenCV DNN YuNet face detector (cv2.FaceDetectorYN)."""
+    return _get("yunet", _load_yunet)
+
+
+def get_shape_predictor():
+    """dlib 68-point shape predictor."""
+    return _get("shape_predictor", _load_shape_predictor)
+
+
+def shape_to_array(shape: Any) -> np.ndarray:
+    """dlib full_object_detection 을 (N, 2) float32 좌표 배열로 바꾼다.
+
+    점마다 shape.part(i) 로 Python 객체를 만드는 대신 shape.parts() 를 한 번 받아
+    np.fromiter 로 한 번에 채운다.
+    """
+    parts = shape.parts()
+    coords = np.fromiter(chain.from_iterable((p.x, p.y) for p in parts), dtype=np.float32, count=2 * len(parts))
+    return coords.reshape(-1, 2)
+
+
+def predict_landmarks(gray: np.ndarray, box: Sequence[int]) -> np.ndarray:
+    """얼굴 박스 (x, y, w, h) 안의 68점 랜드마크 (68, 2) float32."""
+    import dlib
+
+    x, y, w, h = (int(v) for v in box)
+    return shape_to_array(get_shape_predictor()(gray, dlib.rectangle(x, y, x + w, y + h)))
+
+
+def warm_up() -> Dict[str, float]:
+    """모든 모델을 미리 로드하고 모델별 로드 시간(초)을 반환한다."""
+    get_face_cascade()
+    get_face_detector()
+    get_shape_predictor()
+    if "yunet" in (FACE_DETECTOR.lower(), MOTION_DETECTOR.lower()):
+        get_yunet()
+    return dict(_load_seconds)
+
+
+def is_loaded() -> bool:
+    return {"face_cascade", "face_detector", "shape_predictor"} <= _models.keys()
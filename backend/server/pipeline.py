@@ -0,0 +1,133 @@
+"""Full analysis pipeline for one uploaded video.
+
+워커 프로세스에서 실행되므로 인자와 반환값은 모두 pickle 가능한 값이어야 한다.
+"""
+from __future__ import annotations
+
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import analyzer, feature_store, metrics, models, reanalysis, rendering
+from .config import (
+    FEATURE_DIR,
+    PRECOMPRESS_RESULTS,
+    PROGRESS_INTERVAL,
+    STATIC_DIR,
+    RESULT_CACHE_DIR,
+    RESULTS_DIR,
+    RENDER_PLOTS,
+    RETENTION_DB,
+    RETAIN_RAW_VIDEOS,
+)
+from .progress import ProgressReporter
+from .result_cache import ResultCache
+from .results import ResultStore
+from .retention import MANIFEST, RAW, RetentionIndex
+
+
+def init_worker() -> Dict[str, float]:
+    """워커 프로세스 초기화. 분석 모듈(cv2/dlib/scipy)을 임포트하고 모델을 로드한다.
+
+    API 프로세스는 이 모듈들을 임포트하지 않으므로 첫 작업 전에 워커에서 미리 읽어 둔다.
+    단계별 소요 시간(초)을 반환한다.
+    """
+    start = time.perf_counter()
+    analyzer.preload()
+    return {"imports": time.perf_counter() - start, **models.warm_up()}
+
+
+def worker_status() -> Dict[str, object]:
+    """warm-up 용: 이 워커의 pid 와 init_worker 가 모델을 모두 로드했는지."""
+    return {"pid": os.getpid(), "loaded": models.is_loaded()}
+
+
+@lru_cache(maxsize=None)
+def _retention_index() -> RetentionIndex:
+    return RetentionIndex(RETENTION_DB)
+
+
+def run_analysis(video_path: str, video_id: str, digest: Optional[str] = None) -> Dict[str, str]:
+    """영상을 분석하고 결과 URL 을 담은 응답 데이터를 반환한다.
+
+    digest(영상 sha256)가 주어지면 성공한 결과를 결과 캐시에 등록한다.
+    진행 상황은 /progress/{video_id} 로 전달되도록 progress 파일에 기록하고,
+    작업이 끝나면 이 워커의 누적 메트릭을 기록해 /metrics 에서 합산되게 한다.
+    """
+    status = "failed"
+    progress = ProgressReporter(video_id, min_interval=PROGRESS_INTERVAL)
+    try:
+        with metrics.timed("analysis"):
+            result = _run_analysis(video_path, video_id, digest, progress)
+        status = "done"
+        progress.finish(result=result)
+        return result
+    except Exception as e:
+        progress.finish(error=str(e) or type(e).__name__)
+        raise
+    finally:
+        _retention_index().record(video_id, "progress", [progress.path])
+        metrics.inc("rppg_analyses_total", status=status)
+        metrics.dump()
+
+
+def _run_analysis(
+    video_path: str,
+    video_id: str,
+    digest: Optional[str],
+    progress: ProgressReporter,
+) -> Dict[str, str]:
+    feature_dir = FEATURE_DIR / video_id
+    index = _retention_index()
+    # 분석이 실패해도 원본은 보관 기간(TTL)이 지나면 정리된다
+    index.record(video_id, RAW, [Path(video_path)])
+
+    # 1. 영상을 한 번만 디코딩해 RGB/Blink/Landmark/Motion 특징을 저장소에 기록
+    progress.stage("features")
+    analyzer.extract_all_features(
+        video_path=str(video_path),
+        feature_dir=str(feature_dir),
+        on_progress=progress.frames,
+    )
+    index.record(video_id, "features", [feature_dir])
+    features = feature_store.open_features(feature_dir)
+
+    # 특징을 추출했으므로 원본 영상은 더 이상 필요 없다
+    if not RETAIN_RAW_VIDEOS:
+        Path(video_path).unlink(missing_ok=True)
+        index.forget(video_id, RAW)
+
+    # 2. BPM 및 Blink 시계열 계산 → 수치 결과 저장
+    progress.stage("rppg")
+    results = reanalysis.score_features(video_id, features)
+    progress.stage("results")
+    with metrics.timed("file_io"):
+        results_paths = ResultStore(RESULTS_DIR, precompress=PRECOMPRESS_RESULTS).save(results)
+    index.record(video_id, "results", results_paths)
+
+    # 3. (선택) 그래프 미리 렌더링. 기본적으로는 /download 요청 시 렌더링한다.
+    if RENDER_PLOTS:
+        progress.stage("plots")
+        for image_type in rendering.IMAGE_TYPES:
+            image = rendering.render_plot(results, image_type, width=3600, height=1500, dpi=300)
+            img_path = STATIC_DIR / f"{video_id}_{image_type}.png"
+            with metrics.timed("file_io"):
+                img_path.write_bytes(image)
+            index.record(video_id, "plot", [img_path])
+
+    result = {
+        "video_id": video_id,
+        "results_url": f"/results/{video_id}",
+        "bpm_plot_url": f"/download/bpm/{video_id}",
+        "blink_plot_url": f"/download/blink/{video_id}",
+        "motion_plot_url": f"/download/motion/{video_id}",
+    }
+
+    if digest is not None:
+        cache = ResultCache(RESULT_CACHE_DIR)
+        with metrics.timed("file_io"):
+            cache.put(video_id, digest, result)
+        index.record(video_id, MANIFEST, [cache.path(video_id)])
+    return result
@@ -0,0 +1,106 @@
+"""Analysis progress reporting shared between worker and API processes.
+
+워커는 PROGRESS_DIR/<video_id>.json 에 현재 단계, 디코딩한 프레임 수,
+예상 남은 시간을 기록하고(최소 간격으로 제한), API 프로세스는 /progress/{video_id}
+SSE 스트림에서 이 파일이 바뀔 때마다 클라이언트로 전달한다.
+
+단계(stage)
+-----------
+queued → features → rppg → results → plots → done | failed
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import PROGRESS_DIR
+
+# 종료 상태
+FINAL_STAGES = ("done", "failed")
+
+
+def progress_path(video_id: str) -> Path:
+    return PROGRESS_DIR / f"{video_id}.json"
+
+
+def read_progress(video_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(progress_path(video_id).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+class ProgressReporter:
+    """한 영상의 분석 진행 상황을 기록한다.
+
+    Parameters
+    ----------
+    video_id : str
+    min_interval : float
+        프레임 진행률을 파일에 쓰는 최소 간격 (초). 단계 변경은 항상 즉시 기록한다.
+    """
+
+    def __init__(self, video_id: str, min_interval: float = 0.5):
+        self.video_id = video_id
+        self.min_interval = min_interval
+        self.path = progress_path(video_id)
+        self.started_at = time.time()
+        self._state: Dict[str, Any] = {
+            "video_id": video_id,
+            "stage": "queued",
+            "frames_done": 0,
+            "frames_total": 0,
+            "percent": None,
+            "eta_seconds": None,
+            "started_at": self.started_at,
+            "pid": os.getpid(),
+        }
+        self._stage_started = time.monotonic()
+        self._last_write = 0.0
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return dict(self._state)
+
+    def stage(self, name: str, **extra: Any) -> None:
+        """새 단계로 넘어간다."""
+        self._stage_started = time.monotonic()
+        self._state.update(stage=name, eta_seconds=None, **extra)
+        self._write()
+
+    def frames(self, done: int, total: int) -> None:
+        """프레임 루프에서 매 프레임 호출한다 (파일 기록은 min_interval 마다)."""
+        now = time.monotonic()
+        if now - self._last_write < self.min_interval and done != total:
+            return
+
+        self._state["frames_done"] = done
+        self._state["frames_total"] = total
+        if total > 0:
+            self._state["percent"] = round(100.0 * min(done, total) / total, 1)
+            elapsed = now - self._stage_started
+            if done > 0 and elapsed > 0:
+                # 지금까지의 디코딩 속도로 남은 프레임 시간을 추정
+                self._state["eta_seconds"] = round(max(total - done, 0) * elapsed / done, 1)
+        self._write()
+
+    def finish(self, error: Optional[str] = None, **extra: Any) -> None:
+        self._state.update(
+            stage="failed" if error else "done",
+            eta_seconds=0.0 if not error else None,
+            error=error,
+            finished_at=time.time(),
+            **extra,
+        )
+        self._write()
+
+    def _write(self) -> None:
+        self._last_write = time.monotonic()
+        self._state["updated_at"] = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._state))
+        os.replace(tmp, self.path)
@@ -0,0 +1,178 @@
+"""Re-scoring stored feature tracks without decoding the video again.
+
+특징 저장소의 프레임별 EAR / 랜드마크 트랙으로 깜빡임(blinks 모듈)과 움직임 지표를 다시 계산한다.
+blink_thresh, second_interval, stability_threshold 는 rPPG(BPM) 계산에 영향을 주지 않으므로
+저장된 결과 문서(results/{video_id}.json)의 BPM 시계열을 그대로 쓰고, 깜빡임과 움직임만
+numpy 로 다시 계산한다. 영상 디코딩, dlib 예측, scipy 가 필요 없어 수 밀리초~수십 밀리초면 끝난다.
+
+저장되는 움직임 값도 추출 시 같은 랜드마크 트랙에서 motion_from_track 으로 계산하므로
+(analyzer.extract_all_features), 간격을 바꿔 다시 계산한 값과 출처가 같다.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import analyzer, blinks, feature_store
+from .config import FEATURE_DIR, USE_SKIN_ROI
+from .feature_store import FeatureSet
+from .results import build_results
+
+
+def motion_from_track(
+    landmarks: np.ndarray,
+    timestamps: np.ndarray,
+    duration: float,
+    second_interval: float = 1.0,
+) -> List[float]:
+    """second_interval 초마다 랜드마크 평균 이동량을 계산한다.
+
+    각 샘플 시각 이후 첫 번째로 얼굴이 검출된 프레임(다음 샘플 시각 전까지)의 랜드마크를
+    사용한다. 그 구간에 얼굴이 없으면 0 을 기록하고 직전 랜드마크를 유지한다
+    (features.MotionExtractor 와 같은 규칙).
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    sample_times = np.arange(0.0, max(duration, 0.0) + 1e-9, second_interval)
+    if not len(timestamps):
+        return [0.0] * len(sample_times)
+
+    index = np.searchsorted(timestamps, sample_times, side="left")
+    found = index < len(timestamps)
+    found[found] &= timestamps[index[found]] < sample_times[found] + second_interval
+
+    motions: List[float] = []
+    prev: Optional[np.ndarray] = None
+    for i, ok in zip(index, found):
+        if not ok:
+            motions.append(0.0)
+            continue
+        current = landmarks[i]
+        motions.append(0.0 if prev is None else float(np.linalg.norm(current - prev, axis=1).mean()))
+        prev = current
+    return motions
+
+
+def track_duration(features: FeatureSet) -> float:
+    """분석한 마지막 프레임의 시각 (frame_timestamps 가 없는 이전 저장소는 검출 프레임 기준)."""
+    for times in (features.frame_timestamps, features.timestamps):
+        if times is not None and len(times):
+            return float(times[-1])
+    return 0.0
+
+
+def stored_series(results: Dict[str, Any]) -> Dict[str, Any]:
+    """저장된 결과 문서에서 analyze_series 형식의 BPM / 깜빡임 시계열을 되살린다."""
+    bpm, blink = results["bpm"], results["blink"]
+    series: Dict[str, Any] = {
+        "method": results["method"],
+        "fps": results["fps"],
+        "video_duration": results["duration"],
+        "time_bpm": bpm["time"],
+        "bpm_per_second": bpm["values"],
+        "fft_bpm": bpm["fft_bpm"],
+        "peak_bpm": bpm["peak_bpm"],
+        "time_blink": blink["time"],
+        "blink_counts": blink["counts"],
+        "blink_duration": blink["duration"],
+    }
+    if blink.get("events"):
+        series["blink_events"] = dict(blink["events"])
+    return series
+
+
+def score_features(
+    video_id: str,
+    features: FeatureSet,
+    blink_thresh: Optional[float] = None,
+    motions: Optional[List[float]] = None,
+    stability_threshold: float = 2.0,
+    motion_interval: Optional[float] = None,
+    series: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """특징 저장소로 rPPG / 깜빡임 시계열을 계산해 결과 문서를 만든다.
+
+    깜빡임은 EAR 트랙에서 히스테리시스 이벤트로 다시 세어 초당 이벤트 수로 집계한다
+    (EAR 이 없는 이전 저장소는 프레임별 blink 플래그 합계). blink_thresh / motions 를
+    생략하면 추출 시 임계값과 저장된 움직임을 사용한다. series(stored_series 결과)를
+    주면 rPPG 계산을 건너뛰고 그 BPM 시계열을 사용한다.
+    """
+    if blink_thresh is None:
+        blink_thresh = features.meta.get("blink_thresh", 0.25)
+
+    if series is None:
+        # 실제 프레임 시각을 분석 fps 의 균일한 시간 축으로 재샘플링해 계산한다.
+        # 기본적으로 얼굴 박스 전체 대신 이마/뺨 피부 영역 평균을 rPPG 입력으로 사용한다
+        series = analyzer.analyze_series_arrays(
+            features.skin_rgb() if USE_SKIN_ROI else features.rgb,
+            features.blink,
+            fps=max(1, int(round(features.analysis_fps))),
+            timestamps=features.timestamps,
+        )
+    else:
+        series = dict(series)
+    if features.ear is not None and features.timestamps is not None:
+        events = blinks.detect_blinks(features.ear, features.timestamps, blink_thresh)
+        series.update(blinks.blink_series(events, track_duration(features)))
+    if motions is None:
+        motions = features.motion.tolist() if features.motion is not None else []
+    if motion_interval is None:
+        motion_interval = features.meta.get("second_interval", 1)
+    return build_results(video_id, series, motions, stability_threshold, motion_interval)
+
+
+def reanalyze(
+    video_id: str,
+    blink_thresh: Optional[float] = None,
+    second_interval: Optional[float] = None,
+    stability_threshold: float = 2.0,
+    feature_root: Path = FEATURE_DIR,
+    stored: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """저장된 특징 트랙으로 결과 문서를 다시 계산한다 (영상 디코딩 없음).
+
+    stored(저장된 결과 문서)를 주면 BPM 시계열을 재사용하고 깜빡임/움직임만 계산하므로
+    API 프로세스에서 바로 실행할 수 있다. 없으면 rPPG 까지 다시 계산한다 (분석 워커용).
+
+    Parameters
+    ----------
+    video_id : str
+    blink_thresh : float, optional
+        EAR 깜빡임 임계값. 생략하면 추출 시 값(저장된 blink 플래그)을 사용한다.
+    second_interval : float, optional
+        움직임 샘플 간격 (초). 생략하거나 추출 시 값과 같으면 저장된 움직임을 사용하고,
+        다르면 랜드마크 트랙에서 다시 계산한다.
+    stability_threshold : float
+        안정 구간 판정 임계값
+    stored : dict, optional
+        results/{video_id}.json 결과 문서
+    """
+    features = feature_store.open_features(Path(feature_root) / video_id)
+    if blink_thresh is not None and features.ear is None:
+        raise ValueError("이 특징 저장소에는 EAR 이 없어 깜빡임을 다시 계산할 수 없습니다.")
+
+    motions = None
+    if second_interval is not None and second_interval != features.meta.get("second_interval"):
+        if features.landmarks is None or features.timestamps is None:
+            raise ValueError("이 특징 저장소에는 랜드마크 트랙이 없어 움직임을 다시 계산할 수 없습니다.")
+        motions = motion_from_track(
+            features.landmarks, features.timestamps, track_duration(features), second_interval
+        )
+
+    results = score_features(
+        video_id,
+        features,
+        blink_thresh,
+        motions,
+        stability_threshold,
+        motion_interval=second_interval,
+        series=stored_series(stored) if stored is not None else None,
+    )
+    results["params"] = {
+        "blink_thresh": features.meta.get("blink_thresh") if blink_thresh is None else blink_thresh,
+        "second_interval": features.meta.get("second_interval") if second_interval is None else second_interval,
+        "stability_threshold": stability_threshold,
+    }
+    return results
@@ -0,0 +1,185 @@
+"""Thread-safe, on-demand plot rendering with an LRU cache.
+
+pyplot 상태 머신과 전역 rcParams 를 쓰지 않고 Figure/Agg 객체 API 로 직접
+그리므로 여러 스레드에서 동시에 렌더링해도 안전하다. 그래프는 저장된 수치
+결과(results.py)로부터 요청 시점에만 생성된다.
+"""
+from __future__ import annotations
+
+import io
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from . import metrics
+
+IMAGE_TYPES = ("bpm", "blink", "motion")
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+}
+
+# 공통 스타일 (기존 rcParams 설정과 동일)
+STYLE = {
+    "font_family": "DejaVu Sans",
+    "edge_color": "#DDDDDD",
+    "edge_width": 0.8,
+    "title_size": 16,
+    "label_size": 13,
+}
+
+
+def _new_axes(width: int, height: int, dpi: int):
+    # matplotlib 은 첫 렌더링 때 로드한다 (서버 시작 시간 단축)
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    for spine in ax.spines.values():
+        spine.set_edgecolor(STYLE["edge_color"])
+        spine.set_linewidth(STYLE["edge_width"])
+    return fig, ax
+
+
+def _finish(ax, title: str, xlabel: str, ylabel: str) -> None:
+    font = {"family": STYLE["font_family"]}
+    ax.set_title(title, pad=15, fontsize=STYLE["title_size"], fontdict=font)
+    ax.set_xlabel(xlabel, fontsize=STYLE["label_size"], fontdict=font)
+    ax.set_ylabel(ylabel, fontsize=STYLE["label_size"], fontdict=font)
+    ax.grid(axis="y", linestyle="--", alpha=0.3)
+    ax.legend(loc="upper right", frameon=False, prop=font)
+
+
+def _set_time_ticks(ax, duration: float) -> None:
+    # x축 범위를 영상 길이로 제한하고 최대 8개 정도의 틱 표시
+    ax.set_xlim(0, duration)
+    tick_interval = max(1, int(duration / 8))
+    ticks = list(range(0, int(duration) + 1, tick_interval))
+    if int(duration) not in ticks:  # 마지막 시간점 추가
+        ticks.append(int(duration))
+    ax.set_xticks(ticks)
+
+
+def _draw_bpm(ax, results: Dict[str, Any]) -> str:
+    time_bpm = results["bpm"]["time"]
+    if time_bpm:
+        ax.plot(time_bpm, results["bpm"]["values"], color="#007AFF", linewidth=2.2, label="Heart Rate", alpha=0.9)
+        _set_time_ticks(ax, results["duration"])
+    ax.axhspan(60, 100, color="lightgreen", alpha=0.2, label="Normal range")
+    if results.get("method") == "legacy":
+        return "Heart Rate Over Time (Legacy)"
+    return "Heart Rate Over Time (Advanced rPPG)"
+
+
+def _draw_blink(ax, results: Dict[str, Any]) -> str:
+    time_blink = results["blink"]["time"]
+    blink_counts = results["blink"]["counts"]
+    ax.plot(time_blink, blink_counts, color="#34C759", linewidth=2.2, label="Blink Rate", alpha=0.9)
+
+    # 평균 blink rate 라인 추가
+    if blink_counts:
+        ax.axhline(y=float(np.mean(blink_counts)), color="gray", linestyle="--", linewidth=1.4, label="Average")
+    if time_blink:
+        _set_time_ticks(ax, results["blink"].get("duration", results["duration"]))
+    return "Blink Frequency Over Time"
+
+
+def _draw_motion(ax, results: Dict[str, Any]) -> str:
+    x = results["motion"]["time"]
+    ax.plot(x, results["motion"]["values"], color="#FF6B6B", linewidth=2.2, label="Movement", alpha=0.9)
+    ax.axhline(y=results["motion"]["threshold"], color="gray", linestyle="--", linewidth=1.4, label="Threshold")
+    if x:
+        ax.set_xticks(x[::max(1, len(x) // 10)])  # 최대 10개 눈금만 표시
+    return "Motion Intensity Over Time"
+
+
+_DRAWERS = {
+    "bpm": (_draw_bpm, "Estimated BPM"),
+    "blink": (_draw_blink, "Blinks / sec"),
+    "motion": (_draw_motion, "Avg Movement Intensity"),
+}
+
+
+def render_plot(
+    results: Dict[str, Any],
+    image_type: str,
+    width: int = 1200,
+    height: int = 500,
+    dpi: int = 100,
+    fmt: str = "png",
+) -> bytes:
+    """결과 문서로부터 그래프 하나를 그려 이미지 바이트로 반환한다.
+
+    Parameters
+    ----------
+    results : dict
+        results.build_results 로 만든 결과 문서
+    image_type : str
+        "bpm", "blink", "motion" 중 하나
+    width, height : int
+        출력 크기 (픽셀)
+    dpi : int
+        렌더링 해상도. 글자/선 굵기의 상대 크기를 결정한다.
+    fmt : str
+        "png", "webp", "svg" 중 하나
+    """
+    draw, ylabel = _DRAWERS[image_type]
+    with metrics.timed("plot"):
+        fig, ax = _new_axes(width, height, dpi)
+        title = draw(ax, results)
+        _finish(ax, title, "Time (seconds)", ylabel)
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        # SVG 는 생성 시각을 기록하지 않아야 같은 요청에 같은 바이트가 나온다 (ETag)
+        metadata = {"Date": None} if fmt == "svg" else None
+        fig.savefig(buffer, format=fmt, dpi=dpi, metadata=metadata)
+    return buffer.getvalue()
+
+
+class PlotCache:
+    """바이트 상한을 가진 스레드 안전 LRU 캐시."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: Hashable, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def discard(self, video_id: str) -> None:
+        """특정 video_id 의 모든 렌더링 결과를 제거한다."""
+        with self._lock:
+            for key in [k for k in self._items if k[0] == video_id]:
+                self._size -= len(self._items.pop(key))
+
+
+def cache_key(
+    video_id: str, image_type: str, width: int, height: int, dpi: int, fmt: str
+) -> Tuple[str, str, int, int, int, str]:
+    return (video_id, image_type, width, height, dpi, fmt)
@@ -0,0 +1,100 @@
+"""Content-addressed cache of finished analysis results.
+
+같은 바이트의 영상은 같은 video_id 로 매핑되므로, 이미 분석된 영상이 다시
+업로드되면 파이프라인을 건너뛰고 저장된 결과를 그대로 돌려준다.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import (
+    ANALYSIS_FPS,
+    BLINK_HYSTERESIS,
+    DECODE_WIDTH,
+    FACE_BOX_SMOOTHING,
+    FACE_DETECT_INTERVAL,
+    FACE_DETECT_WIDTH,
+    FACE_DETECTOR,
+    FACE_TRACK_MIN_CONFIDENCE,
+    MOTION_DETECTOR,
+    ROI_SKIN_MASK,
+    USE_SKIN_ROI,
+    YUNET_SCORE_THRESHOLD,
+)
+
+# 분석 알고리즘/파라미터가 바뀌어 기존 결과를 재사용하면 안 될 때 올린다
+ANALYSIS_VERSION = "11"
+
+# 결과 값에 영향을 주는 배포 설정. video_id 키에 함께 해시하므로 이 값을 바꾸면
+# 기존 결과를 재사용하지 않는다. 새 설정이 결과를 바꾼다면 여기에 추가하거나
+# ANALYSIS_VERSION 을 올려야 한다. (워커 수, 프리페치, 디코딩 백엔드처럼 속도에만
+# 영향을 주는 설정은 넣지 않는다)
+ANALYSIS_SETTINGS = {
+    "analysis_fps": ANALYSIS_FPS,
+    "decode_width": DECODE_WIDTH,
+    "face_detect_width": FACE_DETECT_WIDTH,
+    "face_detect_interval": FACE_DETECT_INTERVAL,
+    "face_track_min_confidence": FACE_TRACK_MIN_CONFIDENCE,
+    "face_box_smoothing": FACE_BOX_SMOOTHING,
+    "use_skin_roi": USE_SKIN_ROI,
+    "roi_skin_mask": ROI_SKIN_MASK,
+    "blink_hysteresis": BLINK_HYSTERESIS,
+    "face_detector": FACE_DETECTOR.lower(),
+    "motion_detector": MOTION_DETECTOR.lower(),
+    "yunet_score_threshold": YUNET_SCORE_THRESHOLD,
+}
+
+
+def video_id_for(digest: str, version: str = ANALYSIS_VERSION) -> str:
+    """영상 sha256, 분석 버전, 결과에 영향을 주는 설정(ANALYSIS_SETTINGS)으로부터 결정적인 video_id 를 만든다.
+
+    설정이 다른 배포(또는 설정을 바꾼 뒤의 재업로드)는 서로 다른 video_id 를 받으므로
+    다른 설정으로 계산한 결과를 재사용하지 않는다.
+    """
+    settings = json.dumps(ANALYSIS_SETTINGS, sort_keys=True, separators=(",", ":"))
+    key = f"{digest}:{version}:{settings}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+class ResultCache:
+    """video_id 별 결과 manifest(JSON)를 저장/조회한다.
+
+    manifest 는 파이프라인이 성공적으로 끝난 뒤에만 원자적으로 기록되므로,
+    manifest 가 있으면 CSV/이미지 결과도 모두 존재한다고 볼 수 있다.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, video_id: str) -> Path:
+        return self.root / f"{video_id}.json"
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            manifest = json.loads(self.path(video_id).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if manifest.get("version") != ANALYSIS_VERSION:
+            return None
+        return manifest["result"]
+
+    def put(self, video_id: str, digest: str, result: Dict[str, Any]) -> None:
+        manifest = {
+            "video_id": video_id,
+            "digest": digest,
+            "version": ANALYSIS_VERSION,
+            "result": result,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(manifest, fh)
+        os.replace(tmp, self.path(video_id))
+
+    def delete(self, video_id: str) -> None:
+        self.path(video_id).unlink(missing_ok=True)
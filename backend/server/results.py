@@ -0,0 +1,171 @@
+"""Numeric time-series results (JSON / NPZ) for one analyzed video.
+
+클라이언트가 직접 차트를 그릴 수 있도록 BPM, 초당 깜빡임, 움직임 시계열과
+요약 통계를 저장한다. PNG 렌더링 없이도 결과를 제공할 수 있다.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def _round(values, ndigits: int = 3) -> List[float]:
+    return [round(float(v), ndigits) for v in values]
+
+
+def _stats(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"mean": None, "min": None, "max": None, "std": None}
+    arr = np.asarray(values, dtype=float)
+    return {
+        "mean": round(float(arr.mean()), 3),
+        "min": round(float(arr.min()), 3),
+        "max": round(float(arr.max()), 3),
+        "std": round(float(arr.std()), 3),
+    }
+
+
+def build_results(
+    video_id: str,
+    series: Dict[str, Any],
+    motions_per_second: List[float],
+    stability_threshold: float = 2.0,
+    motion_interval: float = 1.0,
+) -> Dict[str, Any]:
+    """analyze_series 결과와 움직임 시계열로 응답용 결과 문서를 만든다.
+
+    motion_interval 은 움직임 샘플 간격 (초) 이다.
+    """
+    bpm = series["bpm_per_second"]
+    blinks = series["blink_counts"]
+    motion = [float(m) for m in motions_per_second]
+    blink_duration = series["blink_duration"]
+    events = series.get("blink_events")
+    # 이벤트 목록이 있으면 총 횟수는 이벤트 수로 센다 (구간별 합계는 표시용)
+    blink_total = len(events["onsets"]) if events else int(sum(blinks))
+
+    return {
+        "video_id": video_id,
+        "method": series["method"],
+        "fps": series["fps"],
+        "duration": round(float(series["video_duration"]), 3),
+        "bpm": {
+            "time": _round(series["time_bpm"]),
+            "values": _round(bpm, 2),
+            "fft_bpm": round(series["fft_bpm"], 2),
+            "peak_bpm": round(series["peak_bpm"], 2),
+        },
+        "blink": {
+            "time": _round(series["time_blink"]),
+            "counts": _round(blinks, 0),
+            "duration": round(float(blink_duration), 3),
+            # 깜빡임 이벤트 (시작 시각 / 지속 시간, 초). 이벤트 검출 전 결과에는 없음
+            "events": (
+                {"onsets": _round(events["onsets"]), "durations": _round(events["durations"])}
+                if events else None
+            ),
+        },
+        "motion": {
+            "time": _round(np.arange(len(motion)) * motion_interval),
+            "values": _round(motion),
+            "threshold": stability_threshold,
+        },
+        "summary": {
+            "bpm": _stats(bpm),
+            "blink_total": blink_total,
+            "blinks_per_minute": round(blink_total / blink_duration * 60, 2) if blink_duration else None,
+            "motion": _stats(motion),
+            "stable_ratio": (
+                round(sum(1 for m in motion if m <= stability_threshold) / len(motion), 3)
+                if motion else None
+            ),
+        },
+    }
+
+
+# 미리 압축한 파일과 요청 시 압축(http_cache)이 같은 설정을 써야 "-gz" ETag 하나가
+# 항상 같은 바이트를 가리킨다
+GZIP_LEVEL = 9
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    """결정적인 gzip 압축 (mtime=0, GZIP_LEVEL): 같은 입력이면 같은 출력 (ETag 와 일치)."""
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResultStore:
+    """video_id 별 결과 문서를 JSON 파일로 저장한다.
+
+    precompress 가 참이면 gzip 으로 압축한 사본(<video_id>.json.gz)을 함께 저장해
+    Accept-Encoding: gzip 요청에 그대로 제공한다.
+    """
+
+    def __init__(self, root: Path, precompress: bool = False):
+        self.root = root
+        self.precompress = precompress
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, video_id: str) -> Path:
+        return self.root / f"{video_id}.json"
+
+    def gzip_path(self, video_id: str) -> Path:
+        return self.root / f"{video_id}.json.gz"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+    def save(self, results: Dict[str, Any]) -> List[Path]:
+        """결과를 저장하고 기록한 파일 경로들을 반환한다."""
+        video_id = results["video_id"]
+        data = json.dumps(results, separators=(",", ":")).encode()
+        self._write(self.path(video_id), data)
+        paths = [self.path(video_id)]
+        if self.precompress:
+            self._write(self.gzip_path(video_id), gzip_bytes(data))
+            paths.append(self.gzip_path(video_id))
+        return paths
+
+    def read_bytes(self, video_id: str, compressed: bool = False) -> Optional[bytes]:
+        path = self.gzip_path(video_id) if compressed else self.path(video_id)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def load(self, video_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self.path(video_id).read_text())
+        except FileNotFoundError:
+            return None
+
+
+def to_npz_bytes(results: Dict[str, Any]) -> bytes:
+    """결과 문서를 float32 배열 묶음(.npz)으로 직렬화한다. 요약은 JSON 문자열로 포함."""
+    arrays = {
+        "bpm_time": np.asarray(results["bpm"]["time"], dtype=np.float32),
+        "bpm": np.asarray(results["bpm"]["values"], dtype=np.float32),
+        "blink_time": np.asarray(results["blink"]["time"], dtype=np.float32),
+        "blink_counts": np.asarray(results["blink"]["counts"], dtype=np.float32),
+        "motion_time": np.asarray(results["motion"]["time"], dtype=np.float32),
+        "motion": np.asarray(results["motion"]["values"], dtype=np.float32),
+        "fft_bpm": np.float32(results["bpm"]["fft_bpm"]),
+        "peak_bpm": np.float32(results["bpm"]["peak_bpm"]),
+        "summary": np.array(json.dumps(results["summary"])),
+    }
+    events = results["blink"].get("events")
+    if events:
+        arrays["blink_onsets"] = np.asarray(events["onsets"], dtype=np.float32)
+        arrays["blink_durations"] = np.asarray(events["durations"], dtype=np.float32)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
@@ -0,0 +1,294 @@
+"""Disk quota / retention management for uploads and analysis artifacts.
+
+파일을 만드는 쪽(파이프라인)이 경로와 크기를 SQLite 인덱스에 기록하고,
+백그라운드 스레드가 인덱스만 보고 TTL 과 용량 한도(LRU)를 적용한다.
+정리 과정에서 uploads/, features/, static/ 등의 디렉터리를 스캔하지 않는다.
+
+종류(kind)별 정책
+-----------------
+raw        원본 영상. 특징 추출 후 즉시 삭제하거나(기본), raw_ttl 이 지나면 삭제
+그 외      특징/결과/그래프/캐시 manifest. video_id 단위로 묶어 LRU + 용량 한도 + TTL
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RAW = "raw"
+MANIFEST = "manifest"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path        TEXT PRIMARY KEY,
+    video_id    TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_video ON artifacts (video_id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_access ON artifacts (last_access);
+"""
+
+
+def _path_size(path: Path) -> int:
+    # 디렉터리(특징 저장소)는 한 단계 아래 파일만 합산한다
+    if path.is_dir():
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return path.stat().st_size
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+class RetentionIndex:
+    """아티팩트 경로/크기/접근 시각 인덱스 (여러 프로세스에서 동시에 사용 가능)."""
+
+    # 같은 video_id 의 접근 시각 갱신은 이 간격(초) 안에서는 생략한다
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._touched: Dict[str, float] = {}
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # 기록 ------------------------------------------------------------------
+    def record(self, video_id: str, kind: str, paths: Iterable[Path]) -> None:
+        now = time.time()
+        rows = []
+        for path in paths:
+            path = Path(path)
+            if path.exists():
+                rows.append((str(path), video_id, kind, _path_size(path), now, now))
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def forget(self, video_id: str, kind: Optional[str] = None) -> None:
+        if kind is None:
+            self._touched.pop(video_id, None)
+        with self._connect() as conn:
+            if kind is None:
+                conn.execute("DELETE FROM artifacts WHERE video_id = ?", (video_id,))
+            else:
+                conn.execute(
+                    "DELETE FROM artifacts WHERE video_id = ? AND kind = ?", (video_id, kind)
+                )
+
+    def forget_derived(self, video_id: str) -> None:
+        self._touched.pop(video_id, None)
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM artifacts WHERE video_id = ? AND kind != ?", (video_id, RAW)
+            )
+
+    def touch(self, video_id: str) -> None:
+        """video_id 의 모든 아티팩트를 최근 사용으로 표시한다 (LRU)."""
+        now = time.time()
+        if now - self._touched.get(video_id, 0.0) < self.TOUCH_INTERVAL:
+            return
+        self._touched[video_id] = now
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE artifacts SET last_access = ? WHERE video_id = ?", (now, video_id)
+            )
+
+    def prune_touched(self) -> None:
+        """TOUCH_INTERVAL 이 지나 더 이상 갱신을 막지 않는 touch 기록을 지운다 (메모리 상한)."""
+        cutoff = time.time() - self.TOUCH_INTERVAL
+        self._touched = {vid: at for vid, at in list(self._touched.items()) if at >= cutoff}
+
+    # 조회 ------------------------------------------------------------------
+    def paths(self, video_id: str, kind: Optional[str] = None) -> List[Path]:
+        query = "SELECT path FROM artifacts WHERE video_id = ?"
+        args: Tuple[Any, ...] = (video_id,)
+        if kind is not None:
+            query += " AND kind = ?"
+            args += (kind,)
+        return [Path(row[0]) for row in self._connect().execute(query, args)]
+
+    def derived(self, video_id: str) -> List[Tuple[Path, int]]:
+        rows = self._connect().execute(
+            # 캐시 manifest 를 가장 먼저 지워 삭제 중인 결과가 캐시 적중되지 않게 한다
+            "SELECT path, size FROM artifacts WHERE video_id = ? AND kind != ? "
+            "ORDER BY kind != ?",
+            (video_id, RAW, MANIFEST),
+        )
+        return [(Path(path), int(size)) for path, size in rows]
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        rows = self._connect().execute(
+            "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY kind"
+        )
+        return {kind: {"files": count, "bytes": size} for kind, count, size in rows}
+
+    def derived_bytes(self) -> int:
+        row = self._connect().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE kind != ?", (RAW,)
+        ).fetchone()
+        return int(row[0])
+
+    def videos_lru(self) -> List[Tuple[str, int, float]]:
+        """파생 아티팩트를 video_id 별로 묶어 오래 사용되지 않은 순으로 반환한다."""
+        rows = self._connect().execute(
+            "SELECT video_id, SUM(size), MAX(last_access) FROM artifacts "
+            "WHERE kind != ? GROUP BY video_id ORDER BY MAX(last_access)",
+            (RAW,),
+        )
+        return [(video_id, int(size), last) for video_id, size, last in rows]
+
+    def expired_raw(self, older_than: float) -> List[Tuple[str, Path]]:
+        rows = self._connect().execute(
+            "SELECT video_id, path FROM artifacts WHERE kind = ? AND created_at < ?",
+            (RAW, older_than),
+        )
+        return [(video_id, Path(path)) for video_id, path in rows]
+
+
+class RetentionManager:
+    """인덱스를 기준으로 TTL / 용량 한도를 주기적으로 적용한다.
+
+    Parameters
+    ----------
+    index : RetentionIndex
+    quota_bytes : int
+        파생 아티팩트 전체 용량 한도 (0 이면 제한 없음)
+    ttl_seconds : float
+        마지막 접근 후 파생 아티팩트를 보관할 시간 (0 이면 제한 없음)
+    raw_ttl_seconds : float
+        원본 영상 보관 시간
+    interval : float
+        정리 주기 (초)
+    on_evict : Callable[[str], None], optional
+        video_id 의 아티팩트를 지운 뒤 호출 (메모리 캐시 무효화 등)
+    hooks : list of Callable[[], int], optional
+        정리 주기마다 함께 실행할 작업 (예: 방치된 부분 업로드 정리). 삭제 개수를 반환
+    """
+
+    def __init__(
+        self,
+        index: RetentionIndex,
+        quota_bytes: int,
+        ttl_seconds: float,
+        raw_ttl_seconds: float,
+        interval: float = 300.0,
+        on_evict: Optional[Callable[[str], None]] = None,
+        hooks: Optional[List[Callable[[], int]]] = None,
+    ):
+        self.index = index
+        self.quota_bytes = quota_bytes
+        self.ttl_seconds = ttl_seconds
+        self.raw_ttl_seconds = raw_ttl_seconds
+        self.interval = interval
+        self.on_evict = on_evict
+        self.hooks = list(hooks or [])
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+
+    def evict_video(self, video_id: str) -> int:
+        """video_id 의 파생 아티팩트를 모두 삭제하고 확보한 바이트 수를 반환한다."""
+        freed = 0
+        for path, size in self.index.derived(video_id):
+            _remove_path(path)
+            freed += size
+        self.index.forget_derived(video_id)
+        if self.on_evict is not None:
+            self.on_evict(video_id)
+        return freed
+
+    def run_once(self) -> Dict[str, Any]:
+        with self._run_lock:
+            now = time.time()
+            evicted: List[str] = []
+            freed = 0
+
+            # 1. 오래된 원본 영상 삭제
+            raw_removed = 0
+            for video_id, path in self.index.expired_raw(now - self.raw_ttl_seconds):
+                freed += path.stat().st_size if path.exists() else 0
+                _remove_path(path)
+                self.index.forget(video_id, RAW)
+                raw_removed += 1
+
+            # 2. TTL 이 지난 파생 아티팩트 삭제 + 3. 용량 한도를 넘으면 LRU 순으로 삭제
+            total = self.index.derived_bytes()
+            for video_id, size, last_access in self.index.videos_lru():
+                expired = self.ttl_seconds and last_access < now - self.ttl_seconds
+                over_quota = self.quota_bytes and total > self.quota_bytes
+                if not expired and not over_quota:
+                    break
+                freed += self.evict_video(video_id)
+                total -= size
+                evicted.append(video_id)
+
+            # 4. 기타 정리 작업
+            hook_removed = sum(hook() for hook in self.hooks)
+            self.index.prune_touched()
+
+            self.last_run = {
+                "at": now,
+                "raw_removed": raw_removed,
+                "other_removed": hook_removed,
+                "evicted_videos": len(evicted),
+                "freed_bytes": freed,
+            }
+            if evicted or raw_removed:
+                logger.info("retention: %s", self.last_run)
+            return self.last_run
+
+    def report(self) -> Dict[str, Any]:
+        usage = self.index.usage()
+        return {
+            "usage": usage,
+            "derived_bytes": self.index.derived_bytes(),
+            "raw_bytes": usage.get(RAW, {}).get("bytes", 0),
+            "quota_bytes": self.quota_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "raw_ttl_seconds": self.raw_ttl_seconds,
+            "last_run": self.last_run,
+        }
+
+    # 백그라운드 스레드 -------------------------------------------------------
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:  # pragma: no cover
+                logger.exception("retention run failed")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
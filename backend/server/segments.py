@@ -0,0 +1,126 @@
+"""Segment-parallel feature extraction.
+
+긴 영상은 시간 구간으로 나누어 구간마다 별도 프로세스에서 run_extractors 를
+실행하고(각 프로세스가 자체 검출기/shape predictor 를 로드), 결과를 시간 순서대로
+이어 붙인다. 각 구간은 시작 시각 앞 overlap 초를 먼저 읽어 얼굴 추적기와
+움직임 추출기의 상태를 맞춘 뒤 자기 구간의 프레임만 기록한다. 구간 경계는 움직임
+샘플 간격(interval)의 배수에 맞추므로 이어 붙인 샘플 시각이 순차 실행과 같다.
+"""
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import features, metrics, models
+from .config import MIN_SEGMENT_SECONDS, SEGMENT_OVERLAP_SECONDS, SEGMENT_WORKERS
+
+
+def plan_segments(
+    duration: float, workers: int, min_seconds: float, interval: float = 1.0
+) -> List[Tuple[float, float]]:
+    """[0, duration) 를 최대 workers 개의 (start, end) 구간으로 나눈다.
+
+    구간 길이는 min_seconds 이상이며 경계는 interval 초의 배수에 맞춘다 (움직임 샘플 격자 정렬).
+    마지막 구간의 end 는 None 대신 inf 로 두어 남은 프레임을 모두 포함한다.
+    """
+    count = max(1, min(workers, int(duration // max(min_seconds, 1.0))))
+    if count == 1:
+        return [(0.0, float("inf"))]
+    bounds = [round(duration * i / count / interval) * interval for i in range(count)] + [float("inf")]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+@lru_cache(maxsize=None)
+def _executor(workers: int) -> ProcessPoolExecutor:
+    # 분석 워커 안에서 한 번 만들어 재사용한다 (자식 프로세스는 모델을 한 번만 로드)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=models.warm_up,
+    )
+
+
+def _extract_segment(
+    video_path: str,
+    extractors: Sequence[features.FeatureExtractor],
+    start: float,
+    end: float,
+    overlap: float,
+    target_fps: Optional[float],
+) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"start_time": start, "end_time": end, "overlap": overlap}
+    if target_fps is not None:
+        kwargs["target_fps"] = target_fps
+    try:
+        return features.run_extractors(video_path, extractors, **kwargs)
+    finally:
+        metrics.dump()  # 자식 프로세스의 단계별 시간도 /metrics 에 합산
+
+
+def _stitch(parts: Sequence[Any]) -> Any:
+    """구간별 추출기 결과를 시간 순서대로 이어 붙인다."""
+    first = parts[0]
+    if isinstance(first, np.ndarray):
+        return np.concatenate(parts, axis=0)
+    if isinstance(first, dict):
+        return {key: _stitch([part[key] for part in parts]) for key in first}
+    if isinstance(first, list):
+        return [value for part in parts for value in part]
+    raise TypeError(f"Cannot stitch extractor result of type {type(first).__name__}")
+
+
+def run_extractors(
+    video_path: str,
+    extractors: Sequence[features.FeatureExtractor],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    target_fps: Optional[float] = None,
+    workers: int = SEGMENT_WORKERS,
+    min_segment_seconds: float = MIN_SEGMENT_SECONDS,
+    overlap: float = SEGMENT_OVERLAP_SECONDS,
+    interval: float = 1.0,
+) -> Dict[str, Any]:
+    """features.run_extractors 와 같은 결과를 구간 병렬로 계산한다.
+
+    workers 가 1 이하이거나 영상이 min_segment_seconds * 2 보다 짧으면 현재
+    프로세스에서 순차로 실행한다. on_progress 는 구간이 끝날 때마다 호출된다.
+    MotionExtractor 를 넘길 때는 interval 에 그 second_interval 을 준다 (구간 경계 정렬).
+    겹침 구간은 구간 시작 직전 샘플을 포함하도록 최소 interval 초로 늘린다.
+    """
+    segments: List[Tuple[float, float]] = []
+    if workers > 1:
+        # 구간을 나눌 때만 길이를 알기 위해 컨테이너를 연다 (순차 실행은 추가 비용 없음)
+        import cv2
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"영상 파일을 열 수 없습니다: {video_path}")
+        meta = features.read_video_meta(cap)
+        cap.release()
+        duration = meta.frame_count / meta.fps if meta.fps > 0 else 0.0
+        segments = plan_segments(duration, workers, min_segment_seconds, interval)
+    if len(segments) < 2:
+        kwargs = {} if target_fps is None else {"target_fps": target_fps}
+        return features.run_extractors(video_path, extractors, on_progress, **kwargs)
+
+    overlap = max(overlap, interval)
+    executor = _executor(workers)
+    futures = [
+        executor.submit(_extract_segment, video_path, extractors, start, end, overlap, target_fps)
+        for start, end in segments
+    ]
+    parts: List[Dict[str, Any]] = []
+    for i, future in enumerate(futures):
+        parts.append(future.result())
+        if on_progress is not None:
+            done = meta.frame_count if i == len(futures) - 1 else int(segments[i][1] * meta.fps)
+            on_progress(done, meta.frame_count)
+
+    results: Dict[str, Any] = {
+        extractor.name: _stitch([part[extractor.name] for part in parts]) for extractor in extractors
+    }
+    results["meta"] = parts[0]["meta"]
+    return results
@@ -0,0 +1,133 @@
+"""Face box tracking between periodic detections.
+
+인터뷰 영상에서는 얼굴이 거의 움직이지 않으므로 매 프레임 얼굴 검출을 하는 대신
+detect_interval 프레임마다(또는 추적 신뢰도가 떨어지면) 검출하고, 그 사이에는
+직전 검출 박스를 템플릿으로 삼아 주변 영역에서 템플릿 매칭으로 위치를 추적한다.
+매칭은 템플릿 폭을 template_width 픽셀로 줄인 축소 영상에서 수행해 비용을 낮춘다.
+반환되는 박스는 지수 이동 평균으로 평활화되어 ROI 평균값의 흔들림을 줄인다.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from . import metrics
+from .config import FACE_BOX_SMOOTHING, FACE_DETECT_INTERVAL, FACE_TRACK_MIN_CONFIDENCE
+
+Box = Tuple[int, int, int, int]  # (x, y, w, h)
+
+
+class FaceTracker:
+    """검출/추적 스케줄러.
+
+    Parameters
+    ----------
+    detect : Callable[[np.ndarray, Optional[np.ndarray]], Optional[Box]]
+        (그레이 프레임, BGR 프레임) 에서 얼굴 박스 하나를 찾는 함수 (없으면 None).
+        보통 detectors.FaceDetector 객체이다.
+    detect_interval : int
+        검출 간격 (프레임). 그 사이 프레임은 추적한다.
+    min_confidence : float
+        템플릿 매칭 정규화 상관계수가 이 값보다 낮으면 즉시 다시 검출한다.
+    smoothing : float
+        새 박스에 주는 가중치 (0~1). 1 이면 평활화하지 않는다.
+    search_margin : float
+        추적 탐색 영역 여백 (박스 크기 대비 비율).
+    template_width : int
+        템플릿 매칭에 사용할 축소 템플릿 폭 (픽셀).
+    """
+
+    def __init__(
+        self,
+        detect: Callable[[np.ndarray, Optional[np.ndarray]], Optional[Box]],
+        detect_interval: int = FACE_DETECT_INTERVAL,
+        min_confidence: float = FACE_TRACK_MIN_CONFIDENCE,
+        smoothing: float = FACE_BOX_SMOOTHING,
+        search_margin: float = 0.25,
+        template_width: int = 48,
+    ):
+        self.detect = detect
+        self.detect_interval = max(1, int(detect_interval))
+        self.min_confidence = min_confidence
+        self.smoothing = min(max(smoothing, 0.0), 1.0)
+        self.search_margin = search_margin
+        self.template_width = template_width
+        self.stats: Dict[str, int] = {"detections": 0, "tracked": 0, "redetections": 0}
+        self.reset()
+
+    def reset(self) -> None:
+        self._box: Optional[Box] = None  # 평활화 전 현재 박스
+        self._smoothed: Optional[np.ndarray] = None
+        self._template: Optional[np.ndarray] = None
+        self._scale = 1.0
+        self._since_detect = 0
+
+    # 단계 ------------------------------------------------------------------
+    def _detect(self, gray: np.ndarray, frame: Optional[np.ndarray]) -> Optional[Box]:
+        self.stats["detections"] += 1
+        box = self.detect(gray, frame)
+        if box is None:
+            self.reset()
+            return None
+
+        x, y, w, h = box
+        # 축소 템플릿은 검출 시점에만 갱신한다 (추적 중 갱신하면 드리프트가 누적됨)
+        self._scale = min(1.0, self.template_width / float(w))
+        self._template = cv2.resize(
+            gray[y : y + h, x : x + w], None, fx=self._scale, fy=self._scale, interpolation=cv2.INTER_AREA
+        )
+        self._box = box
+        self._since_detect = 0
+        return box
+
+    def _track(self, gray: np.ndarray) -> Tuple[Optional[Box], float]:
+        """직전 박스 주변에서 템플릿 위치를 찾아 (박스, 상관계수) 를 반환한다."""
+        x, y, w, h = self._box
+        frame_h, frame_w = gray.shape[:2]
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(x - mx, 0), max(y - my, 0)
+        x1, y1 = min(x + w + mx, frame_w), min(y + h + my, frame_h)
+
+        window = cv2.resize(
+            gray[y0:y1, x0:x1], None, fx=self._scale, fy=self._scale, interpolation=cv2.INTER_AREA
+        )
+        th, tw = self._template.shape[:2]
+        if window.shape[0] < th or window.shape[1] < tw:
+            return None, 0.0  # 박스가 프레임 가장자리로 벗어남
+
+        scores = cv2.matchTemplate(window, self._template, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, (bx, by) = cv2.minMaxLoc(scores)
+        nx = min(max(x0 + int(round(bx / self._scale)), 0), frame_w - w)
+        ny = min(max(y0 + int(round(by / self._scale)), 0), frame_h - h)
+        return (nx, ny, w, h), float(confidence)
+
+    def _smooth(self, box: Box) -> Box:
+        current = np.asarray(box, dtype=np.float64)
+        if self._smoothed is None:
+            self._smoothed = current
+        else:
+            self._smoothed = self.smoothing * current + (1.0 - self.smoothing) * self._smoothed
+        return tuple(int(round(v)) for v in self._smoothed)
+
+    # 공개 API ----------------------------------------------------------------
+    def update(self, gray: np.ndarray, frame: Optional[np.ndarray] = None) -> Optional[Box]:
+        """다음 프레임의 (평활화된) 얼굴 박스. 얼굴이 없으면 None."""
+        box: Optional[Box] = None
+        if self._box is not None and self._since_detect < self.detect_interval - 1:
+            with metrics.timed("track"):
+                box, confidence = self._track(gray)
+            if box is None or confidence < self.min_confidence:
+                self.stats["redetections"] += 1
+                box = None
+            else:
+                self.stats["tracked"] += 1
+                self._box = box
+                self._since_detect += 1
+
+        if box is None:
+            box = self._detect(gray, frame)
+            if box is None:
+                return None
+        return self._smooth(box)
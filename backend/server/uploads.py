@@ -0,0 +1,312 @@
+"""Streaming and resumable (chunked) upload ingestion."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterable, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+
+ALLOWED_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
+
+# multipart 경계/헤더가 차지하는 여유분 (Content-Length 사전 검사용)
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """업로드 크기가 허용 한도를 넘었을 때 발생한다."""
+
+
+class UploadOffsetError(ValueError):
+    """청크 오프셋이 현재 저장된 크기와 맞지 않을 때 발생한다."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Expected offset {expected}")
+        self.expected = expected
+
+
+class UploadNotFoundError(KeyError):
+    """존재하지 않거나 만료된 upload_id."""
+
+
+async def _write_stream(
+    chunks: AsyncIterable[bytes],
+    dest: Path,
+    max_bytes: int,
+    written: int = 0,
+    mode: str = "wb",
+    hasher=None,
+) -> int:
+    """청크 스트림을 디스크에 쓰고 누적 크기를 반환한다. 한도 초과 시 즉시 중단.
+
+    hasher 가 주어지면 기록하는 청크로 해시를 함께 갱신한다. 파일 열기/쓰기와 해시는
+    스레드에서 실행해 느린 디스크가 이벤트 루프(SSE 등 다른 요청)를 막지 않게 한다.
+    """
+    buffer = await asyncio.to_thread(dest.open, mode)
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            written += len(chunk)
+            if written > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+            await asyncio.to_thread(_write_chunk, buffer, chunk, hasher)
+    finally:
+        await asyncio.to_thread(buffer.close)
+    return written
+
+
+def _write_chunk(buffer, chunk: bytes, hasher) -> None:
+    buffer.write(chunk)
+    if hasher is not None:
+        hasher.update(chunk)
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용의 sha256 hex digest 를 계산한다."""
+    hasher = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+async def _iter_upload_file(file: UploadFile, chunk_size: int):
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def save_upload_file(
+    file: UploadFile,
+    dest: Path,
+    max_bytes: int,
+    chunk_size: int,
+) -> Tuple[int, str]:
+    """UploadFile 을 chunk_size 단위로 dest 에 저장하고 (크기, sha256) 을 반환한다.
+
+    전체 내용을 메모리에 올리지 않으며, max_bytes 를 넘으면 부분 파일을 지우고
+    UploadTooLargeError 를 던진다.
+    """
+    hasher = hashlib.sha256()
+    try:
+        size = await _write_stream(
+            _iter_upload_file(file, chunk_size), dest, max_bytes, hasher=hasher
+        )
+        return size, hasher.hexdigest()
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+
+
+class UploadSizeLimitMiddleware:
+    """path 로 오는 POST 요청의 본문 크기를 multipart 파싱 전에 제한하는 ASGI 미들웨어.
+
+    FastAPI 는 UploadFile 인자를 채우기 위해 핸들러 실행 전에 본문 전체를 임시 파일로
+    받으므로, 핸들러 안의 검사는 전송이 끝난 뒤에야 동작한다. 이 미들웨어는
+    Content-Length 가 한도를 넘으면 본문을 읽지 않고 바로 413 을 보내고,
+    Content-Length 가 없는(chunked) 요청은 받은 바이트 수가 한도를 넘는 순간 중단한다.
+    """
+
+    def __init__(self, app, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def _reject(self, scope, receive, send) -> None:
+        from fastapi.responses import JSONResponse
+
+        await JSONResponse(status_code=413, content={"detail": "File too large"})(scope, receive, send)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLargeError("upload exceeds size limit")
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                return  # 파싱 중단으로 생긴 앱의 오류 응답 대신 413 을 보낸다
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            await self._reject(scope, receive, send)
+
+
+class ChunkedUploadStore:
+    """init → append chunk → finalize 순서의 재개 가능한 업로드 저장소.
+
+    부분 파일(.part)과 메타데이터(.json)를 디스크에 두므로 서버가 재시작되어도
+    클라이언트는 GET 으로 현재 오프셋을 확인한 뒤 이어서 전송할 수 있다.
+
+    expire() 는 보존 관리 스레드에서 호출되므로 _locks / _hashers 는 _state_lock 으로 보호한다.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # upload_id → (해시 상태, 해시된 바이트 수). 프로세스가 바뀌면 finalize 때 다시 계산
+        self._hashers: Dict[str, Tuple[Any, int]] = {}
+        self._state_lock = threading.Lock()
+
+    # 경로 ------------------------------------------------------------------
+    def _part_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        with self._state_lock:
+            return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    # 상태 ------------------------------------------------------------------
+    def create(self, filename: str, total_size: Optional[int] = None) -> Dict:
+        if total_size is not None and total_size > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {self.max_bytes} bytes")
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "upload_id": upload_id,
+            "suffix": Path(filename).suffix.lower(),
+            "total_size": total_size,
+            "created_at": time.time(),
+        }
+        self._meta_path(upload_id).write_text(json.dumps(meta))
+        self._part_path(upload_id).touch()
+        with self._state_lock:
+            self._hashers[upload_id] = (hashlib.sha256(), 0)
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict:
+        meta_path = self._meta_path(upload_id)
+        part_path = self._part_path(upload_id)
+        if not meta_path.exists() or not part_path.exists():
+            raise UploadNotFoundError(upload_id)
+
+        meta = json.loads(meta_path.read_text())
+        meta["offset"] = part_path.stat().st_size
+        return meta
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterable[bytes]) -> Dict:
+        """offset 위치에 청크를 이어 쓴다. offset 은 현재 저장된 크기와 같아야 한다."""
+        async with self._lock(upload_id):
+            meta = self.status(upload_id)
+            if offset != meta["offset"]:
+                raise UploadOffsetError(meta["offset"])
+
+            limit = self.max_bytes
+            if meta["total_size"] is not None:
+                limit = min(limit, meta["total_size"])
+
+            # 이어지는 해시 상태가 있으면 함께 갱신한다
+            hasher = None
+            with self._state_lock:
+                state = self._hashers.get(upload_id)
+            if state is not None and state[1] == offset:
+                hasher = state[0].copy()
+
+            part_path = self._part_path(upload_id)
+            try:
+                size = await _write_stream(
+                    chunks, part_path, limit, written=offset, mode="ab", hasher=hasher
+                )
+            except BaseException:
+                # 중간에 끊긴 청크는 버리고 마지막 성공 지점으로 되돌린다
+                with part_path.open("ab") as buffer:
+                    buffer.truncate(offset)
+                raise
+
+            with self._state_lock:
+                if hasher is not None:
+                    self._hashers[upload_id] = (hasher, size)
+                else:
+                    self._hashers.pop(upload_id, None)
+            return self.status(upload_id)
+
+    def expire(self, max_age: float) -> int:
+        """마지막 활동 후 max_age 초 동안 청크가 오지 않은 업로드 세션을 삭제하고 개수를 반환한다.
+
+        마지막 활동 시각은 부분 파일의 수정 시각(청크를 쓸 때마다 갱신)과 생성 시각 중
+        늦은 쪽이므로, 느리지만 계속 전송 중인 업로드는 지우지 않는다.
+        보존 관리 스레드에서 호출된다. 지금 청크를 쓰거나 완료 처리 중인 세션은 건너뛴다.
+        """
+        cutoff = time.time() - max_age
+        removed = 0
+        for meta_path in self.root.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            upload_id = meta_path.stem
+            try:
+                last_active = max(meta.get("created_at", 0), self._part_path(upload_id).stat().st_mtime)
+            except FileNotFoundError:
+                last_active = meta.get("created_at", 0)
+            if last_active < cutoff:
+                with self._state_lock:
+                    lock = self._locks.get(upload_id)
+                    if lock is not None and lock.locked():
+                        continue
+                    self._part_path(upload_id).unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                    self._hashers.pop(upload_id, None)
+                    self._locks.pop(upload_id, None)
+                removed += 1
+        return removed
+
+    async def finalize(self, upload_id: str, dest: Path) -> Tuple[int, str]:
+        """완성된 부분 파일을 dest 로 옮기고 (최종 크기, sha256) 을 반환한다."""
+        async with self._lock(upload_id):
+            meta = self.status(upload_id)
+            if meta["total_size"] is not None and meta["offset"] != meta["total_size"]:
+                raise UploadOffsetError(meta["offset"])
+
+            part_path = self._part_path(upload_id)
+            with self._state_lock:
+                state = self._hashers.pop(upload_id, None)
+            if state is not None and state[1] == meta["offset"]:
+                digest = state[0].hexdigest()
+            else:
+                digest = await asyncio.to_thread(hash_file, part_path)
+
+            os.replace(part_path, dest)
+            self._meta_path(upload_id).unlink(missing_ok=True)
+        with self._state_lock:
+            self._locks.pop(upload_id, None)
+        return meta["offset"], digest
@@ -6,6 +6,10 @@ class ApiService {
   // 로컬 서버 URL (개발용)
   static const String baseUrl = 'http://127.0.0.1:8000';
 
+  // 결과 이미지는 videoId 별로 바뀌지 않으므로 앱 실행 중에는 메모리에 보관한다
+  static const int _maxCachedImages = 30;
+  static final Map<String, Uint8List> _imageCache = {};
+
   /// 영상 파일을 서버에 업로드하고 분석 결과를 받는다
   static Future<Map<String, dynamic>?> uploadVideo(String filePath) async {
     try {
@@ -37,11 +41,21 @@ class ApiService {
     String videoId,
     String imageType,
   ) async {
+    final cacheKey = '$imageType/$videoId';
+    final cached = _imageCache[cacheKey];
+    if (cached != null) {
+      return cached;
+    }
+
     try {
       final uri = Uri.parse('$baseUrl/download/$imageType/$videoId');
       final response = await http.get(uri);
 
       if (response.statusCode == 200) {
+        if (_imageCache.length >= _maxCachedImages) {
+          _imageCache.remove(_imageCache.keys.first);
+        }
+        _imageCache[cacheKey] = response.bodyBytes;
         return response.bodyBytes;
       } else {
         print('Download failed: ${response.statusCode}');